@@ -14,4 +14,7 @@ def find_project_root():
 
 load_dotenv()
 LOG_DIR = os.getenv("LOG_DIR","")
-ROOT_PATH = find_project_root()
\ No newline at end of file
+ROOT_PATH = find_project_root()
+KLINE_CACHE_DIR = os.getenv("KLINE_CACHE_DIR") or os.path.join(ROOT_PATH, ".kline_cache")
+MEMMAP_STORE_DIR = os.getenv("MEMMAP_STORE_DIR") or os.path.join(ROOT_PATH, ".memmap_store")
+KLINE_OUTBOX_DIR = os.getenv("KLINE_OUTBOX_DIR") or os.path.join(ROOT_PATH, ".kline_outbox")
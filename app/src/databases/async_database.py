@@ -0,0 +1,252 @@
+"""
+Asynchronous access to the database, for the orchestrators' event loop.
+
+AsyncDatabase owns a pooled SQLAlchemy async engine (asyncpg driver) and runs the
+Database methods on its synchronous facade inside greenlet_spawn: every SQL round trip
+is awaited on the running loop instead of blocking it, so kline fetches and database
+reads/writes interleave. The COPY steps are replaced by their asyncpg equivalents.
+
+DATABASE_URL is written for libpq (psycopg2): its libpq-only query parameters are translated
+into asyncpg connect arguments (see asyncpg_connect_params) before the async URL is built.
+"""
+import io
+import asyncio
+import shlex
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+from urllib.parse import urlencode
+from sqlalchemy import Connection, Engine, Select, Table
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.util import await_only, greenlet_spawn
+
+from src.core.utils.config.secret_management import DATABASE_URL
+from src.core.logging.loggers import logger_database
+
+from src.databases.database import Database
+from src.databases.kline_cache import KlineCache
+from src.databases.sql_instrumentation import SqlInstrumentation
+from src.models.lhrd_models.standard_models import ContentDataState
+
+
+T = TypeVar("T")
+
+# libpq SSL parameters, handed to asyncpg through a host-less dsn it parses like libpq does
+LIBPQ_SSL_PARAMS = (
+    "sslmode", "sslrootcert", "sslcert", "sslkey", "sslcrl", "sslpassword",
+    "ssl_min_protocol_version", "ssl_max_protocol_version", "sslnegotiation"
+)
+# libpq parameters without asyncpg equivalent (keepalives are left to the OS defaults)
+LIBPQ_DROPPED_PARAMS = (
+    "keepalives", "keepalives_idle", "keepalives_interval", "keepalives_count", "tcp_user_timeout",
+    "gssencmode", "channel_binding", "requiressl", "hostaddr", "fallback_application_name"
+)
+
+
+def asyncpg_connect_params(
+    database_url: str,
+    server_settings: Dict[str, str]
+) -> Tuple[URL, Dict[str, Any]]:
+    """
+    postgresql+asyncpg URL of a libpq DATABASE_URL and the asyncpg connect_args replacing its
+    libpq-only query parameters: SSL ones go through a dsn (same semantics as libpq),
+    connect_timeout becomes timeout, application_name and the '-c name=value' of options
+    become server settings; keepalives and the like are dropped with a warning.
+    """
+    url = make_url(database_url).set(drivername="postgresql+asyncpg")
+    query = dict(url.query)
+    server_settings = dict(server_settings)
+    connect_args: Dict[str, Any] = {}
+
+    ssl_params = {key: query.pop(key) for key in LIBPQ_SSL_PARAMS if key in query}
+    if ssl_params:
+        connect_args["dsn"] = f"postgresql://?{urlencode(ssl_params)}"
+    if "connect_timeout" in query:
+        connect_args["timeout"] = float(query.pop("connect_timeout"))
+    if "application_name" in query:
+        server_settings["application_name"] = query.pop("application_name")
+    if "options" in query:
+        tokens = shlex.split(query.pop("options"))
+        while tokens:
+            token = tokens.pop(0)
+            setting = tokens.pop(0) if token == "-c" and tokens else token[2:] if token.startswith("-c") else ""
+            name, _, value = setting.partition("=")
+            if not name or not value:
+                logger_database.warning(f"Unsupported 'options' token '{token}' in DATABASE_URL, ignored by the async engine.")
+                continue
+            server_settings.setdefault(name.replace("-", "_"), value)
+    dropped = [key for key in query if key in LIBPQ_DROPPED_PARAMS]
+    if dropped:
+        logger_database.warning(f"libpq parameters {dropped} of DATABASE_URL have no asyncpg equivalent, ignored by the async engine.")
+    connect_args["server_settings"] = server_settings
+    url = url.set(query={key: value for key, value in query.items() if key not in LIBPQ_DROPPED_PARAMS})
+    return url, connect_args
+
+
+class AsyncpgDatabase(Database):
+    """
+    Database bound to the synchronous facade of an asyncpg engine.
+    Its methods must be called under greenlet_spawn (see AsyncDatabase.run); their CPU-bound
+    frame building is offloaded to a thread so the event loop keeps running.
+    """
+
+    def copy_to_staging(
+        self,
+        conn: Connection,
+        df: pd.DataFrame,
+        staging_table: Table
+    ):
+        """Load the DataFrame rows in the staging table with asyncpg binary COPY."""
+        records = self.offload(self.staging_records, df)
+        driver_conn = conn.connection.driver_connection
+        await_only(driver_conn.copy_records_to_table( # type:ignore
+            staging_table.name,
+            records=records,
+            columns=list(df.columns)
+        ))
+
+
+    @staticmethod
+    def staging_records(df: pd.DataFrame) -> List[Tuple[Any, ...]]:
+        """DataFrame rows as tuples of Python values (None for nulls, naive UTC datetimes) for asyncpg COPY."""
+        df = df.copy()
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.DatetimeTZDtype):
+                df[col] = df[col].dt.tz_convert("UTC").dt.tz_localize(None)
+        return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+
+    def copy_query_to_csv(
+        self,
+        conn: Connection,
+        stmt: Select
+    ) -> io.IOBase:
+        """Run a SELECT through asyncpg COPY ... TO STDOUT and return its CSV output (with header), rewound."""
+        buffer = io.BytesIO()
+        compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+        args = [compiled.params[name] for name in compiled.positiontup or []]
+        driver_conn = conn.connection.driver_connection
+        await_only(driver_conn.copy_from_query( # type:ignore
+            str(compiled),
+            *args,
+            output=buffer,
+            format="csv",
+            header=True
+        ))
+        buffer.seek(0)
+        return buffer
+
+
+    def pause(
+        self,
+        seconds: float
+    ):
+        """Yield to the event loop between two batches instead of blocking it."""
+        await_only(asyncio.sleep(seconds))
+
+
+    def offload(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        **kwargs: Any
+    ) -> T:
+        """Run CPU-bound frame building in a worker thread, the event loop serving other tasks meanwhile."""
+        return await_only(asyncio.to_thread(func, *args, **kwargs))
+
+
+class AsyncDatabase:
+
+    def __init__(
+        self,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_pre_ping: bool = True,
+        statement_timeout_ms: int = 60000,
+        kline_cache: Optional[KlineCache] = None,
+        instrumentation: Optional[SqlInstrumentation] = None
+    ):
+        url, connect_args = asyncpg_connect_params(DATABASE_URL, {"statement_timeout": str(statement_timeout_ms)})
+        self.engine: AsyncEngine = create_async_engine(
+            url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_pre_ping=pool_pre_ping,
+            connect_args=connect_args
+        )
+        sync_engine: Engine = self.engine.sync_engine
+        self.db = AsyncpgDatabase(engine=sync_engine, kline_cache=kline_cache, instrumentation=instrumentation)
+        logger_database.debug(
+            f"Async engine created (pool_size={pool_size}, max_overflow={max_overflow}, "
+            f"statement_timeout={statement_timeout_ms}ms)."
+        )
+
+
+    async def run(
+        self,
+        method: Callable[..., T],
+        *args: Any,
+        **kwargs: Any
+    ) -> T:
+        """Run any synchronous Database method, its SQL round trips being awaited on the loop."""
+        return await greenlet_spawn(method, *args, **kwargs)
+
+
+    async def dispose(self):
+        await self.engine.dispose()
+
+
+    async def read_table_to_df(self, **kwargs: Any) -> pd.DataFrame:
+        return await self.run(self.db.read_table_to_df, **kwargs)
+
+
+    async def read_active_mrk_assets_to_df(self) -> pd.DataFrame:
+        return await self.run(self.db.read_active_mrk_assets_to_df)
+
+
+    async def read_klines(self, **kwargs: Any) -> pd.DataFrame:
+        return await self.run(self.db.read_klines, **kwargs)
+
+
+    async def read_data(self, **kwargs: Any) -> pd.DataFrame:
+        return await self.run(self.db.read_data, **kwargs)
+
+
+    async def read_klines_float(self, **kwargs: Any) -> pd.DataFrame:
+        return await self.run(self.db.read_klines_float, **kwargs)
+
+
+    async def read_latest_klines(self, **kwargs: Any) -> pd.DataFrame:
+        return await self.run(self.db.read_latest_klines, **kwargs)
+
+
+    async def get_db_data_state(self, **kwargs: Any) -> ContentDataState:
+        return await self.run(self.db.get_db_data_state, **kwargs)
+
+
+    async def write_df(self, **kwargs: Any) -> int:
+        return await self.run(self.db.write_df, **kwargs)
+
+
+    async def delete_content_by_asset_id(self, **kwargs: Any):
+        await self.run(self.db.delete_content_by_asset_id, **kwargs)
+
+
+    async def delete_deprecated_data(self, **kwargs: Any):
+        await self.run(self.db.delete_deprecated_data, **kwargs)
+
+
+    async def ensure_future_partitions(self, **kwargs: Any):
+        await self.run(self.db.ensure_future_partitions, **kwargs)
+
+
+    async def drop_all_tables(self):
+        await self.run(self.db.drop_all_tables)
+
+
+    async def update_markets_and_asset_types(self, **kwargs: Any):
+        return await self.run(self.db.update_markets_and_asset_types, **kwargs)
+
+
+    async def update_assets(self, **kwargs: Any):
+        return await self.run(self.db.update_assets, **kwargs)
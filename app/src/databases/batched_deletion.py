@@ -0,0 +1,47 @@
+"""
+Settings of the chunked deletion mode of Database (delete_content_by_asset_id, delete_deprecated_data).
+
+Rows are deleted table (or leaf partition) by table, in windows of heap pages
+(ctid ranges), one committed transaction per window. The window size adapts so that
+a batch holds its row locks for about max_block_ms, and lock_timeout makes a batch
+give up (then retry) instead of queueing in front of the ingestion.
+"""
+from dataclasses import dataclass
+
+
+@dataclass
+class BatchedDeletion:
+    max_block_ms: int = 200         # target duration of a batch and lock_timeout of its statements
+    pause_ms: int = 50              # pause between two batches, lets concurrent writers through
+    start_pages: int = 256          # first ctid window size, in heap pages
+    min_pages: int = 1
+    max_pages: int = 65536
+    max_lock_retries: int = 20      # consecutive lock timeouts tolerated on a window
+    analyze: bool = True            # ANALYZE the tables with deleted rows once done
+
+    def __post_init__(self):
+        if self.max_block_ms <= 0:
+            raise ValueError("max_block_ms must be positive.")
+        if not 0 < self.min_pages <= self.start_pages <= self.max_pages:
+            raise ValueError("Page windows must satisfy 0 < min_pages <= start_pages <= max_pages.")
+
+
+    def next_window(
+        self,
+        pages: int,
+        elapsed_ms: float
+    ) -> int:
+        """Halve the window when a batch exceeded max_block_ms, double it when it took less than half."""
+        if elapsed_ms > self.max_block_ms:
+            pages //= 2
+        elif elapsed_ms < self.max_block_ms / 2:
+            pages *= 2
+        return max(self.min_pages, min(self.max_pages, pages))
+
+
+LOCK_NOT_AVAILABLE = "55P03" # SQLSTATE raised when lock_timeout expires
+
+
+def is_lock_timeout(error: BaseException) -> bool:
+    """True for a (SQLAlchemy wrapped) lock_timeout error, with psycopg2 or asyncpg."""
+    return getattr(getattr(error, "orig", error), "pgcode", None) == LOCK_NOT_AVAILABLE
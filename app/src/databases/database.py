@@ -1,10 +1,13 @@
+import io
+import time
 import pandas as pd
 import sqlalchemy as sqlalch
-from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy import inspect, MetaData, func, select, Table, delete, update, Connection, and_, case, or_
-from typing import List, Optional, Any, Tuple, Literal, Dict, cast
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy import text, bindparam, literal, MetaData, func, select, values, true, Select, Insert, Table, Column, String, Numeric, Float, delete, update, Connection, Engine, ColumnElement, and_, case, or_
+from typing import List, Optional, Any, Tuple, Literal, Dict, Set, Iterator, Callable, TypeVar, cast
 from decimal import Decimal
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from collections import Counter
 
 from src.core.data.default import (
@@ -16,9 +19,31 @@ from src.core.data.default import (
 from src.core.exceptions.exceptions import *
 from src.core.utils.helpers.io_helpers import ask_confirmation
 from src.core.utils.config.secret_management import DATABASE_URL
+from src.core.utils.dates.date_format import interval_map
 from src.core.logging.loggers import logger_database
 
 from src.databases.migration.database_structure import structure_metadata
+from src.databases.schema_cache import SCHEMA_CACHE
+from src.databases.kline_cache import KlineCache
+from src.databases.memmap_store import MemmapKlineStore, load_storage_config
+from src.databases.precision import compact_frame, value_dtype
+from src.databases.sql_instrumentation import SqlInstrumentation
+from src.databases.batched_deletion import BatchedDeletion, is_lock_timeout
+from src.databases.reconciliation import ReconciliationSummary, delete_duplicates, delete_missing_rows, upsert_rows
+from src.databases.migration.partitioning import (
+    LEAF_PARTITIONS_QUERY,
+    LIST_PARTITIONS_QUERY,
+    PARTITION_TIME_FRAMES,
+    PartitionSpec,
+    create_partition_ddl,
+    floor_period,
+    is_partition_name,
+    iter_periods,
+    next_period,
+    parse_range_bound,
+    partition_name,
+    to_naive_utc,
+)
 
 from src.models.items_models.assets_models import BaseAsset, Crypto, Future
 from src.models.items_models.items_models import AssetType
@@ -27,11 +52,27 @@ from src.models.lhrd_models.standard_models import ContentDataState, TimeFrameCo
 from src.models.structural_models.config_models import KlineConfig
 
 
+T = TypeVar("T")
+
+
 class Database:
 
-    def __init__(self):
+    def __init__(
+        self,
+        engine: Optional[Engine] = None,
+        kline_cache: Optional[KlineCache] = None,
+        storage: Optional[Dict[str, str]] = None,
+        instrumentation: Optional[SqlInstrumentation] = None
+    ):
         self.db_version = 1
-        self.engine = sqlalch.create_engine(DATABASE_URL)
+        self.engine: Engine = engine if engine is not None else sqlalch.create_engine(DATABASE_URL)
+        self.partitions: Dict[str, Set[str]] = {} # known range partitions of partitioned tables
+        self.kline_cache = kline_cache
+        self.storage: Dict[str, str] = storage if storage is not None else load_storage_config() # data table -> backend
+        self.memmap_store: Optional[MemmapKlineStore] = None
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.attach(self.engine)
 
 
     def check_table(
@@ -42,32 +83,48 @@ class Database:
         table: Optional[Table] = structure_metadata.tables.get(table_name)
         if table is None:
             raise InvalidTableNameError(table_name=table_name)
-        inspector = inspect(self.engine)
-        if table_name not in inspector.get_table_names():
+        if not SCHEMA_CACHE.has_table(self.engine, table_name):
             raise TableNotFoundError(table_name=table_name)
         return table
 
 
+    def memmap_backend(
+        self,
+        table_name: str
+    ) -> Optional[MemmapKlineStore]:
+        """The memmap store if the table is configured on it (see storage.json), None for PostgreSQL."""
+        if self.storage.get(table_name, "postgres") != "memmap":
+            return None
+        if self.memmap_store is None:
+            self.memmap_store = MemmapKlineStore()
+        return self.memmap_store
+
+
     def get_db_data_state(
         self, 
         table_name: str = "TrainingData"
     ) -> ContentDataState:
-        
+        """Oldest & latest open_time of each series of a data table, read from DataState."""
         table_content_data_state = ContentDataState()
         
         if table_name.endswith("Data"):
-            table: Table = self.check_table(table_name)
-            stmt = select(
-                table.c.asset_id,
-                table.c.time_frame,
-                func.max(table.c.open_time).label("latest_time"),
-                func.min(table.c.open_time).label("oldest_time")
-            ).group_by(
-                table.c.asset_id,
-                table.c.time_frame
-            )
-            with self.engine.connect() as conn:
-                result = conn.execute(stmt).fetchall()
+            store = self.memmap_backend(table_name)
+            if store is not None:
+                result = store.data_state(table_name)
+            else:
+                self.check_table(table_name)
+                data_state: Table = self.check_table("DataState")
+                stmt = select(
+                    data_state.c.asset_id,
+                    data_state.c.time_frame,
+                    data_state.c.latest_time,
+                    data_state.c.oldest_time
+                ).where(data_state.c.table_name == table_name)
+                with self.engine.connect() as conn:
+                    result = conn.execute(stmt).fetchall()
+
+                if not result:
+                    result = self.rebuild_data_state(table_name=table_name)
 
             for asset_id, time_frame, latest_time, oldest_time in result:
                 try:
@@ -88,6 +145,86 @@ class Database:
             raise InvalidTableNameError(table_name=table_name)
 
 
+    def rebuild_data_state(
+        self,
+        table_name: str
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Recompute the DataState rows of a data table with a full GROUP BY scan.
+        Only needed once for tables filled before DataState existed.
+        """
+        table: Table = self.check_table(table_name)
+        data_state: Table = self.check_table("DataState")
+        stmt = select(
+            table.c.asset_id,
+            table.c.time_frame,
+            func.max(table.c.open_time).label("latest_time"),
+            func.min(table.c.open_time).label("oldest_time"),
+            func.count().label("row_count")
+        ).group_by(
+            table.c.asset_id,
+            table.c.time_frame
+        )
+        with self.engine.begin() as conn:
+            result = conn.execute(stmt).fetchall()
+            conn.execute(delete(data_state).where(data_state.c.table_name == table_name))
+            if result:
+                maj_date = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+                conn.execute(insert(data_state), [
+                    {
+                        "table_name": table_name,
+                        "asset_id": asset_id,
+                        "time_frame": time_frame,
+                        "latest_time": latest_time,
+                        "oldest_time": oldest_time,
+                        "row_count": row_count,
+                        "maj_date": maj_date
+                    } for asset_id, time_frame, latest_time, oldest_time, row_count in result
+                ])
+        if result:
+            logger_database.info(f"DataState rebuilt for table {table_name} ({len(result)} series).")
+        return [tuple(row[:4]) for row in result]
+
+
+    def refresh_data_state(
+        self,
+        conn: Connection,
+        table: Table,
+        removed_rows: Dict[Tuple[str, str], int]
+    ):
+        """
+        Update DataState after klines removal, given the number of rows removed per (asset_id, time_frame).
+        Bounds are re-read with index-backed min/max lookups on each affected series only.
+        """
+        if not removed_rows:
+            return
+        data_state: Table = self.check_table("DataState")
+        series_filter = and_(
+            table.c.asset_id == bindparam("b_asset_id"),
+            table.c.time_frame == bindparam("b_time_frame")
+        )
+        stmt = update(data_state).where(
+            data_state.c.table_name == table.name,
+            data_state.c.asset_id == bindparam("b_asset_id"),
+            data_state.c.time_frame == bindparam("b_time_frame")
+        ).values(
+            row_count=data_state.c.row_count - bindparam("b_removed"),
+            oldest_time=select(func.min(table.c.open_time)).where(series_filter).scalar_subquery(),
+            latest_time=select(func.max(table.c.open_time)).where(series_filter).scalar_subquery(),
+            maj_date=datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+        )
+        conn.execute(stmt, [
+            {"b_asset_id": asset_id, "b_time_frame": time_frame, "b_removed": row_nb}
+            for (asset_id, time_frame), row_nb in removed_rows.items()
+        ])
+        conn.execute(
+            delete(data_state).where(
+                data_state.c.table_name == table.name,
+                or_(data_state.c.oldest_time.is_(None), data_state.c.row_count <= 0)
+            )
+        )
+
+
     def clean_quantitative_indicators(
         self,
         unix_date_s : Decimal
@@ -102,24 +239,47 @@ class Database:
     def delete_deprecated_data(
         self,
         time_segs:Dict[str,tuple[datetime,datetime]],
-        table_name: str
+        table_name: str,
+        detach: bool = False,
+        batched: Optional[BatchedDeletion] = None
     ):
+        """
+        Remove klines older than the oldest time of each time frame segment.
+
+        On a partitioned table, whole expired partitions are dropped (or detached) instead
+        of deleting rows; the expired klines of the partitions straddling a cutoff are then
+        deleted as rows, so each series keeps its time frame segment and no more.
+        With batched, rows are deleted in bounded batches (see delete_in_batches) and
+        partition drops give up on lock_timeout and retry instead of queueing.
+        """
         if not table_name.endswith("Data"):
             logger_database.warning(f"Table {table_name} doesn't have dated deprecated data.")
             return
+        store = self.memmap_backend(table_name)
+        if store is not None:
+            row_nb = sum(store.delete_before(table_name, k, old_time) for k, (_, old_time) in time_segs.items())
+            logger_database.info(f"Deprecated data removed from memmap table {table_name} ({row_nb} rows).")
+            return
         table: Table = self.check_table(table_name=table_name)
         row_nb = 0
         if table is not None:
-            conditions = []
-            for k, (_, old_time) in time_segs.items():
-                conditions.append(
-                    (table.c.time_frame == k) & (table.c.open_time < old_time)
+            if self.is_partitioned(table_name):
+                row_nb = self.run_with_lock_retries(
+                    lambda conn: self.drop_expired_partitions(conn=conn, table=table, time_segs=time_segs, detach=detach),
+                    batched=batched
                 )
+                self.ensure_future_partitions(table_name=table_name)
+                with self.engine.connect() as conn:
+                    leaf_names = self.straddling_partitions(conn=conn, table=table, time_segs=time_segs)
+                if leaf_names:
+                    row_nb += self.delete_expired_rows(table=table, time_segs=time_segs, batched=batched, leaf_names=leaf_names)
+            else:
+                row_nb = self.delete_expired_rows(table=table, time_segs=time_segs, batched=batched)
 
-            if conditions:
-                stmt = delete(table).where(or_(*conditions))
-                with self.engine.begin() as conn:
-                    row_nb = conn.execute(stmt).rowcount or 0
+            if self.kline_cache is not None:
+                for k, (_, old_time) in time_segs.items():
+                    # the cutoff day itself may have lost its first klines
+                    self.kline_cache.invalidate(table_name, time_frame=k, before=old_time + timedelta(days=1))
         
         if row_nb == 0:
             logger_database.info(f"No deprecated data to remove from table {table_name}.")
@@ -127,6 +287,271 @@ class Database:
             logger_database.info(f"Deprecated data successfully removed from table {table_name} ({row_nb} rows).")
 
 
+    def delete_expired_rows(
+        self,
+        table: Table,
+        time_segs: Dict[str,tuple[datetime,datetime]],
+        batched: Optional[BatchedDeletion] = None,
+        leaf_names: Optional[List[str]] = None
+    ) -> int:
+        """Delete the klines older than their time frame cutoff (batched: only in leaf_names, when given)."""
+        if not time_segs:
+            return 0
+        if batched is not None:
+            return self.delete_in_batches(
+                table=table,
+                condition=lambda t: or_(*[
+                    (t.c.time_frame == k) & (t.c.open_time < old_time) for k, (_, old_time) in time_segs.items()
+                ]),
+                batched=batched,
+                leaf_names=leaf_names
+            )
+
+        conditions = []
+        for k, (_, old_time) in time_segs.items():
+            conditions.append(
+                (table.c.time_frame == k) & (table.c.open_time < old_time)
+            )
+        deleted = delete(table).where(or_(*conditions)).returning(
+            table.c.asset_id,
+            table.c.time_frame
+        ).cte("deleted")
+        stmt = select(
+            deleted.c.asset_id,
+            deleted.c.time_frame,
+            func.count()
+        ).group_by(deleted.c.asset_id, deleted.c.time_frame)
+        with self.engine.begin() as conn:
+            removed_rows = {(asset_id, tf): nb for asset_id, tf, nb in conn.execute(stmt)}
+            self.refresh_data_state(conn=conn, table=table, removed_rows=removed_rows)
+        return sum(removed_rows.values())
+
+
+    def straddling_partitions(
+        self,
+        conn: Connection,
+        table: Table,
+        time_segs: Dict[str,tuple[datetime,datetime]]
+    ) -> List[str]:
+        """Leaf partitions whose range holds a time frame cutoff: their klines are only partly expired."""
+        leaves = set(conn.execute(text(LEAF_PARTITIONS_QUERY), {"table_name": table.name}).scalars())
+        names: Set[str] = set()
+        for range_name, bound_expr in self.get_partitions(conn=conn, table_name=table.name).items():
+            bounds = parse_range_bound(bound_expr)
+            if bounds is None:
+                continue
+            lower, upper = bounds
+            for tf, (_, old_time) in time_segs.items():
+                if lower < to_naive_utc(old_time) < upper:
+                    # time frame sub-partition, else the range partition itself, else its default sub-partition
+                    candidates = [partition_name(table.name, lower, tf), range_name, partition_name(table.name, lower, "default")]
+                    leaf_name = next((name for name in candidates if name in leaves), None)
+                    if leaf_name is not None:
+                        names.add(leaf_name)
+        return sorted(names)
+
+
+    def drop_expired_partitions(
+        self,
+        conn: Connection,
+        table: Table,
+        time_segs: Dict[str,tuple[datetime,datetime]],
+        detach: bool = False
+    ) -> int:
+        """
+        Drop (or detach) the partitions whose upper bound is older than the time frame cutoffs.
+        Time frame sub-partitions expire one by one, range partitions once every time frame is expired.
+        Returns the number of removed rows.
+        """
+        cutoffs = {tf: to_naive_utc(old_time) for tf, (_, old_time) in time_segs.items()}
+        if not cutoffs:
+            return 0
+        # A range partition holds every time frame: it expires once all of them are expired
+        min_cutoff = min(cutoffs.values()) if set(PARTITION_TIME_FRAMES) <= set(cutoffs) else None
+
+        removed_rows: Counter[Tuple[str, str]] = Counter()
+        for range_name, bound_expr in self.get_partitions(conn=conn, table_name=table.name).items():
+            bounds = parse_range_bound(bound_expr)
+            if bounds is None:
+                continue
+            lower, upper = bounds
+            if min_cutoff is not None and upper <= min_cutoff:
+                removed_rows.update(self.remove_partition(conn=conn, parent_name=table.name, child_name=range_name, detach=detach))
+                self.partitions.get(table.name, set()).discard(range_name)
+                continue
+
+            sub_partitions = self.get_partitions(conn=conn, table_name=range_name)
+            for tf, cutoff in cutoffs.items():
+                leaf_name = partition_name(table.name, lower, tf)
+                if upper <= cutoff and leaf_name in sub_partitions:
+                    removed_rows.update(self.remove_partition(conn=conn, parent_name=range_name, child_name=leaf_name, detach=detach))
+
+        self.refresh_data_state(conn=conn, table=table, removed_rows=removed_rows)
+        return sum(removed_rows.values())
+
+
+    def remove_partition(
+        self,
+        conn: Connection,
+        parent_name: str,
+        child_name: str,
+        detach: bool = False
+    ) -> Dict[Tuple[str, str], int]:
+        """Drop or detach a partition, returning its number of rows per (asset_id, time_frame)."""
+        removed_rows = {
+            (asset_id, tf): nb for asset_id, tf, nb in conn.exec_driver_sql(
+                f'SELECT asset_id, time_frame, count(*) FROM "{child_name}" GROUP BY asset_id, time_frame'
+            )
+        }
+        row_nb = sum(removed_rows.values())
+        if detach:
+            conn.exec_driver_sql(f'ALTER TABLE "{parent_name}" DETACH PARTITION "{child_name}"')
+            logger_database.info(f"Partition {child_name} detached from {parent_name} ({row_nb} rows).")
+        else:
+            conn.exec_driver_sql(f'DROP TABLE "{child_name}"')
+            logger_database.debug(f"Partition {child_name} dropped ({row_nb} rows).")
+        return removed_rows
+
+
+    def run_with_lock_retries(
+        self,
+        operation: Callable[[Connection], T],
+        batched: Optional[BatchedDeletion] = None
+    ) -> T:
+        """
+        Run operation in a transaction. With batched, its statements wait at most max_block_ms
+        for a lock, and the transaction is retried after a pause when that wait expires.
+        """
+        lock_failures = 0
+        while True:
+            try:
+                with self.engine.begin() as conn:
+                    if batched is not None:
+                        conn.exec_driver_sql(f"SET LOCAL lock_timeout = '{int(batched.max_block_ms)}ms'")
+                    return operation(conn)
+            except DBAPIError as e:
+                if batched is None or not is_lock_timeout(e) or lock_failures >= batched.max_lock_retries:
+                    raise
+                lock_failures += 1
+                logger_database.debug(f"Lock not obtained within {batched.max_block_ms}ms, retry {lock_failures}/{batched.max_lock_retries}.")
+                self.pause(batched.pause_ms * 2 ** min(lock_failures, 6) / 1000)
+
+
+    def delete_in_batches(
+        self,
+        table: Table,
+        condition: Callable[[Table], ColumnElement[bool]],
+        batched: BatchedDeletion,
+        leaf_names: Optional[List[str]] = None
+    ) -> int:
+        """
+        Delete the rows matching condition (built for the given table or leaf partition)
+        window of heap pages by window of heap pages (ctid ranges), one transaction per window.
+        Only the leaf partitions of leaf_names are scanned when given (all of them otherwise).
+
+        The cost of a batch is bounded by its window whatever the number of matching rows,
+        DataState is updated in each batch and the tables with deleted rows are analyzed at the end.
+        Returns the number of deleted rows.
+        """
+        if leaf_names is None:
+            with self.engine.connect() as conn:
+                if self.is_partitioned(table.name):
+                    leaf_names = list(conn.execute(text(LEAF_PARTITIONS_QUERY), {"table_name": table.name}).scalars())
+                else:
+                    leaf_names = [table.name]
+
+        row_nb = 0
+        deleted_tables = []
+        start = time.perf_counter()
+        for leaf_name in leaf_names:
+            leaf = table if leaf_name == table.name else Table(
+                leaf_name,
+                MetaData(),
+                *[Column(col.name, col.type) for col in table.c]
+            )
+            leaf_row_nb = self.delete_leaf_in_batches(table=table, leaf=leaf, condition=condition(leaf), batched=batched)
+            if leaf_row_nb:
+                deleted_tables.append(leaf_name)
+                row_nb += leaf_row_nb
+
+        if batched.analyze and deleted_tables:
+            with self.engine.begin() as conn:
+                for leaf_name in deleted_tables:
+                    conn.exec_driver_sql(f"ANALYZE {conn.dialect.identifier_preparer.quote(leaf_name)}")
+        logger_database.debug(
+            f"Batched deletion on {table.name}: {row_nb} rows from {len(deleted_tables)} table(s) "
+            f"in {time.perf_counter() - start:.1f}s."
+        )
+        return row_nb
+
+
+    def delete_leaf_in_batches(
+        self,
+        table: Table,
+        leaf: Table,
+        condition: ColumnElement[bool],
+        batched: BatchedDeletion
+    ) -> int:
+        """Batched deletion of a single (non partitioned) table, see delete_in_batches."""
+        with self.engine.connect() as conn:
+            page_nb = conn.execute(
+                text("SELECT pg_relation_size(to_regclass(quote_ident(:name))) / current_setting('block_size')::int"),
+                {"name": leaf.name}
+            ).scalar() or 0
+
+        row_nb = 0
+        first_page, window = 0, batched.start_pages
+        while first_page < page_nb:
+            last_page = first_page + window
+            deleted = delete(leaf).where(
+                condition,
+                text(f"ctid >= '({first_page},0)'::tid"),
+                text(f"ctid < '({last_page},0)'::tid")
+            ).returning(leaf.c.asset_id, leaf.c.time_frame).cte("deleted")
+            stmt = select(
+                deleted.c.asset_id,
+                deleted.c.time_frame,
+                func.count()
+            ).group_by(deleted.c.asset_id, deleted.c.time_frame)
+
+            def delete_window(conn: Connection) -> int:
+                removed_rows = {(asset_id, tf): nb for asset_id, tf, nb in conn.execute(stmt)}
+                self.refresh_data_state(conn=conn, table=table, removed_rows=removed_rows)
+                return sum(removed_rows.values())
+
+            batch_start = time.perf_counter()
+            row_nb += self.run_with_lock_retries(delete_window, batched=batched)
+            elapsed_ms = (time.perf_counter() - batch_start) * 1000
+            logger_database.debug(
+                f"{leaf.name}: pages {min(last_page, page_nb)}/{page_nb}, {row_nb} rows deleted "
+                f"(window {window} pages, {elapsed_ms:.0f}ms)."
+            )
+
+            first_page = last_page
+            window = batched.next_window(window, elapsed_ms)
+            if first_page < page_nb:
+                self.pause(batched.pause_ms / 1000)
+        return row_nb
+
+
+    def pause(
+        self,
+        seconds: float
+    ):
+        """Wait between two batches of a batched operation."""
+        time.sleep(seconds)
+
+
+    def offload(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        **kwargs: Any
+    ) -> T:
+        """Run CPU-bound frame building (no SQL): inline here, off the event loop for AsyncpgDatabase."""
+        return func(*args, **kwargs)
+
+
     def delete_table_full_content(
         self, 
         table_name: str
@@ -134,9 +559,13 @@ class Database:
         if ask_confirmation(f"\nTable '{table_name}' will be deleted. Confirm"):
             table = structure_metadata.tables.get(table_name)
             if table is not None:
+                data_state: Table = self.check_table("DataState")
                 with self.engine.connect() as conn:
                     conn.execute(table.delete())
+                    conn.execute(delete(data_state).where(data_state.c.table_name == table_name))
                     conn.commit()
+                    if self.kline_cache is not None:
+                        self.kline_cache.invalidate(table_name)
                     logger_database.info(f"Table {table_name} successfully erased.")
             else:
                 raise TableNotFoundError(table_name=table_name)
@@ -148,24 +577,52 @@ class Database:
         self, 
         table_name: str, 
         asset_ids: str|List[str], 
-        time_frame: Optional[str] = None
+        time_frame: Optional[str] = None,
+        batched: Optional[BatchedDeletion] = None
     ):
         if isinstance(asset_ids,str):
             asset_ids = [asset_ids]
         if asset_ids == []:
             logger_database.info(f"No asset to remove from table {table_name}.")
             return
+        store = self.memmap_backend(table_name)
+        if store is not None:
+            row_nb = store.delete_series(table_name, asset_ids, time_frame)
+            logger_database.info(f"Symbol(s) {asset_ids} removed from memmap table {table_name} ({row_nb} rows).")
+            return
         table = structure_metadata.tables.get(table_name)
         row_nb = 0
         if table is not None:
             
+            data_state: Table = self.check_table("DataState")
             stmt = delete(table).where(table.c.asset_id.in_(asset_ids))
+            state_stmt = delete(data_state).where(
+                data_state.c.table_name == table_name,
+                data_state.c.asset_id.in_(asset_ids)
+            )
             
             if time_frame:
                 stmt = stmt.where(table.c.time_frame == time_frame)
+                state_stmt = state_stmt.where(data_state.c.time_frame == time_frame)
 
-            with self.engine.begin() as conn:
-                row_nb = conn.execute(stmt).rowcount or 0
+            if batched is not None:
+                row_nb = self.delete_in_batches(
+                    table=table,
+                    condition=lambda t: and_(
+                        t.c.asset_id.in_(asset_ids),
+                        (t.c.time_frame == time_frame) if time_frame else true()
+                    ),
+                    batched=batched
+                )
+                with self.engine.begin() as conn:
+                    conn.execute(state_stmt)
+            else:
+                with self.engine.begin() as conn:
+                    row_nb = conn.execute(stmt).rowcount or 0
+                    conn.execute(state_stmt)
+
+            if self.kline_cache is not None:
+                self.kline_cache.invalidate(table_name, asset_ids=asset_ids, time_frame=time_frame)
 
         else:
             raise TableNotFoundError(table_name=table_name)
@@ -184,18 +641,78 @@ class Database:
 
             sorted_tables = [
                 table for table in reversed(meta_drop.sorted_tables)
-                if table.name != "alembic_version"
+                if table.name != "alembic_version" and not is_partition_name(table.name) # dropped with their parent
             ]
 
             for table in sorted_tables:
                 logger_database.info(f"Dropping table: {table.name}")
                 table.drop(bind=self.engine)
+            SCHEMA_CACHE.invalidate(self.engine)
+            self.partitions.clear()
+            if self.kline_cache is not None:
+                self.kline_cache.clear()
 
             logger_database.info("All tables (except 'alembic_version') have been successfully deleted.")
         else:
             logger_database.info("Task 'drop_all_tables' canceled.")
 
 
+    def ensure_partitions(
+        self,
+        conn: Connection,
+        table: Table,
+        start_time: datetime,
+        end_time: datetime
+    ) -> int:
+        """Create the missing partitions of a partitioned table covering [start_time, end_time]."""
+        spec: Optional[PartitionSpec] = table.info.get("partition")
+        if spec is None or not self.is_partitioned(table.name):
+            return 0
+
+        periods = list(iter_periods(start_time, end_time, spec.interval))
+        known_partitions = self.partitions.setdefault(table.name, set())
+        if all(partition_name(table.name, lower) in known_partitions for lower, _ in periods):
+            return 0
+
+        known_partitions.update(self.get_partitions(conn=conn, table_name=table.name).keys())
+        created = 0
+        for lower, upper in periods:
+            name = partition_name(table.name, lower)
+            if name in known_partitions:
+                continue
+            for ddl in create_partition_ddl(table.name, spec, lower, upper):
+                conn.exec_driver_sql(ddl)
+            known_partitions.add(name)
+            created += 1
+
+        if created:
+            logger_database.info(f"Created {created} partition(s) of table {table.name}.")
+        return created
+
+
+    def ensure_future_partitions(
+        self,
+        table_name: Optional[str] = None
+    ):
+        """Create the partitions of the current period and of the 'premake' next ones."""
+        table_names = [table_name] if table_name else [
+            name for name, table in structure_metadata.tables.items() if table.info.get("partition")
+        ]
+        now = datetime.now(timezone.utc)
+        for name in table_names:
+            if self.memmap_backend(name) is not None:
+                continue
+            table: Table = self.check_table(name)
+            spec: Optional[PartitionSpec] = table.info.get("partition")
+            if spec is None:
+                continue
+            end = floor_period(now, spec.interval)
+            for _ in range(spec.premake):
+                end = next_period(end, spec.interval)
+            with self.engine.begin() as conn:
+                self.ensure_partitions(conn=conn, table=table, start_time=now, end_time=end)
+
+
     def get_asset_id(
         self, 
         symbol: str,
@@ -209,8 +726,17 @@ class Database:
 
 
     def get_tables(self) -> List[str]:
-        inspector = inspect(self.engine)
-        return inspector.get_table_names(schema="public")
+        return sorted(SCHEMA_CACHE.table_names(self.engine))
+
+
+    def get_partitions(
+        self,
+        conn: Connection,
+        table_name: str
+    ) -> Dict[str, str]:
+        """Direct partitions of a table with their bound expression."""
+        result = conn.execute(text(LIST_PARTITIONS_QUERY), {"table_name": table_name}).fetchall()
+        return {name: bound_expr for name, bound_expr in result}
 
 
     def get_market_id(
@@ -238,25 +764,349 @@ class Database:
         raise NotImplemented
 
 
+    def is_partitioned(
+        self,
+        table_name: str
+    ) -> bool:
+        return SCHEMA_CACHE.is_partitioned(self.engine, table_name)
+
+
+    def klines_query(
+        self,
+        table_name: str,
+        asset_ids: Optional[str|List[str]] = None,
+        time_frames: Optional[str|List[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        columns: Optional[List[str]] = None,
+        cast_numeric: bool = False
+    ) -> Select:
+        """
+        Build a SELECT on a data table with every filter pushed into the query.
+
+        start_time is inclusive and end_time exclusive on open_time.
+        Rows are ordered by series then open_time (index order of the unique constraint).
+        With cast_numeric, DECIMAL columns are cast to float8 server-side.
+        """
+        if not table_name.endswith("Data"):
+            raise InvalidTableNameError(table_name=table_name)
+        table: Table = self.check_table(table_name)
+
+        if columns:
+            for col in columns:
+                if col not in table.c:
+                    raise ValueError(f"Couldn't find '{col}' in table '{table_name}'.")
+        else:
+            columns = list(table.c.keys())
+
+        selected_columns = []
+        for col in columns:
+            if cast_numeric and isinstance(table.c[col].type, Numeric):
+                selected_columns.append(sqlalch.cast(table.c[col], Float(precision=53)).label(col))
+            else:
+                selected_columns.append(table.c[col])
+        stmt = select(*selected_columns)
+
+        if isinstance(asset_ids, str):
+            asset_ids = [asset_ids]
+        if isinstance(time_frames, str):
+            time_frames = [time_frames]
+
+        if asset_ids is not None:
+            stmt = stmt.where(table.c.asset_id.in_(asset_ids))
+        if time_frames is not None:
+            stmt = stmt.where(table.c.time_frame.in_(time_frames))
+        if start_time is not None:
+            stmt = stmt.where(table.c.open_time >= start_time)
+        if end_time is not None:
+            stmt = stmt.where(table.c.open_time < end_time)
+
+        return stmt.order_by(table.c.asset_id, table.c.time_frame, table.c.open_time)
+
+
+    def iter_klines(
+        self,
+        table_name: str,
+        asset_ids: Optional[str|List[str]] = None,
+        time_frames: Optional[str|List[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        columns: Optional[List[str]] = None,
+        chunksize: int = 50000
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yield klines as DataFrames of at most 'chunksize' rows, read from a server-side cursor.
+        Memory stays bounded by the chunk size whatever the size of the table.
+        Float columns of compact tables (precision.json) are float32.
+        """
+        store = self.memmap_backend(table_name)
+        if store is not None:
+            yield store.read_klines(table_name, asset_ids, time_frames, start_time, end_time, columns)
+            return
+        stmt = self.klines_query(
+            table_name=table_name,
+            asset_ids=asset_ids,
+            time_frames=time_frames,
+            start_time=start_time,
+            end_time=end_time,
+            columns=columns
+        )
+        with self.engine.connect() as conn:
+            conn = conn.execution_options(stream_results=True, max_row_buffer=chunksize)
+            for chunk in pd.read_sql(stmt, conn, chunksize=chunksize):
+                yield compact_frame(chunk, table_name)
+
+
     def read_data(
         self, 
         table_name: str,
         symbol: str,
-        time_frame: str) -> pd.DataFrame:
+        time_frame: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """
+        Klines of one series of a data table in [start_time, end_time) (whole series by default),
+        typed as read_klines_float.
 
-        if table_name.endswith("Data"):
-            klines_table = Table(table_name, structure_metadata, autoload_with=self.engine)
-            stmt = select(klines_table).where(
-                klines_table.c.asset_id == symbol,
-                klines_table.c.time_frame == time_frame
+        With a kline cache, closed days are served from local Parquet files and only the
+        missing or still open days are queried, as contiguous day ranges.
+        """
+        if not table_name.endswith("Data"):
+            raise InvalidTableNameError(table_name=table_name)
+        if (
+            self.kline_cache is None
+            or self.memmap_backend(table_name) is not None # already local
+            or interval_map.get(time_frame, timedelta(days=2)) > timedelta(days=1)
+        ):
+            return self.read_klines_float(
+                table_name=table_name,
+                asset_ids=symbol,
+                time_frames=time_frame,
+                start_time=start_time,
+                end_time=end_time
             )
 
-            df = pd.read_sql(stmt, self.engine)
-        else:
-            raise InvalidTableNameError(table_name=table_name)
+        if start_time is None or end_time is None:
+            data_state: Table = self.check_table("DataState")
+            stmt = select(data_state.c.oldest_time, data_state.c.latest_time).where(
+                data_state.c.table_name == table_name,
+                data_state.c.asset_id == symbol,
+                data_state.c.time_frame == time_frame
+            )
+            with self.engine.connect() as conn:
+                extent = conn.execute(stmt).first()
+            if extent is None:
+                return self.read_klines_float(table_name=table_name, asset_ids=symbol, time_frames=time_frame)
+            start_time = start_time or extent.oldest_time
+            end_time = end_time or extent.latest_time + interval_map[time_frame]
+        start = pd.Timestamp(start_time)
+        end = pd.Timestamp(end_time)
+        start = start.tz_convert("UTC").tz_localize(None) if start.tzinfo else start
+        end = end.tz_convert("UTC").tz_localize(None) if end.tzinfo else end
+        if start >= end:
+            raise ValueError(f"Empty time range [{start}, {end}) requested from {table_name}.")
+
+        now = datetime.now(timezone.utc)
+        frames: List[pd.DataFrame] = []
+        missing_runs: List[List[date]] = []
+        for day in pd.date_range(start.floor("D"), (end - pd.Timedelta(1)).floor("D"), freq="D").date:
+            day_end = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(days=1)
+            cached = self.kline_cache.get(table_name, symbol, time_frame, day) if day_end <= now else None
+            if cached is not None:
+                frames.append(cached)
+            elif missing_runs and missing_runs[-1][-1] == day - timedelta(days=1):
+                missing_runs[-1].append(day)
+            else:
+                missing_runs.append([day])
+
+        for run in missing_runs:
+            df_run = self.read_klines_float(
+                table_name=table_name,
+                asset_ids=symbol,
+                time_frames=time_frame,
+                start_time=datetime.combine(run[0], datetime.min.time()),
+                end_time=datetime.combine(run[-1] + timedelta(days=1), datetime.min.time())
+            )
+            df_run["asset_id"] = df_run["asset_id"].astype(str)
+            df_run["time_frame"] = df_run["time_frame"].astype(str)
+            for day, df_day in df_run.groupby(df_run["open_time"].dt.date):
+                if self.kline_cache.is_cacheable(time_frame, day, len(df_day), now=now):
+                    self.kline_cache.put(table_name, symbol, time_frame, day, df_day)
+            frames.append(df_run)
+
+        df = pd.concat(frames, ignore_index=True)
+        df = df[(df["open_time"] >= start) & (df["open_time"] < end)]
+        df = df.sort_values("open_time", ignore_index=True)
+        df["asset_id"] = df["asset_id"].astype("category")
+        df["time_frame"] = df["time_frame"].astype("category")
+        return compact_frame(df, table_name) # cache files written before a switch to compact mode
+
+
+    def read_klines(
+        self,
+        table_name: str,
+        asset_ids: Optional[str|List[str]] = None,
+        time_frames: Optional[str|List[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        columns: Optional[List[str]] = None,
+        chunksize: int = 50000
+    ) -> pd.DataFrame:
+        """Read the filtered klines of a data table (see iter_klines) in a single DataFrame."""
+        chunks = list(self.iter_klines(
+            table_name=table_name,
+            asset_ids=asset_ids,
+            time_frames=time_frames,
+            start_time=start_time,
+            end_time=end_time,
+            columns=columns,
+            chunksize=chunksize
+        ))
+        if not chunks:
+            return pd.DataFrame(columns=columns or list(self.check_table(table_name).c.keys()))
+        return pd.concat(chunks, ignore_index=True)
+
+
+    def read_klines_float(
+        self,
+        table_name: str,
+        asset_ids: Optional[str|List[str]] = None,
+        time_frames: Optional[str|List[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Typed fast reader for data tables (same filters as read_klines).
+
+        DECIMAL columns are cast to float8 by PostgreSQL and the result is fetched with
+        COPY ... TO STDOUT, parsed by the pandas C reader: no decimal.Decimal objects are built.
+        Returns float64 columns (float32 for compact tables, see precision.json), datetime64
+        open_time and categorical asset_id/time_frame.
+        """
+        store = self.memmap_backend(table_name)
+        if store is not None:
+            return self.offload(store.read_klines, table_name, asset_ids, time_frames, start_time, end_time, columns)
+        stmt = self.klines_query(
+            table_name=table_name,
+            asset_ids=asset_ids,
+            time_frames=time_frames,
+            start_time=start_time,
+            end_time=end_time,
+            columns=columns,
+            cast_numeric=True
+        )
+        table: Table = self.check_table(table_name)
+        selected_columns = [col.name for col in stmt.selected_columns]
+        dtypes: Dict[str, Any] = {
+            col: value_dtype(table_name) for col in selected_columns if isinstance(table.c[col].type, Numeric)
+        }
+        dtypes.update({col: "category" for col in ["asset_id", "time_frame"] if col in selected_columns})
+
+        with self.engine.connect() as conn:
+            buffer = self.copy_query_to_csv(conn=conn, stmt=stmt)
+
+        return self.offload(self.parse_klines_csv, buffer, dtypes)
+
+
+    @staticmethod
+    def parse_klines_csv(
+        buffer: io.IOBase,
+        dtypes: Dict[str, Any]
+    ) -> pd.DataFrame:
+        df = pd.read_csv(buffer, dtype=dtypes, float_precision="round_trip")
+        if "open_time" in df.columns:
+            df["open_time"] = pd.to_datetime(df["open_time"])
         return df
 
 
+    def copy_query_to_csv(
+        self,
+        conn: Connection,
+        stmt: Select
+    ) -> io.IOBase:
+        """Run a SELECT through COPY ... TO STDOUT and return its CSV output (with header), rewound."""
+        buffer = io.StringIO()
+        compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+        driver_conn = conn.connection.driver_connection
+        with driver_conn.cursor() as cursor: # type:ignore
+            query = cursor.mogrify(str(compiled), compiled.params).decode()
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", buffer)
+        buffer.seek(0)
+        return buffer
+
+
+    def read_latest_klines(
+        self,
+        table_name: str,
+        asset_ids: str|List[str],
+        time_frames: str|List[str],
+        count: int,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Read the 'count' most recent klines of each (asset_id, time_frame) series.
+
+        Each series tail is fetched by a LATERAL subquery ordered by open_time DESC,
+        which walks the (asset_id, time_frame, open_time) unique index backwards:
+        the cost is O(assets x time frames x count) whatever the size of the table.
+        """
+        if not table_name.endswith("Data"):
+            raise InvalidTableNameError(table_name=table_name)
+        store = self.memmap_backend(table_name)
+        if store is not None:
+            key_columns = ["asset_id", "time_frame", "open_time"]
+            if columns:
+                columns = key_columns + [col for col in columns if col not in key_columns]
+            return self.offload(store.read_klines, table_name, asset_ids, time_frames, columns=columns, tail=max(count, 0))
+        table: Table = self.check_table(table_name)
+
+        if isinstance(asset_ids, str):
+            asset_ids = [asset_ids]
+        if isinstance(time_frames, str):
+            time_frames = [time_frames]
+
+        key_columns = ["asset_id", "time_frame", "open_time"]
+        if columns:
+            for col in columns:
+                if col not in table.c:
+                    raise ValueError(f"Couldn't find '{col}' in table '{table_name}'.")
+            columns = key_columns + [col for col in columns if col not in key_columns]
+        else:
+            columns = list(table.c.keys())
+
+        if not asset_ids or not time_frames or count < 1:
+            return pd.DataFrame(columns=columns)
+
+        series = values(
+            Column("asset_id", String),
+            Column("time_frame", String),
+            name="series"
+        ).data([(asset_id, tf) for asset_id in asset_ids for tf in time_frames])
+
+        tail = (
+            select(*[table.c[col] for col in columns])
+            .where(
+                table.c.asset_id == series.c.asset_id,
+                table.c.time_frame == series.c.time_frame
+            )
+            .order_by(table.c.open_time.desc())
+            .limit(count)
+            .lateral("tail")
+        )
+        stmt = (
+            select(tail)
+            .select_from(series)
+            .join(tail, true())
+            .order_by(tail.c.asset_id, tail.c.time_frame, tail.c.open_time)
+        )
+
+        with self.engine.connect() as conn:
+            df = pd.read_sql(stmt, conn)
+        return self.offload(compact_frame, df, table_name)
+
+
     def read_table_to_df(
         self,
         specified_table: str|Table, 
@@ -322,217 +1172,111 @@ class Database:
         return item_list, duplicates
 
 
-    def remove_duplicates_by_latest_update(
-        self,
-        table: Table,
-        table_name : str,
-        conn: Connection,
-        df: pd.DataFrame,
-        key_column: str = "name",
-        date_column: str = "maj_date"
-    ) -> pd.DataFrame:
-        """
-        Remove duplicates from a table based on a key column,
-        keeping only the most recent entry according to a date column.
-
-        Parameters:
-            table (Table): SQLAlchemy Table object.
-            conn (Connection): SQLAlchemy Connection object.
-            df (pd.DataFrame): DataFrame representing the table's content.
-            key_column (str): Column to identify duplicates (e.g., 'name').
-            date_column (str): Column used to determine the most recent row (e.g., 'maj_date').
-
-        Returns:
-            pd.DataFrame: Cleaned DataFrame (without duplicates).
-        """
-        if key_column not in df.columns or date_column not in df.columns:
-            logger_database.debug(f"No column called {key_column} or {date_column} in table '{table_name}. Ignoring duplicate deletion.")
-            return df
-
-        # Detect duplicates
-        duplicates = df[df.duplicated(subset=key_column, keep=False)]
-        if duplicates.empty:
-            logger_database.debug(f"No duplicates in table '{table_name}'.")
-            return df
-        logger_database.warning(f"Duplicates detected in table '{table_name}': {set(duplicates['name'])}. Deleting...")
-
-        # Keep only the most recent row for each duplicate key
-        latest_rows = (
-            duplicates
-            .sort_values(date_column, ascending=False)
-            .drop_duplicates(subset=key_column, keep='first')
-        )
-
-        duplicate_keys = duplicates[key_column].unique().tolist()
-
-        # Delete all duplicate entries from the database and reinsert the latest
-        conn.execute(
-            delete(table).where(table.c[key_column].in_(duplicate_keys))
-        )
-        for _, row in latest_rows.iterrows():
-            conn.execute(insert(table).values(**row.to_dict()))
-
-        # Return a refreshed dataframe with duplicates removed
-        remaining = df[~df[key_column].isin(duplicate_keys)]
-        cleaned_df = pd.concat([remaining, latest_rows], ignore_index=True)
-        logger_database.info("Duplicates successfully deleted.")
-
-        return cleaned_df
-
-
-    async def update_markets_and_asset_types(
+    def update_markets_and_asset_types(
         self,
         markets: Optional[List[MarketInfo]] = None, # can be used to update a single market
         supported_types : Optional[List[AssetType]] = None,
         strict_deletion: bool = False
-    ):
+    ) -> ReconciliationSummary:
+        """
+        Reconcile AssetTypes, Markets and MarketAssetTypes with the given markets and asset types,
+        with one batched upsert and one batched delete per table in a single transaction.
+        Unlisted asset types and markets are only deleted with strict_deletion.
+        """
+        summary = ReconciliationSummary()
+        asset_types_table: Table = self.check_table(table_name="AssetTypes")
+        markets_table: Table = self.check_table(table_name="Markets")
+        cross_mrk_type_ass_table: Table = self.check_table(table_name="MarketAssetTypes")
+
+        # Desired rows, by key (the last occurrence of a key wins)
+        asset_type_rows = list({
+            asset_type.type_id: {"type_id": asset_type.type_id, "name": asset_type.name}
+            for asset_type in supported_types or []
+        }.values())
+        market_rows = list({
+            market.market_id: {
+                "market_id": market.market_id,
+                "name": market.name,
+                "asset_number": market.asset_number,
+                "status": market.status,
+                "website": market.website
+            } for market in markets or []
+        }.values())
+        cross_rows = list({
+            (market.market_id, type_id): {"market_id": market.market_id, "type_id": type_id}
+            for market in markets or [] for type_id in market.type_ids
+        }.values())
+
         with self.engine.begin() as conn:
+            # Upserts, referenced tables first
             if supported_types:
-                """Update asset types."""
-                table_name = "AssetTypes"
-                table: Table = self.check_table(table_name=table_name)
-                df_asset_types: pd.DataFrame = self.read_table_to_df(specified_table=table)
-
-                df_asset_types: pd.DataFrame = self.remove_duplicates_by_latest_update(
-                    table=table,
-                    table_name=table_name,
+                delete_duplicates(conn=conn, table=asset_types_table, key_column="name", changes=summary.table("AssetTypes"))
+                upsert_rows(
                     conn=conn,
-                    df=df_asset_types
+                    table=asset_types_table,
+                    rows=asset_type_rows,
+                    key_columns=["type_id"],
+                    compare_columns=["name"],
+                    changes=summary.table("AssetTypes")
                 )
-
-                type_ids_in_db = set(df_asset_types['type_id'])
-                for asset_type in supported_types:
-                    if asset_type.type_id not in type_ids_in_db:
-                        """Add each new asset type (unknown id)."""
-                        conn.execute(insert(table).values(
-                            name=asset_type.name,
-                            type_id=asset_type.type_id,
-                            maj_date=datetime.now(timezone.utc).replace(microsecond=0)
-                            ))
-                    else:
-                        """Get updates of each already known market and update if needed."""
-                        update_dict : Dict[str,Any] = {}
-                        line_associated_in_db = df_asset_types.loc[df_asset_types['type_id'] == asset_type.type_id].iloc[0]
-                        if asset_type.name != line_associated_in_db.loc["name"]:
-                            update_dict["name"] = asset_type.name
-                        if update_dict:
-                            logger_database.info(f"Updating asset_type name to '{asset_type.name}'.")
-                            update_dict["maj_date"] = datetime.now(timezone.utc).replace(microsecond=0)
-                            conn.execute(
-                                update(table)
-                                .where(table.c.type_id == asset_type.type_id)
-                                .values(**update_dict)
-                            )
-                
-                if strict_deletion:
-                    """Delete obsolet asset types."""
-                    input_type_ids = {st.type_id for st in supported_types}
-                    ids_to_delete = type_ids_in_db - input_type_ids
-                    if ids_to_delete:
-                        conn.execute(
-                            delete(table)
-                            .where(table.c.type_id.in_(ids_to_delete))
-                        )
-                        logger_database.info("Unknown asset types successfully deleted.")
-
             if markets:
-                """Update markets."""
-                table_name = "Markets"
-                table: Table = self.check_table(table_name=table_name)
-                df_markets: pd.DataFrame = self.read_table_to_df(specified_table=table)
-
-                cross_mrk_type_ass_table: Table = self.check_table(table_name="MarketAssetTypes")
-                df_cross_mrk_type_ass: pd.DataFrame = self.read_table_to_df(specified_table=cross_mrk_type_ass_table)
-                
-                df_markets: pd.DataFrame = self.remove_duplicates_by_latest_update(
-                    table=table,
-                    table_name=table_name,
+                delete_duplicates(conn=conn, table=markets_table, key_column="name", changes=summary.table("Markets"))
+                upsert_rows(
                     conn=conn,
-                    df=df_markets
+                    table=markets_table,
+                    rows=market_rows,
+                    key_columns=["market_id"],
+                    compare_columns=["name", "asset_number", "status", "website"],
+                    changes=summary.table("Markets")
+                )
+                upsert_rows(
+                    conn=conn,
+                    table=cross_mrk_type_ass_table,
+                    rows=cross_rows,
+                    key_columns=["market_id", "type_id"],
+                    changes=summary.table("MarketAssetTypes")
                 )
-                
-                market_ids_in_db = set(df_markets['market_id'])           
-                for market in markets:
-                    if market.market_id not in market_ids_in_db:
-                        """Add each new market (unknown id)."""
-                        conn.execute(insert(table).values(
-                            market_id=market.market_id,
-                            name=market.name,
-                            asset_number=market.asset_number,
-                            status=market.status,
-                            website=market.website,
-                            maj_date=datetime.now(timezone.utc).replace(microsecond=0)))
-                        
-                        """Update the MarketAssetTypes cross-table of unknown markets."""
-                        asset_types_id_to_insert = [{"market_id" : market.market_id, "type_id": type_id} for type_id in market.type_ids]
-                        conn.execute(
-                            insert(cross_mrk_type_ass_table),
-                            asset_types_id_to_insert
-                        )
-                        
-                    else:
-                        """Get updates of each already known market and update if needed."""
-                        update_dict : Dict[str,Any] = {}
-                        line_associated_in_db = df_markets.loc[df_markets['market_id'] == market.market_id].iloc[0]
-                        if market.name != line_associated_in_db.loc["name"]:
-                            update_dict["name"] = market.name
-                        if market.website != line_associated_in_db.loc["website"]:
-                            update_dict["website"] = market.website
-                        if market.asset_number != line_associated_in_db.loc["asset_number"]:
-                            update_dict["asset_number"] = market.asset_number
-                        if market.status != line_associated_in_db.loc["status"]:
-                            update_dict["status"] = market.status
-                        
-                        if update_dict:
-                            logger_database.info(f"Updating market '{market.name}' fields : {', '.join(list(update_dict.keys()))}.")
-                            update_dict["maj_date"] = datetime.now(timezone.utc).replace(microsecond=0)
-                            conn.execute(
-                                update(table)
-                                .where(table.c.market_id == market.market_id)
-                                .values(**update_dict)
-                            )
-
-                        """Update the MarketAssetTypes cross-table of already known market."""
-                        type_ids_of_market_in_db = df_cross_mrk_type_ass.loc[df_cross_mrk_type_ass['market_id'] == market.market_id, 'type_id'].tolist()
-                        insert_dict : List[Dict[str, str]] = []
-                        for type_id in market.type_ids:
-                            if type_id not in type_ids_of_market_in_db:
-                                insert_dict.append({"market_id":market.market_id, "type_id":type_id})
-                        if insert_dict:
-                            if self.write_df(df=pd.DataFrame(insert_dict), table_name="MarketAssetTypes"):
-                                logger_database.info(f"Added asset type ids '{', '.join([line.get('type_id','') for line in insert_dict])} for market '{market.name}'.")
-
-
-                        obsolet_type_ids_in_curent_market = [type_id for type_id in type_ids_of_market_in_db if type_id not in market.type_ids]
-                        if obsolet_type_ids_in_curent_market:
-                            conn.execute(
-                                delete(cross_mrk_type_ass_table)
-                                .where(
-                                    and_(
-                                        cross_mrk_type_ass_table.c.market_id == market.market_id,
-                                        cross_mrk_type_ass_table.c.type_id.in_(obsolet_type_ids_in_curent_market)
-                                    )
-                                )
-                            )
-                            logger_database.info(f"Deleted asset type ids '{', '.join(obsolet_type_ids_in_curent_market)} for market '{market.name}.")
 
+            # Deletions, referencing tables first
+            if markets:
+                cross_scope = cross_mrk_type_ass_table.c.market_id.in_([market.market_id for market in markets])
                 if strict_deletion:
-                    """Delete obsolet markets from Markets & Market cross-table."""
-                    input_market_ids = {m.market_id for m in markets}
-                    markets_to_delete = market_ids_in_db - input_market_ids
-                    if markets_to_delete:
-                        conn.execute(
-                            delete(table)
-                            .where(table.c.market_id.in_(markets_to_delete))
-                        )
-                        conn.execute(
-                            delete(cross_mrk_type_ass_table)
-                            .where(cross_mrk_type_ass_table.c.market_id.in_(markets_to_delete))
-                        )
-                        logger_database.info("Unknown markets successfully deleted.")
-        
+                    cross_scope = true()
+                delete_missing_rows(
+                    conn=conn,
+                    table=cross_mrk_type_ass_table,
+                    rows=cross_rows,
+                    key_columns=["market_id", "type_id"],
+                    scope=cross_scope,
+                    changes=summary.table("MarketAssetTypes")
+                )
+                if strict_deletion:
+                    delete_missing_rows(
+                        conn=conn,
+                        table=markets_table,
+                        rows=market_rows,
+                        key_columns=["market_id"],
+                        scope=true(),
+                        changes=summary.table("Markets")
+                    )
+            if supported_types and strict_deletion:
+                delete_missing_rows(
+                    conn=conn,
+                    table=asset_types_table,
+                    rows=asset_type_rows,
+                    key_columns=["type_id"],
+                    scope=true(),
+                    changes=summary.table("AssetTypes")
+                )
+
+        if summary.is_empty():
+            logger_database.debug("Markets and asset types already up to date.")
+        else:
+            logger_database.info(f"Markets and asset types reconciled ({summary}).")
+        return summary
+
 
-    async def update_assets(
+    def update_assets(
         self,
         asset_type_id: str,
         assets_by_markets: Dict[str,List[BaseAsset]],
@@ -553,116 +1297,165 @@ class Database:
         with self.engine.begin() as conn:
             for mrk_id, assets in assets_by_markets.items():
 
-                referent_markets_order = {m: i for i, m in enumerate(referent_markets)} # for referent markets
-
                 sorted_assets = sorted(assets, key=lambda a: int(a.status))[::-1]
                 ranked_assets = [el for el in sorted_assets if el.status>=0]
                 excess_assets = [el for el in sorted_assets if el.status==-1]
                 if len(ranked_assets)>asset_number_limit:
                     ranked_assets, excess_assets = ranked_assets[:asset_number_limit], excess_assets+ranked_assets[asset_number_limit:]
-                for asset in ranked_assets:
+                ranked_assets = [el for el in ranked_assets if isinstance(el, type_cls)]
+
+                def apply_ranked(batch: List[BaseAsset]):
+                    self.upsert_ranked_assets(
+                        conn=conn,
+                        mrk_id=mrk_id,
+                        asset_type_id=asset_type_id,
+                        referent_markets=referent_markets,
+                        assets_table=assets_table,
+                        asset_markets_table=asset_markets_table,
+                        spec_at_table=spec_at_table,
+                        assets=batch
+                    )
+
+                def apply_excess(batch: List[BaseAsset]):
+                    self.retire_excess_assets(
+                        conn=conn,
+                        assets_table=assets_table,
+                        asset_markets_table=asset_markets_table,
+                        spec_at_table=spec_at_table,
+                        assets=batch
+                    )
+
+                # Whole batch in a few statements, asset by asset only to isolate the failing ones
+                for step, apply_batch, batch in [
+                    ("upsert", apply_ranked, ranked_assets),
+                    ("retirement", apply_excess, excess_assets)
+                ]:
+                    if not batch:
+                        continue
                     try:
                         with conn.begin_nested():
-                            if not isinstance(asset, type_cls):
-                                continue
+                            apply_batch(batch)
+                    except Exception as e:
+                        logger_database.warning(f"Assets {step} failed on market {mrk_id}, retrying asset by asset. Details: {str(e)}")
+                        failed_ids = []
+                        for asset in batch:
+                            try:
+                                with conn.begin_nested():
+                                    apply_batch([asset])
+                            except Exception as e:
+                                failed_ids.append(asset.asset_id)
+                                logger_database.error(f"Asset {asset.asset_id} ({mrk_id}) failed. Details: {str(e)}")
+                        logger_database.warning(f"Assets {step} on market {mrk_id}: {len(failed_ids)}/{len(batch)} asset(s) failed {failed_ids}.")
 
-                            existing_asset = conn.execute(
-                                select(assets_table).where(assets_table.c.asset_id == asset.asset_id)
-                            ).first()
+                logger_database.debug(f"Market {mrk_id}: {len(ranked_assets)} ranked and {len(excess_assets)} excess {asset_type_id} asset(s) applied.")
 
-                            if existing_asset:
-                
-                                current_main_market = existing_asset.main_market_id
-                                new_main_market = current_main_market
-
-                                if referent_markets_order.get(mrk_id, len(referent_markets)) < \
-                                    referent_markets_order.get(current_main_market, len(referent_markets)):
-                                    new_main_market = mrk_id
-
-                                    # -- ASSETS table
-                                    stmt = (
-                                        update(assets_table)
-                                        .where(assets_table.c.asset_id == asset.asset_id)
-                                        .values(
-                                            status=asset.status,
-                                            maj_date=datetime.now(timezone.utc).replace(microsecond=0),
-                                            main_market_id=new_main_market,
-                                            name=asset.name,
-                                            symbol=asset.symbol,
-                                            website=asset.website
-                                        )
-                                    )
-                                    conn.execute(stmt)
-                                else:
-                                    # Do nothing if a better referent market is already in db
-                                    pass
-
-                            else:
-
-                                # -- ASSETS table
-                                stmt = insert(assets_table).values(
-                                    asset_id=asset.asset_id,
-                                    symbol=asset.symbol,
-                                    name=asset.name,
-                                    main_market_id=mrk_id,
-                                    type_id=asset_type_id,
-                                    status=asset.status,
-                                    website=asset.website,
-                                    maj_date=datetime.now(timezone.utc).replace(microsecond=0)
-                                )
-                                conn.execute(stmt)
-
-                            # -- SPEC ASSETS table
-                            if isinstance(asset, Crypto):
-                                crypto_stmt = insert(spec_at_table).values(
-                                    asset_id=asset.asset_id,
-                                    quote_asset=asset.quote_asset,
-                                    base_asset=asset.base_asset
-                                ).on_conflict_do_nothing(
-                                    index_elements=["asset_id"]
-                                )
-                                conn.execute(crypto_stmt)
-
-                            elif isinstance(asset,Future):
-                                pass
-
-                            # [NOT IMPLEMENTED] all the other types
-
-                            # -- CROSS ASSET x MARKETS table
-                            asset_market_stmt = insert(asset_markets_table).values(
-                                asset_id=asset.asset_id,
-                                market_id=mrk_id
-                            ).on_conflict_do_nothing(
-                                index_elements=["asset_id", "market_id"]
-                            )
-                            conn.execute(asset_market_stmt)
 
-                    except Exception as e:
-                        logger_database.error(f"Details: {str(e)}")
+    def upsert_ranked_assets(
+        self,
+        conn: Connection,
+        mrk_id: str,
+        asset_type_id: str,
+        referent_markets: List[str],
+        assets_table: Table,
+        asset_markets_table: Table,
+        spec_at_table: Table,
+        assets: List[BaseAsset]
+    ):
+        """
+        Insert the ranked assets of a market, or update the known ones when this market
+        comes before their current main market in the referent markets order.
+        The Assets upsert, spec table and AssetMarkets inserts are one statement each.
+        """
+        maj_date = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+
+        unique_assets: Dict[str, BaseAsset] = {}
+        for asset in assets:
+            unique_assets.setdefault(asset.asset_id, asset) # first one has the highest status
+        assets = list(unique_assets.values())
+
+        stmt = insert(assets_table).values([
+            {
+                "asset_id": asset.asset_id,
+                "symbol": asset.symbol,
+                "name": asset.name,
+                "main_market_id": mrk_id,
+                "type_id": asset_type_id,
+                "status": asset.status,
+                "website": asset.website,
+                "maj_date": maj_date
+            } for asset in assets
+        ])
+
+        # Rank in referent markets, unlisted markets come last
+        def market_rank(market_id: Any) -> Any:
+            if not referent_markets:
+                return literal(0)
+            return case(
+                {m: i for i, m in enumerate(referent_markets)},
+                value=market_id,
+                else_=len(referent_markets)
+            )
 
-                # 0 updates and -1 deletions
-                for asset in excess_assets:
-                    try:
-                        with conn.begin_nested():
-                            if asset.status >= 0:
-                                stmt = (
-                                    update(assets_table)
-                                    .where(assets_table.c.asset_id == asset.asset_id)
-                                    .values(
-                                        status=0,
-                                        maj_date=datetime.now(timezone.utc).replace(microsecond=0)
-                                    )
-                                )
-                                conn.execute(stmt)
-                            
-                            elif asset.status == -1:
-                                stmt_am = delete(asset_markets_table).where(asset_markets_table.c.asset_id == asset.asset_id)
-                                stmt_crypto = delete(spec_at_table).where(spec_at_table.c.asset_id == asset.asset_id)
-                                stmt_asset = delete(assets_table).where(assets_table.c.asset_id == asset.asset_id)
-                                for stmt in [stmt_am, stmt_crypto, stmt_asset]:
-                                    conn.execute(stmt)
-                    except Exception as e:
-                        logger_database.error(f"Details: {str(e)}")
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["asset_id"],
+            set_={
+                col: stmt.excluded[col] for col in ["status", "maj_date", "main_market_id", "name", "symbol", "website"]
+            },
+            where=market_rank(stmt.excluded.main_market_id) < market_rank(assets_table.c.main_market_id)
+        )
+        conn.execute(stmt)
+
+        # -- SPEC ASSETS table
+        cryptos = [asset for asset in assets if isinstance(asset, Crypto)]
+        if cryptos:
+            conn.execute(
+                insert(spec_at_table).values([
+                    {
+                        "asset_id": asset.asset_id,
+                        "quote_asset": asset.quote_asset,
+                        "base_asset": asset.base_asset
+                    } for asset in cryptos
+                ]).on_conflict_do_nothing(index_elements=["asset_id"])
+            )
+
+        # [NOT IMPLEMENTED] all the other types
+
+        # -- CROSS ASSET x MARKETS table
+        conn.execute(
+            insert(asset_markets_table).values([
+                {"asset_id": asset.asset_id, "market_id": mrk_id} for asset in assets
+            ]).on_conflict_do_nothing(index_elements=["asset_id", "market_id"])
+        )
+
+
+    def retire_excess_assets(
+        self,
+        conn: Connection,
+        assets_table: Table,
+        asset_markets_table: Table,
+        spec_at_table: Table,
+        assets: List[BaseAsset]
+    ):
+        """Set the status of the excess ranked assets to 0 and delete the delisted (-1) ones, one statement per table."""
+        # Array parameters keep a single bound value whatever the number of assets
+        def any_asset_id(table: Table, asset_ids: List[str]) -> Any:
+            return table.c.asset_id == sqlalch.any_(bindparam("asset_ids", asset_ids, type_=ARRAY(String)))
+
+        downgraded_ids = [asset.asset_id for asset in assets if asset.status >= 0]
+        if downgraded_ids:
+            conn.execute(
+                update(assets_table)
+                .where(any_asset_id(assets_table, downgraded_ids))
+                .values(
+                    status=0,
+                    maj_date=datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+                )
+            )
+
+        deleted_ids = [asset.asset_id for asset in assets if asset.status == -1]
+        if deleted_ids:
+            for table in [asset_markets_table, spec_at_table, assets_table]:
+                conn.execute(delete(table).where(any_asset_id(table, deleted_ids)))
 
 
     def update_single_asset_infos(
@@ -673,31 +1466,180 @@ class Database:
         pass
 
 
-    def write_df(self, df: pd.DataFrame, table_name: str):
+    def copy_df_to_table(
+        self,
+        conn: Connection,
+        df: pd.DataFrame,
+        table: Table
+    ) -> int:
+        """
+        Bulk load a klines DataFrame through PostgreSQL COPY.
+
+        Rows are streamed (copy_to_staging) into a temporary staging table (dropped on commit),
+        then merged into the target table with a single INSERT ... SELECT,
+        ignoring rows already present for (asset_id, time_frame, open_time).
+        """
+        columns = [col for col in df.columns if col in table.c]
+        ignored_columns = [col for col in df.columns if col not in table.c]
+        if ignored_columns:
+            logger_database.debug(f"Columns {ignored_columns} not in table '{table.name}', ignored by COPY.")
+
+        staging_table = Table(
+            f"staging_{table.name.lower()}",
+            MetaData(),
+            *[Column(col, table.c[col].type) for col in columns],
+            prefixes=["TEMPORARY"],
+            postgresql_on_commit="DROP"
+        )
+        staging_table.create(conn)
+        self.copy_to_staging(conn=conn, df=df[columns], staging_table=staging_table)
+
+        stmt = insert(table).from_select(
+            columns,
+            select(*[staging_table.c[col] for col in columns])
+        ).on_conflict_do_nothing(
+            index_elements=["asset_id", "time_frame", "open_time"]
+        )
+        return self.execute_klines_insert(conn=conn, table=table, stmt=stmt)
+
+
+    def copy_to_staging(
+        self,
+        conn: Connection,
+        df: pd.DataFrame,
+        staging_table: Table
+    ):
+        """Stream the DataFrame rows as CSV into the staging table with COPY ... FROM STDIN."""
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+
+        preparer = conn.dialect.identifier_preparer
+        copy_sql = (
+            f"COPY {preparer.format_table(staging_table)} "
+            f"({', '.join(preparer.quote(col) for col in df.columns)}) "
+            "FROM STDIN WITH (FORMAT csv)"
+        )
+        driver_conn = conn.connection.driver_connection
+        with driver_conn.cursor() as cursor: # type:ignore
+            cursor.copy_expert(copy_sql, buffer)
+
+
+    def execute_klines_insert(
+        self,
+        conn: Connection,
+        table: Table,
+        stmt: Insert
+    ) -> int:
+        """
+        Execute a klines INSERT and fold the inserted rows into DataState in the same statement.
+
+        The insert runs in a data-modifying CTE whose RETURNING rows are aggregated by series
+        and upserted in DataState. Returns the number of inserted klines.
+        """
+        data_state: Table = self.check_table("DataState")
+        inserted = stmt.returning(
+            table.c.asset_id,
+            table.c.time_frame,
+            table.c.open_time
+        ).cte("inserted")
+
+        summary = select(
+            literal(table.name).label("table_name"),
+            inserted.c.asset_id,
+            inserted.c.time_frame,
+            func.min(inserted.c.open_time).label("oldest_time"),
+            func.max(inserted.c.open_time).label("latest_time"),
+            func.count().label("row_count"),
+            literal(datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)).label("maj_date")
+        ).group_by(
+            inserted.c.asset_id,
+            inserted.c.time_frame
+        )
+        state_upsert = insert(data_state).from_select(
+            ["table_name", "asset_id", "time_frame", "oldest_time", "latest_time", "row_count", "maj_date"],
+            summary
+        )
+        state_upsert = state_upsert.on_conflict_do_update(
+            index_elements=["table_name", "asset_id", "time_frame"],
+            set_={
+                "oldest_time": func.least(data_state.c.oldest_time, state_upsert.excluded.oldest_time),
+                "latest_time": func.greatest(data_state.c.latest_time, state_upsert.excluded.latest_time),
+                "row_count": data_state.c.row_count + state_upsert.excluded.row_count,
+                "maj_date": state_upsert.excluded.maj_date
+            }
+        )
+
+        count_stmt = select(func.count()).select_from(inserted).add_cte(state_upsert.cte("state_update"))
+        return conn.execute(count_stmt).scalar() or 0
+
+
+    def insert_df_to_table(
+        self,
+        conn: Connection,
+        df: pd.DataFrame,
+        table: Table
+    ) -> int:
+        """Write a klines DataFrame with a single multi-values INSERT (fallback path)."""
+        records = self.offload(df.to_dict, orient="records")
+        stmt = insert(table).values(records)
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=["asset_id", "time_frame", "open_time"]
+        )
+        return self.execute_klines_insert(conn=conn, table=table, stmt=stmt)
+
+
+    def write_df(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        method: Literal["copy", "insert"] = "copy",
+        raise_errors: bool = False
+    ) -> int:
+        """
+        Write klines in a data table, ignoring already known (asset_id, time_frame, open_time).
+
+        The 'copy' method streams the DataFrame through PostgreSQL COPY and falls back
+        to the 'insert' method (single INSERT ... VALUES statement) if it fails.
+        Errors are logged, and re-raised with raise_errors (e.g. for the outbox flusher to retry).
+        """
+        row_nb = 0
         try:
             if df.empty:
                 logger_database.warning("Dataframe empty, skipping write_df.")
-                return
+                return row_nb
+            store = self.memmap_backend(table_name)
+            if store is not None:
+                row_nb = self.offload(store.append, table_name, df)
+                logger_database.info(f"Data written in memmap table {table_name} ({row_nb} of {len(df)} rows new, already stored klines ignored).")
+                return row_nb
             table = self.check_table(table_name)
-            records = df.to_dict(orient="records")
-            stmt = insert(table).values(records)
-            stmt = stmt.on_conflict_do_nothing(
-                index_elements=["asset_id", "time_frame", "open_time"]
-            )
 
+            start = time.perf_counter()
             with self.engine.begin() as conn:
-                row_nb = conn.execute(stmt).rowcount or 0
-        
+                if "open_time" in df.columns and df["open_time"].notna().any():
+                    open_times = pd.to_datetime(df["open_time"])
+                    self.ensure_partitions(conn=conn, table=table, start_time=open_times.min(), end_time=open_times.max())
+                if method == "copy":
+                    try:
+                        with conn.begin_nested():
+                            row_nb = self.copy_df_to_table(conn=conn, df=df, table=table)
+                    except Exception as e:
+                        logger_database.warning(f"COPY ingest failed for {table_name}, falling back to INSERT. Details: {str(e)}")
+                        method = "insert"
+                if method == "insert":
+                    row_nb = self.insert_df_to_table(conn=conn, df=df, table=table)
+            elapsed = time.perf_counter() - start
+            rows_per_s = len(df) / elapsed if elapsed > 0 else float("inf")
+
             if row_nb == 0:
-                logger_database.info(f"Nothing to add to {table_name}.")
+                logger_database.info(f"Nothing to add to {table_name} ({len(df)} rows checked, {rows_per_s:.0f} rows/s via {method}).")
             else:
-                logger_database.info(f"Data successfully written in {table_name} ({row_nb} rows).")
+                logger_database.info(f"Data successfully written in {table_name} ({row_nb} rows, {rows_per_s:.0f} rows/s via {method}).")
 
         except Exception as e:
+            if raise_errors:
+                raise
             logger_database.rooted_exception(f"Details: {str(e)}")
         
-        return
-
-
-
-
+        return row_nb
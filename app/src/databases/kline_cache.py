@@ -0,0 +1,198 @@
+"""
+Local Parquet read-through cache of closed historical klines (see Database.read_data).
+
+One file per (table, asset_id, time_frame, UTC day), written only once the day is closed
+and complete: such klines never change, so cached days are served without querying
+PostgreSQL. Files are evicted least recently used first above max_bytes, and invalidated
+when klines are deleted from the database.
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from src.core.utils.config.paths import KLINE_CACHE_DIR
+from src.core.utils.dates.date_format import interval_map
+from src.core.logging.loggers import logger_database
+
+
+class KlineCache:
+
+    def __init__(
+        self,
+        cache_dir: str = KLINE_CACHE_DIR,
+        max_bytes: int = 2 * 1024**3
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.files: Optional[OrderedDict[str, int]] = None # path -> size, least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+
+
+    def day_path(
+        self,
+        table_name: str,
+        asset_id: str,
+        time_frame: str,
+        day: date
+    ) -> str:
+        return os.path.join(self.cache_dir, table_name, asset_id, time_frame, f"{day.isoformat()}.parquet")
+
+
+    def load_index(self) -> OrderedDict[str, int]:
+        """Index the files already on disk, ordered by last access (mtime is touched on each hit)."""
+        with self.lock:
+            if self.files is None:
+                entries = []
+                for root, _, names in os.walk(self.cache_dir):
+                    for name in names:
+                        if name.endswith(".parquet"):
+                            stat = os.stat(os.path.join(root, name))
+                            entries.append((stat.st_mtime, os.path.join(root, name), stat.st_size))
+                self.files = OrderedDict((path, size) for _, path, size in sorted(entries))
+                self.total_bytes = sum(self.files.values())
+            return self.files
+
+
+    @staticmethod
+    def is_cacheable(
+        time_frame: str,
+        day: date,
+        row_nb: int,
+        now: Optional[datetime] = None
+    ) -> bool:
+        """A day is cacheable once all of its klines are closed and present."""
+        now = now or datetime.now(timezone.utc)
+        day_end = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(days=1)
+        step = interval_map.get(time_frame)
+        if step is None or step > timedelta(days=1) or day_end > now:
+            return False
+        return row_nb == timedelta(days=1) // step
+
+
+    def get(
+        self,
+        table_name: str,
+        asset_id: str,
+        time_frame: str,
+        day: date
+    ) -> Optional[pd.DataFrame]:
+        path = self.day_path(table_name, asset_id, time_frame, day)
+        with self.lock:
+            files = self.load_index()
+            if path not in files:
+                self.misses += 1
+                return None
+            try:
+                df = pd.read_parquet(path)
+            except Exception as e:
+                logger_database.warning(f"Unreadable cache file {path} dropped. Details: {str(e)}")
+                self.remove(path)
+                self.misses += 1
+                return None
+            files.move_to_end(path)
+            os.utime(path)
+            self.hits += 1
+        return df
+
+
+    def put(
+        self,
+        table_name: str,
+        asset_id: str,
+        time_frame: str,
+        day: date,
+        df: pd.DataFrame
+    ):
+        path = self.day_path(table_name, asset_id, time_frame, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path) # atomic: readers never see a partial file
+
+        with self.lock:
+            files = self.load_index()
+            self.total_bytes -= files.pop(path, 0)
+            files[path] = os.path.getsize(path)
+            self.total_bytes += files[path]
+            self.writes += 1
+            self.evict()
+
+
+    def evict(self):
+        with self.lock:
+            files = self.load_index()
+            while files and self.total_bytes > self.max_bytes:
+                path = next(iter(files))
+                self.remove(path)
+                self.evictions += 1
+
+
+    def remove(
+        self,
+        path: str
+    ):
+        with self.lock:
+            self.total_bytes -= self.load_index().pop(path, 0)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+    def invalidate(
+        self,
+        table_name: str,
+        asset_ids: Optional[List[str]] = None,
+        time_frame: Optional[str] = None,
+        before: Optional[datetime] = None
+    ) -> int:
+        """Remove the cached days of a table (optionally of some assets / time frame / days starting before a date)."""
+        table_dir = os.path.join(self.cache_dir, table_name)
+        removed = 0
+        with self.lock:
+            for path in list(self.load_index()):
+                if os.path.dirname(os.path.dirname(os.path.dirname(path))) != table_dir:
+                    continue
+                tf_dir = os.path.dirname(path)
+                if asset_ids is not None and os.path.basename(os.path.dirname(tf_dir)) not in asset_ids:
+                    continue
+                if time_frame is not None and os.path.basename(tf_dir) != time_frame:
+                    continue
+                if before is not None and date.fromisoformat(os.path.basename(path)[:10]) >= before.date():
+                    continue
+                self.remove(path)
+                removed += 1
+        if removed:
+            logger_database.debug(f"{removed} cached day(s) of {table_name} invalidated.")
+        return removed
+
+
+    def clear(self):
+        with self.lock:
+            for path in list(self.load_index()):
+                self.remove(path)
+
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            files = self.load_index()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "files": len(files),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes
+            }
@@ -0,0 +1,325 @@
+"""
+Local write-ahead outbox of the klines to ingest, decoupling ingestion from database latency.
+
+Klines are first appended to the outbox as immutable Parquet segments (one per batch,
+named '<created ns>-<table>-<rows>.parquet'), then an OutboxFlusher task drains the oldest
+segments into their table with write_df and deletes them once committed. write_df ignores
+already known klines, so a segment replayed after a crash is harmless. When the database
+falls behind, producers wait once the outbox holds max_pending_rows (backpressure).
+
+Transient failures (connection, timeout, lock) are retried with backoff. A data error (bad
+values, constraint...) gets the segments of the failed batch flushed one by one, and a segment
+still failing after max_segment_failures attempts is moved to the 'dead' subdirectory, so it
+never blocks the segments behind it.
+"""
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+import pandas as pd
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from src.core.utils.config.paths import KLINE_OUTBOX_DIR
+from src.core.logging.loggers import logger_database
+
+from src.databases.async_database import AsyncDatabase
+from src.databases.batched_deletion import LOCK_NOT_AVAILABLE
+
+
+DEAD_DIR = "dead"
+# SQLSTATE classes of transient failures: connection, transaction rollback (deadlock, serialization),
+# insufficient resources, operator intervention (statement timeout, shutdown), system error
+RETRYABLE_SQLSTATE_CLASSES = ("08", "40", "53", "57", "58")
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True for transient failures worth retrying as is, False for errors of the flushed data."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, DBAPIError):
+        if error.connection_invalidated:
+            return True
+        sqlstate = getattr(error.orig, "pgcode", None) or getattr(error.orig, "sqlstate", None)
+        if sqlstate:
+            return sqlstate == LOCK_NOT_AVAILABLE or sqlstate[:2] in RETRYABLE_SQLSTATE_CLASSES
+        return isinstance(error, (OperationalError, InterfaceError))
+    return False
+
+
+@dataclass
+class Segment:
+    path: str
+    table_name: str
+    row_count: int
+    created_ns: int
+
+
+class KlineOutbox:
+
+    def __init__(
+        self,
+        outbox_dir: str = KLINE_OUTBOX_DIR
+    ):
+        self.outbox_dir = outbox_dir
+        self.last_created_ns = 0
+        self.lock = threading.Lock()
+        os.makedirs(self.outbox_dir, exist_ok=True)
+
+
+    def append(
+        self,
+        table_name: str,
+        df: pd.DataFrame
+    ) -> Segment:
+        with self.lock:
+            created_ns = max(time.time_ns(), self.last_created_ns + 1) # keeps segment names ordered
+            self.last_created_ns = created_ns
+        path = os.path.join(self.outbox_dir, f"{created_ns:020d}-{table_name}-{len(df)}.parquet")
+        df.to_parquet(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path) # a segment is visible once complete
+        return Segment(path=path, table_name=table_name, row_count=len(df), created_ns=created_ns)
+
+
+    def segments(self) -> List[Segment]:
+        """Pending segments, oldest first (a leftover .tmp file is an interrupted append and is ignored)."""
+        segments = []
+        for name in sorted(os.listdir(self.outbox_dir)):
+            if not name.endswith(".parquet"):
+                continue
+            created_ns, rest = name[:-len(".parquet")].split("-", 1)
+            table_name, row_count = rest.rsplit("-", 1)
+            segments.append(Segment(
+                path=os.path.join(self.outbox_dir, name),
+                table_name=table_name,
+                row_count=int(row_count),
+                created_ns=int(created_ns)
+            ))
+        return segments
+
+
+    def read(
+        self,
+        segment: Segment
+    ) -> pd.DataFrame:
+        return pd.read_parquet(segment.path)
+
+
+    def ack(
+        self,
+        segment: Segment
+    ):
+        try:
+            os.remove(segment.path)
+        except FileNotFoundError:
+            pass
+
+
+    def move_to_dead(
+        self,
+        segment: Segment
+    ) -> str:
+        """Set a segment aside in the dead subdirectory (kept for inspection, never flushed again)."""
+        dead_dir = os.path.join(self.outbox_dir, DEAD_DIR)
+        os.makedirs(dead_dir, exist_ok=True)
+        dead_path = os.path.join(dead_dir, os.path.basename(segment.path))
+        os.replace(segment.path, dead_path)
+        return dead_path
+
+
+    def dead_segments(self) -> int:
+        dead_dir = os.path.join(self.outbox_dir, DEAD_DIR)
+        if not os.path.isdir(dead_dir):
+            return 0
+        return sum(1 for name in os.listdir(dead_dir) if name.endswith(".parquet"))
+
+
+    def stats(self) -> Dict[str, Any]:
+        segments = self.segments()
+        return {
+            "segments": len(segments),
+            "rows": sum(segment.row_count for segment in segments),
+            "bytes": sum(os.path.getsize(segment.path) for segment in segments if os.path.exists(segment.path)),
+            "lag_s": round((time.time_ns() - segments[0].created_ns) / 1e9, 3) if segments else 0.0,
+            "dead_segments": self.dead_segments()
+        }
+
+
+class OutboxFlusher:
+    """Background task draining a KlineOutbox into the database, in batches of up to batch_rows."""
+
+    def __init__(
+        self,
+        outbox: KlineOutbox,
+        db: AsyncDatabase,
+        batch_rows: int = 50000,
+        max_pending_rows: int = 1000000,
+        retry_s: float = 1.0,
+        max_retry_s: float = 60.0,
+        max_segment_failures: int = 3
+    ):
+        self.outbox = outbox
+        self.db = db
+        self.batch_rows = batch_rows
+        self.max_pending_rows = max_pending_rows
+        self.retry_s = retry_s
+        self.max_retry_s = max_retry_s
+        self.max_segment_failures = max_segment_failures
+        self.suspects: Set[str] = set() # segments of a batch failing on a data error, flushed alone
+        self.segment_failures: Dict[str, int] = {} # data error count of each suspect segment
+        self.buried_segments = 0
+        self.pending_rows = sum(segment.row_count for segment in outbox.segments())
+        self.flushed_rows = 0
+        self.flushed_segments = 0
+        self.failures = 0
+        self.last_flush_lag_s: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.wakeup = asyncio.Event()
+        self.drained = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+
+    async def submit(
+        self,
+        table_name: str,
+        df: pd.DataFrame
+    ):
+        """Append klines to the outbox, waiting first while it holds max_pending_rows or more."""
+        if df.empty:
+            logger_database.warning("Dataframe empty, nothing added to the outbox.")
+            return
+        async with self.drained:
+            if self.pending_rows >= self.max_pending_rows:
+                logger_database.warning(f"Outbox full ({self.pending_rows} rows pending), waiting for the flusher.")
+            await self.drained.wait_for(lambda: self.pending_rows < self.max_pending_rows)
+        segment = await asyncio.to_thread(self.outbox.append, table_name, df)
+        self.pending_rows += segment.row_count
+        self.wakeup.set()
+
+
+    def next_batch(self) -> List[Segment]:
+        """Oldest segments of the oldest segment's table, up to batch_rows (at least one segment, a suspect one alone)."""
+        batch: List[Segment] = []
+        for segment in self.outbox.segments():
+            if batch and (
+                segment.path in self.suspects
+                or segment.table_name != batch[0].table_name
+                or sum(s.row_count for s in batch) + segment.row_count > self.batch_rows
+            ):
+                break
+            batch.append(segment)
+            if segment.path in self.suspects:
+                break
+        return batch
+
+
+    async def flush_batch(
+        self,
+        batch: List[Segment]
+    ):
+        df = pd.concat([await asyncio.to_thread(self.outbox.read, segment) for segment in batch], ignore_index=True)
+        await self.db.write_df(df=df, table_name=batch[0].table_name, raise_errors=True)
+        for segment in batch:
+            self.outbox.ack(segment)
+            self.suspects.discard(segment.path)
+            self.segment_failures.pop(segment.path, None)
+        row_nb = sum(segment.row_count for segment in batch)
+        self.flushed_rows += row_nb
+        self.flushed_segments += len(batch)
+        self.last_flush_lag_s = round((time.time_ns() - batch[0].created_ns) / 1e9, 3)
+        await self.release_rows(row_nb)
+
+
+    async def release_rows(
+        self,
+        row_nb: int
+    ):
+        async with self.drained:
+            self.pending_rows = max(0, self.pending_rows - row_nb)
+            self.drained.notify_all()
+
+
+    async def bury(
+        self,
+        segment: Segment,
+        error: BaseException
+    ):
+        dead_path = await asyncio.to_thread(self.outbox.move_to_dead, segment)
+        self.suspects.discard(segment.path)
+        self.segment_failures.pop(segment.path, None)
+        self.buried_segments += 1
+        logger_database.error(
+            f"Outbox segment failed {self.max_segment_failures} times on a data error, moved to {dead_path}. Details: {str(error)}"
+        )
+        await self.release_rows(segment.row_count)
+
+
+    async def run(self):
+        delay = self.retry_s
+        while True:
+            batch = self.next_batch()
+            if not batch:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            try:
+                await self.flush_batch(batch)
+                delay = self.retry_s
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                if not is_retryable(e):
+                    if len(batch) > 1:
+                        self.suspects.update(segment.path for segment in batch)
+                        logger_database.warning(f"Outbox flush of {len(batch)} segments failed on a data error, flushing them one by one. Details: {str(e)}")
+                        continue
+                    segment = batch[0]
+                    self.suspects.add(segment.path)
+                    self.segment_failures[segment.path] = self.segment_failures.get(segment.path, 0) + 1
+                    if self.segment_failures[segment.path] >= self.max_segment_failures:
+                        await self.bury(segment, e)
+                        continue
+                logger_database.warning(f"Outbox flush of {len(batch)} segment(s) failed, retrying in {delay:.1f}s. Details: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_s)
+
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+
+    async def stop(
+        self,
+        drain_timeout_s: float = 30.0
+    ):
+        """Give the flusher drain_timeout_s to empty the outbox, then cancel it (what is left stays on disk)."""
+        if self.task is None:
+            return
+        try:
+            async with self.drained:
+                await asyncio.wait_for(self.drained.wait_for(lambda: self.pending_rows == 0), timeout=drain_timeout_s)
+        except asyncio.TimeoutError:
+            logger_database.warning(f"Outbox not drained on stop, {self.pending_rows} rows left for the next run.")
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.outbox.stats(),
+            "flushed_rows": self.flushed_rows,
+            "flushed_segments": self.flushed_segments,
+            "failures": self.failures,
+            "buried_segments": self.buried_segments, # moved to dead/ by this flusher (dead_segments: all of them)
+            "last_flush_lag_s": self.last_flush_lag_s,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,433 @@
+"""
+Memory-mapped columnar kline store, an alternative backend of the data tables (see storage.json).
+
+Each (asset_id, time_frame) series is a directory holding one append-only raw NumPy file per
+column (open_time as int64 epoch nanoseconds, every other column as float64) and an index.json
+giving the committed row count, time extent and generation of the column files (a rewrite
+writes a new generation, the index replace being its single commit point). Rows are kept sorted on open_time,
+so a time range read is two binary searches and zero-copy slices of the mapped files. Klines
+newer than the last stored one are appended in place; older ones (backfill, gaps) are merged
+into a rewritten generation. Like the PostgreSQL backend, already stored (asset_id, time_frame,
+open_time) are ignored. No PostgreSQL connection is needed.
+
+Writers of a table are serialized across threads and processes by an exclusive flock on the
+table's lock file (POSIX); readers take no lock and rely on the index commit point.
+"""
+import fcntl
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from src.core.utils.config.paths import MEMMAP_STORE_DIR, ROOT_PATH
+from src.core.utils.helpers.file_manager import FileManager
+from src.core.exceptions.exceptions import InvalidTableNameError
+from src.core.logging.loggers import logger_database
+
+from src.databases.migration.database_structure import structure_metadata
+from src.databases.precision import value_dtype
+
+
+STORAGE_BACKENDS = ("postgres", "memmap")
+STORAGE_CONFIG_PATH = os.path.join(ROOT_PATH, "src", "core", "data", "storage.json")
+KEY_COLUMNS = ["asset_id", "time_frame", "open_time"]
+INDEX_FILE = "index.json"
+LOCK_FILE = ".lock"
+
+
+def to_epoch_ns(values: Any) -> np.ndarray:
+    """open_time values (datetimes, naive meaning UTC) as int64 epoch nanoseconds."""
+    times = pd.to_datetime(pd.Series(values))
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert("UTC").dt.tz_localize(None)
+    return times.to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+
+class MemmapKlineStore:
+
+    def __init__(
+        self,
+        root_dir: str = MEMMAP_STORE_DIR
+    ):
+        self.root_dir = root_dir
+        self.lock = threading.Lock()
+
+
+    @contextmanager
+    def table_lock(
+        self,
+        table_name: str
+    ) -> Iterator[None]:
+        """Exclusive write access to a table, for the threads of this process and for other processes."""
+        table_dir = os.path.join(self.root_dir, table_name)
+        os.makedirs(table_dir, exist_ok=True)
+        with self.lock, open(os.path.join(table_dir, LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+    def value_columns(
+        self,
+        table_name: str
+    ) -> List[str]:
+        table = structure_metadata.tables.get(table_name)
+        if table is None or not table_name.endswith("Data"):
+            raise InvalidTableNameError(table_name=table_name)
+        return [col for col in table.c.keys() if col not in KEY_COLUMNS]
+
+
+    def series_dir(
+        self,
+        table_name: str,
+        asset_id: str,
+        time_frame: str
+    ) -> str:
+        return os.path.join(self.root_dir, table_name, asset_id, time_frame)
+
+
+    def read_index(
+        self,
+        series_dir: str
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(series_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+
+    def write_index(
+        self,
+        series_dir: str,
+        index: Dict[str, Any]
+    ):
+        """The index is the commit point of an append: it is replaced atomically once the columns are written."""
+        tmp_path = os.path.join(series_dir, f"{INDEX_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(series_dir, INDEX_FILE))
+
+
+    def column_path(
+        self,
+        series_dir: str,
+        column: str,
+        generation: int = 0
+    ) -> str:
+        suffix = "i8" if column == "open_time" else "f8"
+        return os.path.join(series_dir, f"{column}.{suffix}" if generation == 0 else f"{column}.g{generation}.{suffix}")
+
+
+    def iter_series(
+        self,
+        table_name: str,
+        asset_ids: Optional[List[str]] = None,
+        time_frames: Optional[List[str]] = None
+    ) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Stored (asset_id, time_frame, index) of a table, in (asset_id, time_frame) order."""
+        table_dir = os.path.join(self.root_dir, table_name)
+        if not os.path.isdir(table_dir):
+            return
+        for asset_id in sorted(asset_ids if asset_ids is not None else os.listdir(table_dir)):
+            asset_dir = os.path.join(table_dir, asset_id)
+            if not os.path.isdir(asset_dir):
+                continue
+            for time_frame in sorted(time_frames if time_frames is not None else os.listdir(asset_dir)):
+                index = self.read_index(os.path.join(asset_dir, time_frame))
+                if index is not None and index["row_count"] > 0:
+                    yield asset_id, time_frame, index
+
+
+    def read_series(
+        self,
+        table_name: str,
+        asset_id: str,
+        time_frame: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        columns: Optional[List[str]] = None,
+        tail: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Columns of one series in [start_time, end_time) (only its last 'tail' rows if given),
+        as read-only views of the mapped files (open_time as int64 epoch ns). No data is copied.
+        """
+        columns = columns or ["open_time"] + self.value_columns(table_name)
+        series_dir = self.series_dir(table_name, asset_id, time_frame)
+        index = self.read_index(series_dir)
+        row_count = index["row_count"] if index is not None else 0
+        if row_count == 0:
+            return {col: np.empty(0, dtype=np.int64 if col == "open_time" else np.float64) for col in columns}
+        generation = index.get("generation", 0)
+
+        open_times = np.memmap(self.column_path(series_dir, "open_time", generation), dtype=np.int64, mode="r", shape=(row_count,))
+        start = 0 if start_time is None else int(np.searchsorted(open_times, to_epoch_ns([start_time])[0], side="left"))
+        end = row_count if end_time is None else int(np.searchsorted(open_times, to_epoch_ns([end_time])[0], side="left"))
+        end = max(start, end)
+        if tail is not None:
+            start = max(start, end - tail)
+
+        arrays: Dict[str, np.ndarray] = {}
+        for col in columns:
+            if col == "open_time":
+                arrays[col] = open_times[start:end]
+            else:
+                arrays[col] = np.memmap(self.column_path(series_dir, col, generation), dtype=np.float64, mode="r", shape=(row_count,))[start:end]
+        return arrays
+
+
+    def read_klines(
+        self,
+        table_name: str,
+        asset_ids: Optional[str|List[str]] = None,
+        time_frames: Optional[str|List[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        columns: Optional[List[str]] = None,
+        tail: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Same filters and typing as Database.read_klines_float, 'tail' keeping the last rows of each series.
+        Files stay float64: values of compact tables (precision.json) are cast to float32 copies on read.
+        """
+        if isinstance(asset_ids, str):
+            asset_ids = [asset_ids]
+        if isinstance(time_frames, str):
+            time_frames = [time_frames]
+        value_columns = self.value_columns(table_name)
+        columns = columns or list(structure_metadata.tables[table_name].c.keys())
+        for col in columns:
+            if col not in KEY_COLUMNS and col not in value_columns:
+                raise ValueError(f"Couldn't find '{col}' in table '{table_name}'.")
+        read_columns = ["open_time"] + [col for col in columns if col in value_columns]
+        dtype = value_dtype(table_name)
+
+        frames: List[pd.DataFrame] = []
+        for asset_id, time_frame, _ in self.iter_series(table_name, asset_ids, time_frames):
+            arrays = self.read_series(table_name, asset_id, time_frame, start_time, end_time, read_columns, tail)
+            row_nb = len(arrays["open_time"])
+            if row_nb == 0:
+                continue
+            frame = {col: arrays[col] if col == "open_time" else arrays[col].astype(dtype, copy=False) for col in read_columns}
+            frame["open_time"] = arrays["open_time"].view("datetime64[ns]")
+            frame["asset_id"] = np.full(row_nb, asset_id, dtype=object)
+            frame["time_frame"] = np.full(row_nb, time_frame, dtype=object)
+            frames.append(pd.DataFrame(frame, columns=columns))
+
+        if frames:
+            df = pd.concat(frames, ignore_index=True)
+        else:
+            df = pd.DataFrame({
+                col: pd.Series(dtype=object if col in ("asset_id", "time_frame") else "datetime64[ns]" if col == "open_time" else dtype)
+                for col in columns
+            })
+        for col in ("asset_id", "time_frame"):
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+        return df
+
+
+    def append(
+        self,
+        table_name: str,
+        df: pd.DataFrame
+    ) -> int:
+        """
+        Write klines, one series at a time: in O(rows written) when they are newer than the last
+        stored kline of their series, by a rewrite of the series otherwise (see merge_series).
+        Already stored (asset_id, time_frame, open_time) are ignored, as by Database.write_df.
+        """
+        value_columns = self.value_columns(table_name)
+        ignored_columns = [col for col in df.columns if col not in KEY_COLUMNS and col not in value_columns]
+        if ignored_columns:
+            logger_database.debug(f"Columns {ignored_columns} not in table '{table_name}', ignored by the memmap store.")
+
+        row_nb = 0
+        with self.table_lock(table_name):
+            for (asset_id, time_frame), df_series in df.groupby(["asset_id", "time_frame"], sort=False):
+                row_nb += self.append_series(table_name, str(asset_id), str(time_frame), df_series, value_columns)
+        return row_nb
+
+
+    def append_series(
+        self,
+        table_name: str,
+        asset_id: str,
+        time_frame: str,
+        df: pd.DataFrame,
+        value_columns: List[str]
+    ) -> int:
+        open_times = to_epoch_ns(df["open_time"])
+        order = np.argsort(open_times, kind="stable")
+        open_times = open_times[order]
+        keep = np.ones(len(open_times), dtype=bool)
+        keep[1:] = open_times[1:] != open_times[:-1] # duplicates within the batch: first one wins
+
+        series_dir = self.series_dir(table_name, asset_id, time_frame)
+        os.makedirs(series_dir, exist_ok=True)
+        index = self.read_index(series_dir) or {"row_count": 0, "oldest_time": None, "latest_time": None}
+        if index["latest_time"] is not None and (keep & (open_times <= index["latest_time"])).any():
+            return self.merge_series(table_name, asset_id, time_frame, series_dir, index, self.incoming_arrays(df, order[keep], open_times[keep], value_columns))
+        rows = order[keep]
+        if len(rows) == 0:
+            return 0
+
+        row_count = index["row_count"]
+        generation = index.get("generation", 0)
+        for col, values in self.incoming_arrays(df, rows, open_times[keep], value_columns).items():
+            with open(self.column_path(series_dir, col, generation), "ab") as f:
+                f.truncate(row_count * 8) # drops the tail of an uncommitted append
+                f.write(np.ascontiguousarray(values).tobytes())
+
+        self.write_index(series_dir, {
+            "row_count": row_count + len(rows),
+            "oldest_time": index["oldest_time"] if index["oldest_time"] is not None else int(open_times[keep][0]),
+            "latest_time": int(open_times[keep][-1]),
+            "generation": generation
+        })
+        return len(rows)
+
+
+    @staticmethod
+    def incoming_arrays(
+        df: pd.DataFrame,
+        rows: np.ndarray,
+        open_times: np.ndarray,
+        value_columns: List[str]
+    ) -> Dict[str, np.ndarray]:
+        """Column arrays of the df rows to write (open_times being theirs), NaN for missing columns."""
+        arrays: Dict[str, np.ndarray] = {"open_time": open_times}
+        for col in value_columns:
+            if col in df.columns:
+                arrays[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)[rows]
+            else:
+                arrays[col] = np.full(len(rows), np.nan)
+        return arrays
+
+
+    def merge_series(
+        self,
+        table_name: str,
+        asset_id: str,
+        time_frame: str,
+        series_dir: str,
+        index: Dict[str, Any],
+        incoming: Dict[str, np.ndarray]
+    ) -> int:
+        """Sorted merge of klines reaching into the stored range (new open_times only), written as a new generation."""
+        stored = self.read_series(table_name, asset_id, time_frame, columns=list(incoming))
+        is_new = ~np.isin(incoming["open_time"], stored["open_time"])
+        row_nb = int(is_new.sum())
+        if row_nb == 0:
+            return 0
+        merged = {col: np.concatenate([stored[col], values[is_new]]) for col, values in incoming.items()}
+        del stored
+        order = np.argsort(merged["open_time"], kind="stable")
+        self.write_generation(series_dir, {col: values[order] for col, values in merged.items()}, index.get("generation", 0) + 1)
+        return row_nb
+
+
+    def write_generation(
+        self,
+        series_dir: str,
+        arrays: Dict[str, np.ndarray],
+        generation: int
+    ):
+        """
+        Write a whole series as a new generation of column files, commit it by the index replace,
+        then remove the previous generation (and files left by a rewrite interrupted before its commit).
+        """
+        for col, values in arrays.items():
+            np.ascontiguousarray(values).tofile(self.column_path(series_dir, col, generation))
+        open_times = arrays["open_time"]
+        self.write_index(series_dir, {
+            "row_count": len(open_times),
+            "oldest_time": int(open_times[0]),
+            "latest_time": int(open_times[-1]),
+            "generation": generation
+        })
+        live_files = {os.path.basename(self.column_path(series_dir, col, generation)) for col in arrays}
+        for name in os.listdir(series_dir):
+            if name.endswith((".i8", ".f8")) and name not in live_files:
+                os.remove(os.path.join(series_dir, name))
+
+
+    def data_state(
+        self,
+        table_name: str
+    ) -> List[Tuple[str, str, datetime, datetime]]:
+        """(asset_id, time_frame, latest_time, oldest_time) of every stored series, as the DataState table."""
+        return [
+            (
+                asset_id,
+                time_frame,
+                pd.Timestamp(index["latest_time"]).to_pydatetime(),
+                pd.Timestamp(index["oldest_time"]).to_pydatetime()
+            )
+            for asset_id, time_frame, index in self.iter_series(table_name)
+        ]
+
+
+    def delete_series(
+        self,
+        table_name: str,
+        asset_ids: List[str],
+        time_frame: Optional[str] = None
+    ) -> int:
+        row_nb = 0
+        with self.table_lock(table_name):
+            for asset_id, tf, index in list(self.iter_series(table_name, asset_ids, [time_frame] if time_frame else None)):
+                shutil.rmtree(self.series_dir(table_name, asset_id, tf))
+                row_nb += index["row_count"]
+        return row_nb
+
+
+    def delete_before(
+        self,
+        table_name: str,
+        time_frame: str,
+        old_time: datetime
+    ) -> int:
+        """
+        Remove the klines of a time frame older than old_time. Each affected series is rewritten
+        as a new generation of column files, committed by the index replace: a crash midway
+        leaves the previous generation, still referenced by the index, untouched.
+        """
+        value_columns = self.value_columns(table_name)
+        cutoff = int(to_epoch_ns([old_time])[0])
+        row_nb = 0
+        with self.table_lock(table_name):
+            for asset_id, _, index in list(self.iter_series(table_name, time_frames=[time_frame])):
+                if index["oldest_time"] >= cutoff:
+                    continue
+                series_dir = self.series_dir(table_name, asset_id, time_frame)
+                arrays = self.read_series(table_name, asset_id, time_frame, columns=["open_time"] + value_columns)
+                start = int(np.searchsorted(arrays["open_time"], cutoff, side="left"))
+                row_nb += start
+                if start == index["row_count"]:
+                    del arrays
+                    shutil.rmtree(series_dir)
+                    continue
+                self.write_generation(series_dir, {col: values[start:] for col, values in arrays.items()}, index.get("generation", 0) + 1)
+                del arrays
+        return row_nb
+
+
+def load_storage_config(path: str = STORAGE_CONFIG_PATH) -> Dict[str, str]:
+    """Storage backend of each data table ("postgres" by default, or "memmap")."""
+    if not os.path.exists(path):
+        return {}
+    storage: Dict[str, str] = FileManager().load_json_file(path)
+    for table_name, backend in storage.items():
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage backend '{backend}' for table '{table_name}' (expected one of {STORAGE_BACKENDS}).")
+    return storage
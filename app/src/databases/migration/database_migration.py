@@ -8,6 +8,7 @@ from typing import Optional
 from src.core.logging.loggers import logger_database
 from src.core.utils.config.secret_management import DATABASE_URL
 from src.core.exceptions.exceptions import *
+from src.databases.schema_cache import SCHEMA_CACHE
 
 class DatabaseMigration:
 
@@ -66,6 +67,7 @@ class DatabaseMigration:
             logger_database.info(f"Database not up to date. Updating from '{current_rev}' to '{head_rev}'.")
             try:
                 upg_result = subprocess.run(upgrade_cmd, check=True, capture_output=True, text=True)
+                SCHEMA_CACHE.invalidate() # reloaded by the next check_table
                 if upg_result.stdout:
                     logger_database.debug(upg_result.stdout)
                 if upg_result.stderr:
@@ -73,6 +75,7 @@ class DatabaseMigration:
                 logger_database.info("Database successfully upgraded.")
                 return True
             except subprocess.CalledProcessError as e:
+                SCHEMA_CACHE.invalidate()
                 print(e.stderr)
             except Exception as e:
                 raise MigrationError(f"Couldn't upgrade database to last migration: {e}")
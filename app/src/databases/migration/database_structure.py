@@ -1,7 +1,12 @@
 from sqlalchemy import (
-    MetaData, Table, Column, String, Text, Integer, DECIMAL, Numeric,
+    MetaData, Table, Column, String, Text, Integer, BigInteger, DECIMAL, Numeric, REAL,
     TIMESTAMP, ForeignKey, UniqueConstraint
 )
+from typing import Optional
+
+from src.databases.migration.partitioning import PartitionSpec
+from src.databases.precision import is_compact
+from src.models.lhrd_models.indicator_registry import INDICATOR_REGISTRY
 
 structure_metadata = MetaData()
 
@@ -73,36 +78,42 @@ Positions = Table("Positions", structure_metadata,
     Column("horizon", Text),
 )
 
-def make_indicator_table(name):
+DataState = Table("DataState", structure_metadata,
+    Column("table_name", String, primary_key=True),
+    Column("asset_id", String, primary_key=True),
+    Column("time_frame", String, primary_key=True),
+    Column("oldest_time", TIMESTAMP),
+    Column("latest_time", TIMESTAMP),
+    Column("row_count", BigInteger),
+    Column("maj_date", TIMESTAMP)
+)
+
+def make_indicator_table(name, partition: Optional[PartitionSpec] = None):
+    """
+    Indicator table, optionally RANGE partitioned on open_time (see partitioning.py).
+    The partition spec is kept in table.info["partition"]. Indicator columns come from the
+    indicator registry (indicators.json), whatever the profile computed for the table.
+    Value columns are REAL for the compact tables of precision.json, DECIMAL otherwise.
+    """
+    partition_kwargs = {}
+    if partition is not None:
+        partition_kwargs["postgresql_partition_by"] = "RANGE (open_time)"
+    value_type = REAL if is_compact(name) else DECIMAL
     return Table(name, structure_metadata,
         Column("asset_id", String, ForeignKey("Assets.asset_id")),
         Column("open_time", TIMESTAMP),
         Column("time_frame", String),
-        Column("open", DECIMAL),
-        Column("high", DECIMAL),
-        Column("low", DECIMAL),
-        Column("close", DECIMAL),
-        Column("volume", DECIMAL),
-        Column("rsi", DECIMAL),
-        Column("stoch_rsi", DECIMAL),
-        Column("macd", DECIMAL),
-        Column("ema_short", DECIMAL),
-        Column("ema_mid", DECIMAL),
-        Column("ema_long", DECIMAL),
-        Column("boll_low2", DECIMAL),
-        Column("boll_low1", DECIMAL),
-        Column("boll_mid", DECIMAL),
-        Column("boll_up1", DECIMAL),
-        Column("boll_up2", DECIMAL),
-        Column("msd", DECIMAL),
-        Column("simple_return", DECIMAL),
-        Column("log_return", DECIMAL),
-        Column("obv", DECIMAL),
-        Column("vwap", DECIMAL),
-        Column("volatility", DECIMAL),
-        Column("score", DECIMAL),
-        UniqueConstraint("asset_id", "time_frame", "open_time", name=f"uq_{name.lower()}_asset_time")
+        Column("open", value_type),
+        Column("high", value_type),
+        Column("low", value_type),
+        Column("close", value_type),
+        Column("volume", value_type),
+        *[Column(col, value_type) for col in INDICATOR_REGISTRY.columns()],
+        Column("score", value_type),
+        UniqueConstraint("asset_id", "time_frame", "open_time", name=f"uq_{name.lower()}_asset_time"),
+        info={"partition": partition},
+        **partition_kwargs
     )
 
-LiveData = make_indicator_table("LiveData")
-TrainingData = make_indicator_table("TrainingData")
+LiveData = make_indicator_table("LiveData", partition=PartitionSpec(interval="week", by_time_frame=True))
+TrainingData = make_indicator_table("TrainingData", partition=PartitionSpec(interval="month"))
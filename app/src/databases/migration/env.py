@@ -24,8 +24,16 @@ import os
 # Ajoute le chemin racine du projet au PYTHONPATH
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
 from src.databases.migration.database_structure import structure_metadata
+from src.databases.migration.partitioning import is_partition_name
 target_metadata = structure_metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Partitions of the data tables are created at runtime and must not be autogenerated away."""
+    if type_ == "table" and reflected and compare_to is None and is_partition_name(name):
+        return False
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -50,6 +58,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -71,7 +80,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
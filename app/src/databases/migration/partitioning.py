@@ -0,0 +1,139 @@
+"""
+Native PostgreSQL partitioning of the indicator tables.
+
+Data tables are RANGE partitioned on open_time (one partition per day, week or month),
+each range partition being optionally LIST sub-partitioned by time_frame so that
+retention can drop expired klines of a single time frame.
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple
+
+from src.core.utils.dates.date_format import interval_map
+
+
+PARTITION_INTERVALS = ("day", "week", "month")
+PARTITION_TIME_FRAMES = list(interval_map.keys())
+
+
+@dataclass
+class PartitionSpec:
+    interval: str = "month"
+    by_time_frame: bool = False
+    premake: int = 2 # number of future periods created ahead of time
+
+    def __post_init__(self):
+        if self.interval not in PARTITION_INTERVALS:
+            raise ValueError(f"Invalid partition interval '{self.interval}'. Must be one of {PARTITION_INTERVALS}.")
+
+
+def to_naive_utc(moment: datetime) -> datetime:
+    """Partition bounds are compared to TIMESTAMP (without time zone) values stored in UTC."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def floor_period(moment: datetime, interval: str) -> datetime:
+    moment = to_naive_utc(moment).replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "week":
+        moment -= timedelta(days=moment.weekday())
+    elif interval == "month":
+        moment = moment.replace(day=1)
+    return moment
+
+
+def next_period(lower: datetime, interval: str) -> datetime:
+    """Lower bound of the period following the one holding 'lower' (floored first: safe on the 29th-31st)."""
+    lower = floor_period(lower, interval)
+    if interval == "day":
+        return lower + timedelta(days=1)
+    if interval == "week":
+        return lower + timedelta(days=7)
+    if lower.month == 12:
+        return lower.replace(year=lower.year + 1, month=1)
+    return lower.replace(month=lower.month + 1)
+
+
+def iter_periods(
+    start: datetime,
+    end: datetime,
+    interval: str
+) -> Iterator[Tuple[datetime, datetime]]:
+    """Yield the (lower, upper) bounds of every period overlapping [start, end]."""
+    lower = floor_period(start, interval)
+    end = to_naive_utc(end)
+    while lower <= end:
+        upper = next_period(lower, interval)
+        yield lower, upper
+        lower = upper
+
+
+def partition_name(
+    table_name: str,
+    lower: datetime,
+    time_frame: Optional[str] = None
+) -> str:
+    name = f"{table_name}_{lower.strftime('%Y%m%d')}"
+    if time_frame is not None:
+        name += f"_{time_frame}"
+    return name
+
+
+def is_partition_name(table_name: str) -> bool:
+    """True for partitions created by this module (e.g. 'LiveData_20250714' or 'LiveData_20250714_5m')."""
+    return re.fullmatch(r".+Data_\d{8}(_\w+)?", table_name) is not None
+
+
+def parse_range_bound(bound_expr: str) -> Optional[Tuple[datetime, datetime]]:
+    """Parse a pg_get_expr(relpartbound) range expression into (lower, upper) datetimes."""
+    match = re.search(r"FROM \('([^']+)'\) TO \('([^']+)'\)", bound_expr)
+    if match is None:
+        return None
+    return datetime.fromisoformat(match.group(1)), datetime.fromisoformat(match.group(2))
+
+
+def create_partition_ddl(
+    table_name: str,
+    spec: PartitionSpec,
+    lower: datetime,
+    upper: datetime
+) -> List[str]:
+    """DDL statements creating the range partition [lower, upper) and its time frame sub-partitions."""
+    name = partition_name(table_name, lower)
+    range_ddl = (
+        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table_name}" '
+        f"FOR VALUES FROM ('{lower.isoformat(sep=' ')}') TO ('{upper.isoformat(sep=' ')}')"
+    )
+    if not spec.by_time_frame:
+        return [range_ddl]
+
+    statements = [range_ddl + " PARTITION BY LIST (time_frame)"]
+    for tf in PARTITION_TIME_FRAMES:
+        statements.append(
+            f'CREATE TABLE IF NOT EXISTS "{partition_name(table_name, lower, tf)}" '
+            f"PARTITION OF \"{name}\" FOR VALUES IN ('{tf}')"
+        )
+    statements.append(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table_name, lower, "default")}" '
+        f'PARTITION OF "{name}" DEFAULT'
+    )
+    return statements
+
+
+LIST_PARTITIONS_QUERY = """
+    SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    JOIN pg_namespace nsp ON nsp.oid = parent.relnamespace
+    WHERE parent.relname = :table_name AND nsp.nspname = current_schema()
+"""
+
+LEAF_PARTITIONS_QUERY = """
+    SELECT c.relname
+    FROM pg_partition_tree(to_regclass(quote_ident(:table_name))) tree
+    JOIN pg_class c ON c.oid = tree.relid
+    WHERE tree.isleaf
+"""
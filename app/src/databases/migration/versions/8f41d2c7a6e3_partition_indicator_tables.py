@@ -0,0 +1,108 @@
+"""partition_indicator_tables
+
+Revision ID: 8f41d2c7a6e3
+Revises: c2fb035a0960
+Create Date: 2026-10-17 09:12:41.208530
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.databases.migration.partitioning import (
+    PartitionSpec,
+    create_partition_ddl,
+    floor_period,
+    iter_periods,
+    next_period,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f41d2c7a6e3'
+down_revision: Union[str, None] = 'c2fb035a0960'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PARTITIONED_TABLES = {
+    'LiveData': PartitionSpec(interval='week', by_time_frame=True),
+    'TrainingData': PartitionSpec(interval='month'),
+}
+
+INDICATOR_COLUMNS = [
+    'open', 'high', 'low', 'close', 'volume',
+    'rsi', 'stoch_rsi', 'macd', 'ema_short', 'ema_mid', 'ema_long',
+    'boll_low2', 'boll_low1', 'boll_mid', 'boll_up1', 'boll_up2',
+    'msd', 'simple_return', 'log_return', 'obv', 'vwap', 'volatility', 'score',
+]
+
+
+def indicator_table_args(table_name: str) -> list:
+    return [
+        sa.Column('asset_id', sa.String(), nullable=True),
+        sa.Column('open_time', sa.TIMESTAMP(), nullable=True),
+        sa.Column('time_frame', sa.String(), nullable=True),
+        *[sa.Column(col, sa.DECIMAL(), nullable=True) for col in INDICATOR_COLUMNS],
+        sa.ForeignKeyConstraint(['asset_id'], ['Assets.asset_id'], ),
+        sa.UniqueConstraint('asset_id', 'time_frame', 'open_time', name=f'uq_{table_name.lower()}_asset_time'),
+    ]
+
+
+def move_to_legacy(table_name: str) -> str:
+    """Rename a table and its unique index out of the way of the new table."""
+    legacy_name = f'{table_name}_legacy'
+    op.rename_table(table_name, legacy_name)
+    op.execute(
+        f'ALTER TABLE "{legacy_name}" RENAME CONSTRAINT '
+        f'"uq_{table_name.lower()}_asset_time" TO "uq_{table_name.lower()}_asset_time_legacy"'
+    )
+    return legacy_name
+
+
+def copy_rows(source_name: str, target_name: str):
+    columns = ', '.join(f'"{col}"' for col in ['asset_id', 'open_time', 'time_frame', *INDICATOR_COLUMNS])
+    op.execute(
+        f'INSERT INTO "{target_name}" ({columns}) '
+        f'SELECT {columns} FROM "{source_name}" WHERE open_time IS NOT NULL'
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for table_name, spec in PARTITIONED_TABLES.items():
+        legacy_name = move_to_legacy(table_name)
+        op.create_table(
+            table_name,
+            *indicator_table_args(table_name),
+            postgresql_partition_by='RANGE (open_time)'
+        )
+
+        # Partitions of every period holding rows, plus the current and 'premake' next periods.
+        populated_periods = bind.execute(sa.text(
+            f"SELECT DISTINCT date_trunc('{spec.interval}', open_time) FROM \"{legacy_name}\" "
+            "WHERE open_time IS NOT NULL"
+        )).scalars().all()
+        end = floor_period(now, spec.interval)
+        for _ in range(spec.premake):
+            end = next_period(end, spec.interval)
+        periods = dict(iter_periods(now, end, spec.interval))
+        for lower in populated_periods:
+            periods[lower] = next_period(lower, spec.interval)
+        for lower, upper in sorted(periods.items()):
+            for ddl in create_partition_ddl(table_name, spec, lower, upper):
+                op.execute(ddl)
+
+        copy_rows(legacy_name, table_name)
+        op.drop_table(legacy_name)
+
+
+def downgrade() -> None:
+    for table_name in PARTITIONED_TABLES:
+        legacy_name = move_to_legacy(table_name)
+        op.create_table(table_name, *indicator_table_args(table_name))
+        copy_rows(legacy_name, table_name)
+        op.drop_table(legacy_name) # drops every partition with it
@@ -0,0 +1,43 @@
+"""add_data_state_table
+
+Revision ID: b7e9c05d13fa
+Revises: 8f41d2c7a6e3
+Create Date: 2026-10-17 10:02:18.771046
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e9c05d13fa'
+down_revision: Union[str, None] = '8f41d2c7a6e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('DataState',
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('asset_id', sa.String(), nullable=False),
+    sa.Column('time_frame', sa.String(), nullable=False),
+    sa.Column('oldest_time', sa.TIMESTAMP(), nullable=True),
+    sa.Column('latest_time', sa.TIMESTAMP(), nullable=True),
+    sa.Column('row_count', sa.BigInteger(), nullable=True),
+    sa.Column('maj_date', sa.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('table_name', 'asset_id', 'time_frame')
+    )
+    # One-time backfill from the existing klines.
+    for table_name in ['LiveData', 'TrainingData']:
+        op.execute(
+            'INSERT INTO "DataState" (table_name, asset_id, time_frame, oldest_time, latest_time, row_count, maj_date) '
+            f"SELECT '{table_name}', asset_id, time_frame, min(open_time), max(open_time), count(*), now() "
+            f'FROM "{table_name}" WHERE asset_id IS NOT NULL AND time_frame IS NOT NULL '
+            'GROUP BY asset_id, time_frame'
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('DataState')
@@ -0,0 +1,53 @@
+"""compact_value_columns
+
+Revision ID: d3a8f61b2c47
+Revises: b7e9c05d13fa
+Create Date: 2026-10-17 14:26:09.513204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8f61b2c47'
+down_revision: Union[str, None] = 'b7e9c05d13fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Frozen copy of the float32 tables of precision.json when this revision was written (none: every
+# data table is 'decimal'), so the revision gives the same schema everywhere. Tables switched
+# later get their own retyping revision from autogenerate.
+COMPACT_TABLES: list = []
+KEY_COLUMNS = ['asset_id', 'open_time', 'time_frame']
+
+
+def value_columns(table_name: str) -> list:
+    inspector = sa.inspect(op.get_bind())
+    return [
+        col['name'] for col in inspector.get_columns(table_name)
+        if col['name'] not in KEY_COLUMNS and isinstance(col['type'], sa.Numeric)
+    ]
+
+
+def set_value_type(table_name: str, sql_type: str):
+    """Retype every value column in one rewrite of the table (partitions included)."""
+    alterations = ', '.join(
+        f'ALTER COLUMN "{col}" TYPE {sql_type} USING "{col}"::{sql_type}' for col in value_columns(table_name)
+    )
+    if alterations:
+        op.execute(f'ALTER TABLE "{table_name}" {alterations}')
+
+
+def upgrade() -> None:
+    for table_name in COMPACT_TABLES:
+        set_value_type(table_name, 'REAL')
+
+
+def downgrade() -> None:
+    # Only the tables retyped by upgrade()
+    for table_name in COMPACT_TABLES:
+        set_value_type(table_name, 'NUMERIC')
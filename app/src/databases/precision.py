@@ -0,0 +1,63 @@
+"""
+Value precision of the data tables (see precision.json): "decimal" (default) or "float32".
+
+decimal: DECIMAL columns, float64 frames out of the readers, indicators computed in float64.
+float32 (compact mode): REAL columns (4 bytes instead of a variable length NUMERIC), float32
+frames out of every reader and indicators computed in float32, at half the memory of float64.
+Cumulative sums (obv, vwap) still accumulate in float64 and are stored rounded to float32.
+
+Tolerances of the compact mode against float64 (checked by bench_compact_mode.py), as the
+largest difference relative to the close price for price-like values, to 1 for bounded and
+return-like ones:
+- prices, volumes, emas, macd, msd, bollinger bands, vwap, obv, returns: 1e-6 (float32
+  rounding is 2^-24 ~ 6e-8 of the value; a 1 tick move of a 60000 price is ~1e-7 of it,
+  so compact mode is not meant for strategies reading sub-tick returns);
+- rsi, volatility: 1e-5;
+- stoch_rsi: 1e-3 (ratio of an RSI difference over the RSI range, which can be narrow).
+"""
+import os
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from src.core.utils.config.paths import ROOT_PATH
+from src.core.utils.helpers.file_manager import FileManager
+
+
+PRECISIONS = ("decimal", "float32")
+PRECISION_CONFIG_PATH = os.path.join(ROOT_PATH, "src", "core", "data", "precision.json")
+
+
+def load_precision_config(path: str = PRECISION_CONFIG_PATH) -> Dict[str, str]:
+    """Value precision of each data table ("decimal" by default, or "float32")."""
+    if not os.path.exists(path):
+        return {}
+    precision: Dict[str, str] = FileManager().load_json_file(path)
+    for table_name, mode in precision.items():
+        if mode not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{mode}' for table '{table_name}' (expected one of {PRECISIONS}).")
+    return precision
+
+
+TABLE_PRECISION = load_precision_config()
+
+
+def is_compact(table_name: str) -> bool:
+    return TABLE_PRECISION.get(table_name) == "float32"
+
+
+def value_dtype(table_name: str) -> str:
+    """dtype of the value columns read from, and of the indicators computed for, a data table."""
+    return "float32" if is_compact(table_name) else "float64"
+
+
+def compact_frame(
+    df: pd.DataFrame,
+    table_name: str
+) -> pd.DataFrame:
+    """Float columns of df cast to float32 when the table is compact (df unchanged otherwise)."""
+    if not is_compact(table_name):
+        return df
+    columns = [col for col in df.columns if df[col].dtype == np.float64]
+    return df.astype({col: np.float32 for col in columns}) if columns else df
@@ -0,0 +1,135 @@
+"""
+Set-based reconciliation of reference tables (Markets, AssetTypes, MarketAssetTypes...).
+
+The caller gives the desired rows of a table: they are applied with one batched upsert
+(rows are only rewritten when a compared column IS DISTINCT FROM the stored value) and
+the stored rows missing from the desired set are removed with one batched delete.
+Both statements run on the caller's connection, so a whole reconciliation is one transaction.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Connection, ColumnElement, Table, delete, func, literal_column, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+
+@dataclass
+class TableChanges:
+    table_name: str
+    inserted: List[Tuple[Any, ...]] = field(default_factory=list)
+    updated: List[Tuple[Any, ...]] = field(default_factory=list)
+    deleted: List[Tuple[Any, ...]] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.inserted or self.updated or self.deleted)
+
+
+    def __str__(self) -> str:
+        return f"{self.table_name}: {len(self.inserted)} inserted, {len(self.updated)} updated, {len(self.deleted)} deleted"
+
+
+@dataclass
+class ReconciliationSummary:
+    changes: Dict[str, TableChanges] = field(default_factory=dict)
+
+    def table(self, table_name: str) -> TableChanges:
+        return self.changes.setdefault(table_name, TableChanges(table_name=table_name))
+
+
+    def is_empty(self) -> bool:
+        return all(changes.is_empty() for changes in self.changes.values())
+
+
+    def __str__(self) -> str:
+        return " | ".join(str(changes) for changes in self.changes.values() if not changes.is_empty()) or "no change"
+
+
+def upsert_rows(
+    conn: Connection,
+    table: Table,
+    rows: List[Dict[str, Any]],
+    key_columns: List[str],
+    compare_columns: Optional[List[str]] = None,
+    date_column: Optional[str] = "maj_date",
+    changes: Optional[TableChanges] = None
+) -> TableChanges:
+    """
+    Insert the unknown rows and update the known ones whose compare_columns differ, in one statement.
+    date_column (if in the table) is set on inserted and updated rows only.
+    """
+    changes = changes if changes is not None else TableChanges(table_name=table.name)
+    if not rows:
+        return changes
+    compare_columns = compare_columns or []
+    if date_column is not None and date_column in table.c:
+        maj_date = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+        rows = [{**row, date_column: maj_date} for row in rows]
+    else:
+        date_column = None
+
+    stmt = insert(table).values(rows)
+    if compare_columns:
+        set_columns = compare_columns + ([date_column] if date_column else [])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={col: stmt.excluded[col] for col in set_columns},
+            where=or_(*[table.c[col].is_distinct_from(stmt.excluded[col]) for col in compare_columns])
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=key_columns)
+
+    # xmax is 0 on freshly inserted tuples, set on tuples rewritten by DO UPDATE
+    stmt = stmt.returning(*[table.c[col] for col in key_columns], literal_column("xmax = 0").label("is_insert"))
+    for *key, is_insert in conn.execute(stmt):
+        (changes.inserted if is_insert else changes.updated).append(tuple(key))
+    return changes
+
+
+def delete_missing_rows(
+    conn: Connection,
+    table: Table,
+    rows: List[Dict[str, Any]],
+    key_columns: List[str],
+    scope: ColumnElement[bool],
+    changes: Optional[TableChanges] = None
+) -> TableChanges:
+    """Delete, among the rows matching scope, those whose key is not in the desired rows (one statement)."""
+    changes = changes if changes is not None else TableChanges(table_name=table.name)
+    stmt = delete(table).where(scope)
+    desired_keys = [tuple(row[col] for col in key_columns) for row in rows]
+    if desired_keys:
+        stmt = stmt.where(tuple_(*[table.c[col] for col in key_columns]).not_in(desired_keys))
+    stmt = stmt.returning(*[table.c[col] for col in key_columns])
+    changes.deleted.extend(tuple(key) for key in conn.execute(stmt))
+    return changes
+
+
+def delete_duplicates(
+    conn: Connection,
+    table: Table,
+    key_column: str,
+    date_column: str = "maj_date",
+    changes: Optional[TableChanges] = None
+) -> TableChanges:
+    """
+    Keep only the most recent row (by date_column) of each key_column value, in one statement.
+    Rows are identified by the table primary key.
+    """
+    changes = changes if changes is not None else TableChanges(table_name=table.name)
+    pk_columns = list(table.primary_key.columns)
+    ranked = select(
+        *pk_columns,
+        func.row_number().over(
+            partition_by=table.c[key_column],
+            order_by=[table.c[date_column].desc().nulls_last(), *pk_columns]
+        ).label("rank")
+    ).subquery("ranked")
+
+    stmt = delete(table).where(
+        tuple_(*pk_columns).in_(
+            select(*[ranked.c[col.name] for col in pk_columns]).where(ranked.c.rank > 1)
+        )
+    ).returning(*pk_columns)
+    changes.deleted.extend(tuple(key) for key in conn.execute(stmt))
+    return changes
@@ -0,0 +1,133 @@
+"""
+Process-wide cache of the database catalogs used by Database.check_table, one per database
+(keyed by the engine URL without its driver, so the psycopg2 and asyncpg engines of a
+database share it while a test database and the real one don't).
+
+The table names (and which of them are partitioned) are loaded with a single catalog
+query, then served from memory: the schema only changes through migrations, which
+invalidate the cache (see DatabaseMigration.db_structure_update). Names still unknown after
+a reload are remembered as missing until then, so they don't reload the catalog on each lookup.
+"""
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import Engine, text
+
+from src.core.logging.loggers import logger_database
+
+
+SCHEMA_TABLES_QUERY = """
+    SELECT c.relname, c.relkind = 'p'
+    FROM pg_class c
+    JOIN pg_namespace nsp ON nsp.oid = c.relnamespace
+    WHERE nsp.nspname = current_schema()
+      AND c.relkind IN ('r', 'p')
+      AND NOT c.relispartition
+"""
+
+CatalogKey = Tuple[str, Optional[str], Optional[int], Optional[str], Optional[str]] # backend, host, port, database, user
+
+
+def catalog_key(engine: Engine) -> CatalogKey:
+    url = engine.url
+    return url.get_backend_name(), url.host, url.port, url.database, url.username
+
+
+class SchemaCache:
+
+    def __init__(self):
+        self.tables: Dict[CatalogKey, Dict[str, bool]] = {} # per database: table name -> is partitioned
+        self.missing: Dict[CatalogKey, Set[str]] = {} # per database: names absent from its last load (negative cache)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+
+    def load(
+        self,
+        engine: Engine
+    ):
+        with engine.connect() as conn:
+            tables = {name: bool(partitioned) for name, partitioned in conn.execute(text(SCHEMA_TABLES_QUERY))}
+        key = catalog_key(engine)
+        with self.lock:
+            self.tables[key] = tables
+            self.missing[key] = set()
+            self.misses += 1
+        logger_database.debug(f"Schema cache loaded for {engine.url.database} ({len(tables)} tables, {sum(tables.values())} partitioned).")
+
+
+    def invalidate(
+        self,
+        engine: Optional[Engine] = None
+    ):
+        """Forget the catalog of the engine's database (of every database when None)."""
+        with self.lock:
+            if engine is None:
+                self.tables.clear()
+                self.missing.clear()
+            else:
+                key = catalog_key(engine)
+                self.tables.pop(key, None)
+                self.missing.pop(key, None)
+
+
+    def get_tables(
+        self,
+        engine: Engine,
+        table_name: Optional[str] = None
+    ) -> Dict[str, bool]:
+        """
+        Cached tables of the engine's database, loaded on first use. An unknown table_name triggers
+        a single reload, for tables created outside of migrations (e.g. metadata.create_all); if it
+        is still unknown, it is cached as missing until the next invalidate().
+        """
+        key = catalog_key(engine)
+        tables = self.tables.get(key)
+        missing = self.missing.get(key, set())
+        if tables is None or (table_name is not None and table_name not in tables and table_name not in missing):
+            self.load(engine)
+            tables = self.tables.get(key, {})
+            if table_name is not None and table_name not in tables:
+                with self.lock:
+                    self.missing.setdefault(key, set()).add(table_name)
+        else:
+            with self.lock:
+                self.hits += 1
+        return tables
+
+
+    def has_table(
+        self,
+        engine: Engine,
+        table_name: str
+    ) -> bool:
+        return table_name in self.get_tables(engine, table_name)
+
+
+    def is_partitioned(
+        self,
+        engine: Engine,
+        table_name: str
+    ) -> bool:
+        return self.get_tables(engine, table_name).get(table_name, False)
+
+
+    def table_names(
+        self,
+        engine: Engine
+    ) -> Set[str]:
+        return set(self.get_tables(engine))
+
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "databases": len(self.tables),
+            "tables": sum(len(tables) for tables in self.tables.values()),
+            "missing": sum(len(names) for names in self.missing.values())
+        }
+
+
+SCHEMA_CACHE = SchemaCache()
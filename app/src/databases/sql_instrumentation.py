@@ -0,0 +1,298 @@
+"""
+Opt-in timing of the SQL statements run by Database (see Database(instrumentation=...)).
+
+Hooked on the engine cursor events, it aggregates per statement template (whitespace and
+bound parameter lists collapsed) a latency histogram, row and parameter counts and the
+Database methods issuing it. Statements slower than slow_query_ms get their plan captured:
+EXPLAIN (ANALYZE, BUFFERS) for read-only queries, plain EXPLAIN for writes (never re-run)
+and for reads that took more than half of statement_timeout. The EXPLAIN runs in a savepoint
+of the caller's transaction: a failure is rolled back to it and never aborts the transaction.
+COPY streams go through the driver directly and are not seen.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Engine, event
+
+from src.core.logging.loggers import logger_database
+
+
+BUCKETS_MS = [0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+DATABASE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database.py")
+
+PLACEHOLDER = r"(?:%\(\w+\)s|\$\d+(?:::[\w\[\]]+)?|%s|\?)" # psycopg2 / asyncpg bound parameters
+PARAM_LIST_PATTERN = re.compile(rf"\(\s*{PLACEHOLDER}(?:\s*,\s*{PLACEHOLDER})*\s*\)")
+VALUES_ROWS_PATTERN = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+READ_ONLY_PATTERN = re.compile(r"^\s*(SELECT|WITH|VALUES)\b", re.IGNORECASE)
+WRITE_PATTERN = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+EXPLAINABLE_PATTERN = re.compile(r"^\s*(SELECT|WITH|VALUES|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+EXPLAIN_SAVEPOINT = "sql_instrumentation_explain"
+STATEMENT_TIMEOUT_QUERY = "SELECT setting::bigint FROM pg_settings WHERE name = 'statement_timeout'" # ms, 0: none
+
+
+def statement_template(statement: str) -> str:
+    """Statement with whitespace and bound parameter lists collapsed, e.g. 'IN (...)' whatever the list length."""
+    template = " ".join(statement.split())
+    template = PARAM_LIST_PATTERN.sub("(...)", template)
+    return VALUES_ROWS_PATTERN.sub(r"\1", template)
+
+
+def parameter_count(parameters: Any, executemany: bool) -> int:
+    if parameters is None:
+        return 0
+    if executemany:
+        return sum(len(params) for params in parameters)
+    return len(parameters)
+
+
+def calling_method() -> str:
+    """Outermost Database method of the current stack ('?' when called from elsewhere)."""
+    frame = sys._getframe(2)
+    method = "?"
+    while frame is not None:
+        if frame.f_code.co_filename == DATABASE_FILE:
+            method = frame.f_code.co_name
+        frame = frame.f_back
+    return method
+
+
+@dataclass
+class TemplateStats:
+    template: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    parameters: int = 0
+    histogram: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+    methods: Counter = field(default_factory=Counter)
+    slow_plans: List[str] = field(default_factory=list)
+
+    def add(
+        self,
+        elapsed_ms: float,
+        rows: int,
+        parameters: int,
+        method: str
+    ):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.parameters += parameters
+        self.histogram[bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+        self.methods[method] += 1
+
+
+    def percentile_ms(
+        self,
+        q: float
+    ) -> float:
+        """Upper bound of the histogram bucket holding the q-quantile (max_ms for the last bucket)."""
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.histogram):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "template": self.template,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile_ms(0.5),
+            "p95_ms": self.percentile_ms(0.95),
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "parameters": self.parameters,
+            "histogram": dict(zip([f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"], self.histogram)),
+            "methods": dict(self.methods),
+            "slow_plans": list(self.slow_plans)
+        }
+
+
+class SqlInstrumentation:
+
+    def __init__(
+        self,
+        slow_query_ms: Optional[float] = None,
+        summary_interval_s: Optional[float] = None,
+        max_plans_per_template: int = 3
+    ):
+        self.slow_query_ms = slow_query_ms
+        self.summary_interval_s = summary_interval_s
+        self.max_plans_per_template = max_plans_per_template
+        self.stats: Dict[str, TemplateStats] = {}
+        self.last_summary = time.monotonic()
+        self.lock = threading.Lock()
+
+
+    @classmethod
+    def from_env(cls) -> Optional["SqlInstrumentation"]:
+        """Enabled by SQL_INSTRUMENTATION=1, tuned by SQL_SLOW_QUERY_MS and SQL_SUMMARY_INTERVAL_S."""
+        if os.getenv("SQL_INSTRUMENTATION", "") != "1":
+            return None
+        slow_query_ms = os.getenv("SQL_SLOW_QUERY_MS")
+        summary_interval_s = os.getenv("SQL_SUMMARY_INTERVAL_S")
+        return cls(
+            slow_query_ms=float(slow_query_ms) if slow_query_ms else None,
+            summary_interval_s=float(summary_interval_s) if summary_interval_s else None
+        )
+
+
+    def attach(
+        self,
+        engine: Engine
+    ):
+        event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+
+
+    def detach(
+        self,
+        engine: Engine
+    ):
+        event.remove(engine, "before_cursor_execute", self.before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", self.after_cursor_execute)
+
+
+    def before_cursor_execute(
+        self,
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool
+    ):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+    def after_cursor_execute(
+        self,
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool
+    ):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        template = statement_template(statement)
+        rows = max(cursor.rowcount or 0, 0)
+
+        with self.lock:
+            stats = self.stats.get(template)
+            if stats is None:
+                stats = self.stats[template] = TemplateStats(template=template)
+            stats.add(elapsed_ms, rows, parameter_count(parameters, executemany), calling_method())
+            capture_plan = (
+                self.slow_query_ms is not None
+                and elapsed_ms >= self.slow_query_ms
+                and len(stats.slow_plans) < self.max_plans_per_template
+            )
+
+        if capture_plan and not executemany:
+            plan = self.explain(conn, statement, parameters, elapsed_ms)
+            if plan is not None:
+                with self.lock:
+                    stats.slow_plans.append(plan)
+                logger_database.warning(f"Slow query ({elapsed_ms:.0f}ms, {stats.methods.most_common(1)[0][0]}): {template[:200]}\n{plan}")
+
+        if self.summary_interval_s is not None and time.monotonic() - self.last_summary >= self.summary_interval_s:
+            self.log_summary()
+
+
+    def explain(
+        self,
+        conn: Any,
+        statement: str,
+        parameters: Any,
+        elapsed_ms: float
+    ) -> Optional[str]:
+        """
+        Plan of a slow statement, run on the same connection (temporary tables stay visible).
+        Only read-only statements are executed again (ANALYZE): data-modifying CTEs are not, nor
+        reads which took more than half of statement_timeout (they would risk timing out).
+        Inside a transaction, the EXPLAIN runs in a savepoint rolled back on failure.
+        """
+        if not EXPLAINABLE_PATTERN.match(statement):
+            return None
+        read_only = READ_ONLY_PATTERN.match(statement) is not None and WRITE_PATTERN.search(statement) is None
+        try:
+            dbapi_connection = conn.connection.dbapi_connection
+            in_transaction = not getattr(dbapi_connection, "autocommit", False)
+            explain_cursor = dbapi_connection.cursor()
+        except Exception as e:
+            logger_database.debug(f"Couldn't explain slow query. Details: {str(e)}")
+            return None
+        try:
+            if in_transaction:
+                explain_cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            try:
+                if read_only:
+                    explain_cursor.execute(STATEMENT_TIMEOUT_QUERY)
+                    timeout_ms = explain_cursor.fetchone()[0]
+                    read_only = not timeout_ms or elapsed_ms < timeout_ms / 2
+                options = "(ANALYZE, BUFFERS)" if read_only else ""
+                explain_cursor.execute(f"EXPLAIN {options} {statement}", parameters)
+                plan = "\n".join(row[0] for row in explain_cursor.fetchall())
+            except Exception as e:
+                if in_transaction:
+                    explain_cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                logger_database.debug(f"Couldn't explain slow query. Details: {str(e)}")
+                return None
+            if in_transaction:
+                explain_cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            return plan
+        except Exception as e:
+            logger_database.warning(f"Couldn't restore the transaction after explaining a slow query. Details: {str(e)}")
+            return None
+        finally:
+            explain_cursor.close()
+
+
+    def snapshot(
+        self,
+        top: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Statistics of each statement template, by decreasing total time."""
+        with self.lock:
+            ranked = sorted(self.stats.values(), key=lambda stats: stats.total_ms, reverse=True)
+            return [stats.to_dict() for stats in ranked[:top]]
+
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+            self.last_summary = time.monotonic()
+
+
+    def log_summary(
+        self,
+        top: int = 10
+    ):
+        self.last_summary = time.monotonic()
+        snapshot = self.snapshot(top=top)
+        if not snapshot:
+            return
+        lines = [
+            f"{s['total_ms']:>10.1f}ms total | {s['count']:>6} x | p50 {s['p50_ms']}ms p95 {s['p95_ms']}ms max {s['max_ms']}ms | "
+            f"{s['rows']} rows | {','.join(s['methods'])} | {s['template'][:120]}"
+            for s in snapshot
+        ]
+        logger_database.info("SQL summary (top statements by total time):\n" + "\n".join(lines))
@@ -0,0 +1,225 @@
+"""
+Indicator computation off the event loop.
+
+ComputeExecutor.submit queues a batch of stacked series (see batch_indicators_calculation)
+on a process pool, or on a thread pool where the NumPy kernels release the GIL, and returns
+at once a task resolving to the batch with its indicator columns. Large batches are split
+at series boundaries into jobs of about rows_per_job rows so every worker gets a share.
+
+With processes, the float inputs (close, volume and the series codes) and the indicator
+outputs go through shared memory blocks: only their names cross the process boundary, the
+arrays are never pickled. At most max_pending_jobs jobs are in flight; submit waits for a
+slot beyond that (backpressure on the fetching side). Outputs are of the submitted dtype
+(float32 for compact tables, see precision.py); inputs stay float64 to carry the series codes.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.core.logging.loggers import logger_data_ret
+from src.models.lhrd_models.indicators_models import IndicatorCalculation
+from src.models.lhrd_models.indicator_graph import IndicatorGraph, GroupedOps
+
+
+INPUT_COLUMNS = ["close", "volume"]
+COMPUTE_MODES = ("process", "thread")
+
+
+def compute_indicator_arrays(
+    inputs: Dict[str, np.ndarray],
+    codes: np.ndarray,
+    indicators: List[str],
+    params: Dict[str, int],
+    dtype: str = "float64"
+) -> np.ndarray:
+    """Indicators (one row each) of stacked series sorted by series then open_time."""
+    df = pd.DataFrame(inputs, copy=False)
+    values = IndicatorGraph(params).evaluate(GroupedOps(df, codes, dtype), indicators)
+    return np.vstack([np.asarray(values[name], dtype=dtype) for name in indicators])
+
+
+def run_shared_job(
+    input_name: str,
+    output_name: str,
+    rows: int,
+    indicators: List[str],
+    params: Dict[str, int],
+    dtype: str = "float64"
+):
+    """Process pool job: reads its inputs from, and writes its indicators to, shared memory blocks."""
+    input_shm = shared_memory.SharedMemory(name=input_name)
+    output_shm = shared_memory.SharedMemory(name=output_name)
+    try:
+        block = np.ndarray((len(INPUT_COLUMNS) + 1, rows), dtype=np.float64, buffer=input_shm.buf)
+        output = np.ndarray((len(indicators), rows), dtype=dtype, buffer=output_shm.buf)
+        inputs = {col: block[i] for i, col in enumerate(INPUT_COLUMNS)}
+        output[:] = compute_indicator_arrays(inputs, block[-1].astype(np.int64), indicators, params, dtype)
+        del block, output, inputs # the views must go before the blocks are closed
+    finally:
+        input_shm.close()
+        output_shm.close()
+
+
+class ComputeExecutor:
+
+    def __init__(
+        self,
+        mode: str = "process",
+        max_workers: Optional[int] = None,
+        max_pending_jobs: Optional[int] = None,
+        rows_per_job: int = 100000
+    ):
+        if mode not in COMPUTE_MODES:
+            raise ValueError(f"Unknown compute mode '{mode}' (expected one of {COMPUTE_MODES}).")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending_jobs = max_pending_jobs or 2 * self.max_workers
+        self.rows_per_job = rows_per_job
+        self.pool: Optional[Executor] = None
+        self.slots: Optional[asyncio.Semaphore] = None
+        self.pending_jobs = 0
+        self.done_jobs = 0
+        self.done_rows = 0
+
+
+    def executor(self) -> Executor:
+        if self.pool is None:
+            if self.mode == "process":
+                # spawned, not forked: the parent runs threads (scheduler, database drivers)
+                self.pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="indicators")
+        return self.pool
+
+
+    def job_bounds(
+        self,
+        codes: np.ndarray
+    ) -> List[Tuple[int, int]]:
+        """Row ranges of about rows_per_job rows, cut at series boundaries (a long series stays whole)."""
+        starts = np.flatnonzero(np.diff(codes, prepend=-1))
+        bounds: List[Tuple[int, int]] = []
+        begin = 0
+        for start in starts[1:]:
+            if start - begin >= self.rows_per_job:
+                bounds.append((begin, int(start)))
+                begin = int(start)
+        if len(codes) > begin:
+            bounds.append((begin, len(codes)))
+        return bounds
+
+
+    async def submit(
+        self,
+        df: pd.DataFrame,
+        indicators: List[str],
+        params: Dict[str, int],
+        keys: Optional[List[str]] = None,
+        dtype: str = "float64"
+    ) -> "asyncio.Task[pd.DataFrame]":
+        """
+        Queue the indicator computation of a batch (waiting while max_pending_jobs jobs are in flight).
+        The returned task resolves to the batch sorted by keys (default asset_id, time_frame) then open_time, with its indicator columns.
+        """
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.max_pending_jobs)
+        df, codes = IndicatorCalculation.sort_series(df, keys)
+        inputs = {col: pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan) for col in INPUT_COLUMNS}
+        jobs = []
+        for begin, end in self.job_bounds(codes):
+            await self.slots.acquire()
+            self.pending_jobs += 1
+            jobs.append(asyncio.create_task(self.run_job(
+                {col: values[begin:end] for col, values in inputs.items()},
+                codes[begin:end] - codes[begin],
+                indicators,
+                params,
+                dtype
+            )))
+        return asyncio.create_task(self.assemble(df, jobs, indicators, dtype))
+
+
+    async def run_job(
+        self,
+        inputs: Dict[str, np.ndarray],
+        codes: np.ndarray,
+        indicators: List[str],
+        params: Dict[str, int],
+        dtype: str
+    ) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        try:
+            if self.mode == "thread":
+                return await loop.run_in_executor(self.executor(), compute_indicator_arrays, inputs, codes, indicators, params, dtype)
+            return await self.run_shared_job(loop, inputs, codes, indicators, params, dtype)
+        finally:
+            self.pending_jobs -= 1
+            self.done_jobs += 1
+            self.done_rows += len(codes)
+            self.slots.release() # type:ignore
+
+
+    async def run_shared_job(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        inputs: Dict[str, np.ndarray],
+        codes: np.ndarray,
+        indicators: List[str],
+        params: Dict[str, int],
+        dtype: str
+    ) -> np.ndarray:
+        rows = len(codes)
+        input_shm = shared_memory.SharedMemory(create=True, size=max(1, (len(INPUT_COLUMNS) + 1) * rows * 8))
+        output_shm = shared_memory.SharedMemory(create=True, size=max(1, len(indicators) * rows * np.dtype(dtype).itemsize))
+        try:
+            block = np.ndarray((len(INPUT_COLUMNS) + 1, rows), dtype=np.float64, buffer=input_shm.buf)
+            for i, col in enumerate(INPUT_COLUMNS):
+                block[i] = inputs[col]
+            block[-1] = codes
+            del block
+            await loop.run_in_executor(self.executor(), run_shared_job, input_shm.name, output_shm.name, rows, indicators, params, dtype)
+            return np.ndarray((len(indicators), rows), dtype=dtype, buffer=output_shm.buf).copy()
+        finally:
+            for shm in (input_shm, output_shm):
+                shm.close()
+                shm.unlink()
+
+
+    async def assemble(
+        self,
+        df: pd.DataFrame,
+        jobs: List["asyncio.Task[np.ndarray]"],
+        indicators: List[str],
+        dtype: str
+    ) -> pd.DataFrame:
+        try:
+            outputs = np.hstack(await asyncio.gather(*jobs)) if jobs else np.empty((len(indicators), 0), dtype=dtype)
+        except BaseException:
+            for job in jobs:
+                job.cancel()
+            raise
+        indicator_df = pd.DataFrame(outputs.T, columns=indicators, index=df.index)
+        return pd.concat([df.drop(columns=indicators, errors="ignore"), indicator_df], axis=1)
+
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "pending_jobs": self.pending_jobs,
+            "done_jobs": self.done_jobs,
+            "done_rows": self.done_rows
+        }
+
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+            logger_data_ret.debug(f"Compute executor stopped: {self.stats()}")
@@ -12,6 +12,7 @@ from src.core.logging.loggers import logger_spo
 from src.core.exceptions.exceptions import *
 
 from src.models.items_models.assets_models import BaseAsset
+from src.models.lhrd_models.indicator_registry import INDICATOR_REGISTRY
 
 
 class DisplayExecutor:
@@ -31,67 +32,7 @@ class DisplayExecutor:
                 "yaxis":"y1",
                 "curves": ["close"]
                 },
-            "bollinger": {
-                "type": 1,
-                "yaxis": "y1",
-                "curves": [
-                    "boll_low2",
-                    "boll_low1",
-                    "boll_mid",
-                    "boll_up1",
-                    "boll_up2"
-                ]
-            },
-            "msd": {
-                "type": 2,
-                "yaxis": "y3",
-                "curves": ["msd"]
-            },
-            "return": {
-                "type": 2,
-                "yaxis": "y3",
-                "curves": [
-                    "simple_return",
-                    #"log_return"
-                ]
-            },
-            "obv": {
-                "type": 2,
-                "yaxis": "y2",
-                "curves": ["obv"]
-            },
-            "vwap": {
-                "type": 1,
-                "yaxis": "y1",
-                "curves": ["vwap"]
-            },
-            "volatility": {
-                "type": 2,
-                "yaxis": "y3",
-                "curves": ["volatility"]
-            },
-            "rsi": {
-                "type": 2,
-                "yaxis": "y3",
-                "curves": [
-                    "rsi",
-                    #"stoch_rsi"
-                ]
-            },
-            "ema": {
-                "type": 1,
-                "yaxis": "y1",
-                "curves": [
-                    "ema_short",
-                    "ema_mid",
-                    "ema_long"
-                ]
-            },
-            "macd": {
-                "type": 2,
-                "yaxis": "y3",
-                "curves": ["macd"]
-            },
+            **INDICATOR_REGISTRY.display_config(), # see indicators.json
             "score": {
                 "type": 2,
                 "yaxis": "y3",
@@ -309,10 +250,10 @@ class DisplayExecutor:
             df_data : pd.DataFrame
         ):
 
-            groups: Dict[str,pd.DataFrame] = {str(asset_id): subdf for asset_id, subdf in df_data.groupby("asset_id")}
+            groups: Dict[str,pd.DataFrame] = {str(asset_id): subdf for asset_id, subdf in df_data.groupby("asset_id", observed=True)}
             for asset_id, df_asset in groups.items():
                 self.displaying_dict[asset_id] = {}
-                tf_groups: Dict[str,pd.DataFrame] = {str(tf): subdf for tf, subdf in df_asset.groupby("time_frame")}
+                tf_groups: Dict[str,pd.DataFrame] = {str(tf): subdf for tf, subdf in df_asset.groupby("time_frame", observed=True)}
                 for tf, df_tf in tf_groups.items():
                     self.displaying_dict[asset_id][tf] = df_tf.sort_values(by='open_time')
 
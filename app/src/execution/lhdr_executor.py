@@ -1,4 +1,6 @@
-from typing import List, Optional, Dict
+import asyncio
+from datetime import datetime
+from typing import List, Optional, Dict, Tuple
 import pandas as pd
 import numpy as np
 
@@ -11,6 +13,9 @@ from src.models.structural_models.config_models import KlineConfig, FullAssetCon
 from src.models.structural_models.config_models import TimeFrameContentMetaData
 from src.models.items_models.items_models import MarketInfo
 from src.models.lhrd_models.indicators_models import IndicatorCalculation
+from src.models.lhrd_models.streaming_indicators import StreamingIndicatorEngine, INDICATOR_COLUMNS
+from src.models.lhrd_models.indicator_registry import INDICATOR_REGISTRY
+from src.execution.compute_executor import ComputeExecutor
 
 from src.core.logging.loggers import logger_data_ret
 from src.core.exceptions.exceptions import *
@@ -18,9 +23,17 @@ from src.core.utils.dates.date_format import get_unix_time_s
 
 class LhdrExecutor:
 
-    def __init__(self):
+    def __init__(
+        self,
+        indicator_profile: Optional[str] = None,
+        value_dtype: str = "float64"
+    ):
         self.financial_server_time : Optional[str] = None
         self.live_assets : Dict[str,List[str]] = {}
+        self.streaming_engine : Optional[StreamingIndicatorEngine] = None # incremental indicators on ponctuals
+        self.indicator_columns : List[str] = INDICATOR_REGISTRY.columns(indicator_profile) # profile of indicators.json, all when None
+        self.compute_executor : Optional[ComputeExecutor] = None # indicators computed off the event loop when set
+        self.value_dtype : str = value_dtype # "float32" for compact tables, see precision.json
     
 
     # -- Markets & Assets checks
@@ -142,6 +155,34 @@ class LhdrExecutor:
         
 
     # -- Catchups
+    @staticmethod
+    def stored_until(klnc_sorted_by_type: Dict[str, List[KlineConfig]]) -> Dict[Tuple[str, str], datetime]:
+        """open_time of the last stored kline of each series handed with its history (see ponctual_config)."""
+        stored: Dict[Tuple[str, str], datetime] = {}
+        for klnc_list in klnc_sorted_by_type.values():
+            for klnc in klnc_list:
+                for tf, v in klnc.kline_data.items():
+                    if v.klines is not None and not v.klines.empty:
+                        stored[(klnc.asset.asset_id, tf)] = v.klines["open_time"].max()
+        return stored
+
+
+    @staticmethod
+    def after_stored(
+        df: pd.DataFrame,
+        stored_until: Dict[Tuple[str, str], datetime]
+    ) -> pd.DataFrame:
+        """Rows newer than the last stored kline of their series (every row of a series without stored history)."""
+        if df.empty or not stored_until:
+            return df
+        def naive_utc(values: pd.Series) -> pd.Series:
+            values = pd.to_datetime(values)
+            return values.dt.tz_convert("UTC").dt.tz_localize(None) if values.dt.tz is not None else values
+        keys = pd.Series(list(zip(df["asset_id"].astype(str), df["time_frame"].astype(str))), index=df.index)
+        cutoffs = naive_utc(keys.map(stored_until))
+        return df[(cutoffs.isna() | (naive_utc(df["open_time"]) > cutoffs)).to_numpy()]
+
+
     async def lhdr_klines(
         self,
         kln_config:FullKlineConfig,
@@ -149,40 +190,67 @@ class LhdrExecutor:
     ) -> pd.DataFrame :
         
         market_designed_config = kln_config.invert_key_order()
-        global_df = pd.DataFrame()
+        frames: List[pd.DataFrame] = []
+        raw_frames: List[pd.DataFrame] = [] # indicators computed at once, see batch_indicators_calculation
+        computing: List[asyncio.Task] = [] # batches handed to the compute executor, one per market
+        indic_calc = IndicatorCalculation(dtype=self.value_dtype)
+        stored_until: Dict[Tuple[str, str], datetime] = {} # ponctuals only write the klines after these
         for mrk_id in market_designed_config.root.keys():
 
             klnc_sorted_by_type: Dict[str, List[KlineConfig]] = market_designed_config.root[mrk_id]
             market_instance = MARKET_RGSTR.get(mrk_id)
             if not market_instance:
                 raise MarketNameError(mrk_id)
+            if ponctual:
+                stored_until.update(self.stored_until(klnc_sorted_by_type))
             
             async with market_instance() as mrk_inst:
                 filled_klnc = await mrk_inst.get_assets_klines(
                     sorted_assets=klnc_sorted_by_type
                     )
                 
-                indic_calc = IndicatorCalculation()
                 for _, klnc_list in filled_klnc.items():
                     for klnc in klnc_list:
                         for tf,v in klnc.kline_data.items():
                             raw_df = v.klines
-                            if raw_df is None:
-                                continue
-
-                            df = indic_calc.full_indicators_calculation(df=raw_df)
-                            if df is None:
+                            if raw_df is None or raw_df.empty:
                                 continue
-                            df["asset_id"] = klnc.asset.asset_id
-                            df["time_frame"] = tf
-                            df = df.sort_values(by="open_time")
 
-                            if ponctual:
-                                global_df = pd.concat([global_df, df.iloc[[-1]]], ignore_index=True)
+                            if ponctual and self.streaming_engine is not None:
+                                df = self.streaming_engine.process(
+                                    asset_id=klnc.asset.asset_id,
+                                    time_frame=tf,
+                                    df=raw_df
+                                )
+                                if df.empty:
+                                    continue
+                                df = df.drop(columns=[col for col in INDICATOR_COLUMNS if col not in self.indicator_columns])
+                                df["asset_id"] = klnc.asset.asset_id
+                                df["time_frame"] = tf
+                                frames.append(self.after_stored(df, stored_until))
                             else:
-                                global_df = pd.concat([global_df, df], ignore_index=True)
+                                raw_frames.append(raw_df.assign(asset_id=klnc.asset.asset_id, time_frame=tf))
+
+            if raw_frames and self.compute_executor is not None:
+                # computed by the pool while the next market is fetched
+                computing.append(await self.compute_executor.submit(
+                    df=pd.concat(raw_frames, ignore_index=True),
+                    indicators=self.indicator_columns,
+                    params=indic_calc.graph_params(),
+                    dtype=self.value_dtype
+                ))
+                raw_frames = []
+
+        batches = [await task for task in computing]
+        if raw_frames:
+            batches.append(indic_calc.batch_indicators_calculation(
+                df=pd.concat(raw_frames, ignore_index=True),
+                indicators=self.indicator_columns
+            ))
+        for df in batches:
+            frames.append(self.after_stored(df, stored_until) if ponctual else df)
+        global_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
-         
         logger_data_ret.info("Data successfully retrieved.")
         return global_df
 
@@ -1,8 +1,8 @@
-from typing import List, Optional, Dict, Type
+from typing import List, Optional, Dict, Tuple, Type
 import pandas as pd
 from datetime import datetime
 
-from src.core.utils.dates.date_format import get_all_unix_time_s
+from src.core.utils.dates.date_format import get_all_unix_time_s, interval_map
 from src.core.utils.helpers.file_manager import FileManager
 from src.core.utils.config.paths import ROOT_PATH
 from src.models.lhrd_models.standard_models import ContentDataState
@@ -223,41 +223,46 @@ class StructuralExecutor:
         self,
         df_data: pd.DataFrame,
         df_assets: pd.DataFrame,
-        tfs: List[str]
+        segments: Dict[Tuple[str, str], Tuple[datetime, datetime]]
     ) -> FullKlineConfig:
-
+        """
+        Klines to fetch on a ponctual: the (latest_time, oldest_time) segment of each
+        (asset_id, time_frame) series (see LookbackPlanner.plan), with the stored history of
+        the series from df_data when there is some (series without streaming state).
+        """
         klines_rtrv_assets_config = BASE_ASSET_RTRV_CONFIG.to(FullKlineConfig)
-        time_segments = get_all_unix_time_s(count=1)
-        groups: Dict[str,pd.DataFrame] = {str(asset_id): subdf for asset_id, subdf in df_data.groupby("asset_id")}
-        for asset_id, df_asset in groups.items():
+        history: Dict[Tuple[str, str], pd.DataFrame] = {
+            (str(asset_id), str(tf)): subdf for (asset_id, tf), subdf in df_data.groupby(["asset_id", "time_frame"], observed=True)
+        }
+        asset_segments: Dict[str, Dict[str, Tuple[datetime, datetime]]] = {}
+        for (asset_id, tf), segment in segments.items():
+            asset_segments.setdefault(asset_id, {})[tf] = segment
+
+        for asset_id, tf_segments in asset_segments.items():
             asset_row = df_assets.loc[df_assets["asset_id"] == asset_id].iloc[0]
 
             base_asset = BaseAsset(
-                asset_id=asset_id, 
-                type_id=asset_row['type_id'], 
+                asset_id=asset_id,
+                type_id=asset_row['type_id'],
                 symbol=asset_row['symbol']
-            ) 
+            )
             klnc = KlineConfig(
                 asset=base_asset,
                 kline_data={}
             )
-            tf_groups: Dict[str,pd.DataFrame] = {str(tf): subdf for tf, subdf in df_asset.groupby("time_frame")}
-            for tf, df_tf in tf_groups.items():
-                dflt_segment = time_segments.get(tf)
-                if dflt_segment is None:
+            for tf, (latest_time, oldest_time) in tf_segments.items():
+                if tf not in interval_map:
                     raise StructureError(f"Unknown time frame {tf}.")
-                if tf in tfs:
-                    dflt_latest_time, dflt_oldest_time = dflt_segment
-                    tfc_mtdt = TimeFrameContentMetaData(
-                        oldest_time=dflt_oldest_time,
-                        latest_time=dflt_latest_time,
-                        time_frame=tf
+                tfc_mtdt = TimeFrameContentMetaData(
+                    oldest_time=oldest_time,
+                    latest_time=latest_time,
+                    time_frame=tf
+                )
+                klnc.kline_data[tf] = KlineData(
+                        tfc_metadata = tfc_mtdt,
+                        klines = history.get((asset_id, tf))
                     )
-                    klnc.kline_data[tf] = KlineData(
-                            tfc_metadata = tfc_mtdt,
-                            klines = df_tf
-                        )
-            
+
             klines_rtrv_assets_config.add_item(
                 asset_type_id=asset_row['type_id'],
                 market_id=asset_row['main_market_id'],
@@ -0,0 +1,275 @@
+"""
+Declarative graph of the IndicatorCalculation indicators and of their shared intermediates.
+
+Each node (numeric close, delta, gains, EMAs, rolling std...) declares its inputs and is
+computed at most once per evaluation, then reused by every downstream node: the RSI gains
+feed both rsi and stoch_rsi, ema_short / ema_mid feed macd, returns feed volatility...
+Only the nodes needed by the requested indicators are evaluated (IndicatorGraph.plan).
+
+Node functions only use the window operations of an ops object, so the same graph runs on
+one series (SeriesOps) or on many series stacked in one frame (GroupedOps).
+
+ops.dtype is the float type of the inputs and of the computed columns: float64, or float32 in
+compact mode (see precision.py), where EMAs and cumulative sums still run in float64.
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.models.lhrd_models.rolling_kernels import PANDAS_ROLLING_MIN_ROWS, PANDAS_ROLLING_STATS, ROLLING_KERNELS, rolling_series
+
+
+INDICATOR_COLUMNS = [
+    "rsi", "stoch_rsi", "macd", "ema_short", "ema_mid", "ema_long",
+    "msd", "boll_mid", "boll_low1", "boll_low2", "boll_up1", "boll_up2",
+    "simple_return", "log_return", "obv", "vwap", "volatility"
+]
+
+
+class SeriesOps:
+    """Window operations on a single series."""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        dtype: str = "float64"
+    ):
+        self.df = df
+        self.dtype = np.dtype(dtype)
+
+
+    def first_rows(self) -> np.ndarray:
+        is_first = np.zeros(len(self.df), dtype=bool)
+        is_first[:1] = True
+        return is_first
+
+
+    def previous(self, series: pd.Series) -> pd.Series:
+        return series.shift(1)
+
+
+    def rolling(self, series: pd.Series, window: int, how: str) -> pd.Series:
+        return rolling_series(series, window, how, self.dtype)
+
+
+    def ema(self, series: pd.Series, span: int) -> pd.Series:
+        return series.ewm(span=span, adjust=False).mean().astype(self.dtype, copy=False)
+
+
+    def cumsum(self, series: pd.Series) -> pd.Series:
+        return series.astype(np.float64, copy=False).cumsum()
+
+
+    def running_total(self, values: np.ndarray) -> np.ndarray:
+        """Cumulative sum where a NaN propagates to the end of the series."""
+        return np.cumsum(values, dtype=np.float64)
+
+
+class GroupedOps:
+    """Window operations restarting at each series of a frame sorted by series then open_time."""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        codes: np.ndarray,
+        dtype: str = "float64"
+    ):
+        self.df = df
+        self.codes = codes
+        self.dtype = np.dtype(dtype)
+        self.is_first = np.ones(len(codes), dtype=bool)
+        self.is_first[1:] = codes[1:] != codes[:-1]
+        starts = np.flatnonzero(self.is_first)
+        lengths = np.diff(np.append(starts, len(codes)))
+        self.rank = np.arange(len(codes)) - np.repeat(starts, lengths) # position in its series
+        self.is_long = np.repeat(lengths >= PANDAS_ROLLING_MIN_ROWS, lengths) # rolled by pandas, as SeriesOps does
+        self.long_bounds = [(int(start), int(start + length)) for start, length in zip(starts, lengths) if length >= PANDAS_ROLLING_MIN_ROWS]
+
+
+    def by_series(self, series: pd.Series) -> Any:
+        return series.groupby(self.codes, sort=False)
+
+
+    def first_rows(self) -> np.ndarray:
+        return self.is_first
+
+
+    def previous(self, series: pd.Series) -> pd.Series:
+        return series.shift(1).mask(self.is_first)
+
+
+    def rolling(self, series: pd.Series, window: int, how: str) -> pd.Series:
+        """
+        Kernel run over the whole frame: windows are the same as per series, except those crossing a boundary (masked).
+        Series of PANDAS_ROLLING_MIN_ROWS rows or more are rolled one by one by rolling_series, as in SeriesOps.
+        """
+        values = series.to_numpy(dtype=self.dtype, na_value=np.nan)
+        if how not in PANDAS_ROLLING_STATS or not self.long_bounds:
+            values = ROLLING_KERNELS[how](values, window)
+            return pd.Series(np.where(self.rank < window - 1, np.nan, values), index=series.index)
+
+        out = np.empty_like(values)
+        for begin, end in self.long_bounds:
+            out[begin:end] = rolling_series(series.iloc[begin:end], window, how, self.dtype).to_numpy()
+        is_short = ~self.is_long
+        if is_short.any():
+            rolled = ROLLING_KERNELS[how](values[is_short], window)
+            out[is_short] = np.where(self.rank[is_short] < window - 1, np.nan, rolled)
+        return pd.Series(out, index=series.index)
+
+
+    def ema(self, series: pd.Series, span: int) -> pd.Series:
+        return self.by_series(series).ewm(span=span, adjust=False).mean().reset_index(level=0, drop=True).astype(self.dtype, copy=False)
+
+
+    def cumsum(self, series: pd.Series) -> pd.Series:
+        return self.by_series(series.astype(np.float64, copy=False)).cumsum()
+
+
+    def running_total(self, values: np.ndarray) -> np.ndarray:
+        """Cumulative sum restarting at each series' first row; a NaN propagates to the end of its series only."""
+        values = np.asarray(values, dtype=np.float64)
+        totals = np.cumsum(np.nan_to_num(values))
+        starts = np.flatnonzero(self.is_first)
+        lengths = np.diff(np.append(starts, len(values)))
+        offsets = np.repeat(totals[starts] - np.nan_to_num(values[starts]), lengths)
+        nan_seen = np.maximum.accumulate(np.where(np.isnan(values), np.arange(len(values)), -1))
+        return np.where(nan_seen >= np.repeat(starts, lengths), np.nan, totals - offsets)
+
+
+@dataclass
+class Node:
+    name: str
+    inputs: Tuple[str, ...]
+    compute: Callable[..., Any] # (ops, params, *inputs) -> values
+
+
+def numeric(column: str) -> Callable[..., pd.Series]:
+    return lambda ops, params: pd.to_numeric(ops.df[column], errors='coerce').astype(ops.dtype)
+
+
+def rsi_scale(ops, params, avg_gain, avg_loss) -> pd.Series:
+    """RSI on the 0-100 scale, 0 during warm-up or when the window has no loss, NaN on the first kline."""
+    rs = (avg_gain / avg_loss).replace([np.inf, -np.inf], np.nan).fillna(0)
+    return (100 - (100 / (1 + rs))).mask(ops.first_rows())
+
+
+def signed_volume(ops, params, delta, volume) -> np.ndarray:
+    """Volume signed by the close move (unchanged or undefined move: 0)."""
+    direction = np.sign(delta.to_numpy())
+    return np.where(np.nan_to_num(direction) != 0, direction * volume.to_numpy(), 0.0)
+
+
+NODES = [
+    # inputs and shared intermediates
+    Node("close", (), numeric("close")),
+    Node("volume", (), numeric("volume")),
+    Node("previous_close", ("close",), lambda ops, p, close: ops.previous(close)),
+    Node("delta", ("close", "previous_close"), lambda ops, p, close, previous: close - previous),
+    Node("gains", ("delta",), lambda ops, p, delta: delta.where((delta > 0) | ops.first_rows(), 0)), # first rows stay NaN: out of every RSI window
+    Node("losses", ("delta",), lambda ops, p, delta: (-delta).where((delta < 0) | ops.first_rows(), 0)),
+    Node("avg_gain", ("gains",), lambda ops, p, gains: ops.rolling(gains, p["rsi_window"], "mean")),
+    Node("avg_loss", ("losses",), lambda ops, p, losses: ops.rolling(losses, p["rsi_window"], "mean")),
+    Node("rsi_scale", ("avg_gain", "avg_loss"), rsi_scale),
+    Node("rsi_low", ("rsi_scale",), lambda ops, p, rsi: ops.rolling(rsi, p["stoch_window"], "min")),
+    Node("rsi_high", ("rsi_scale",), lambda ops, p, rsi: ops.rolling(rsi, p["stoch_window"], "max")),
+    Node("macd_line", ("ema_short", "ema_mid"), lambda ops, p, short, mid: short - mid),
+    Node("ema_signal", ("macd_line",), lambda ops, p, line: ops.ema(line, p["ema_signal"])),
+    Node("sma", ("close",), lambda ops, p, close: ops.rolling(close, p["sma"], "mean")),
+    Node("returns", ("close", "previous_close"), lambda ops, p, close, previous: close / previous - 1),
+    Node("signed_volume", ("delta", "volume"), signed_volume),
+    Node("cum_pv", ("close", "volume"), lambda ops, p, close, volume: ops.cumsum(close * volume)),
+    Node("cum_volume", ("volume",), lambda ops, p, volume: ops.cumsum(volume)),
+
+    # indicators (INDICATOR_COLUMNS)
+    Node("rsi", ("rsi_scale",), lambda ops, p, rsi: rsi / 100),
+    Node("stoch_rsi", ("rsi_scale", "rsi_low", "rsi_high"), lambda ops, p, rsi, low, high: (rsi - low) / (high - low)),
+    Node("macd", ("macd_line", "ema_signal"), lambda ops, p, line, signal: line - signal),
+    Node("ema_short", ("close",), lambda ops, p, close: ops.ema(close, p["ema_short"])),
+    Node("ema_mid", ("close",), lambda ops, p, close: ops.ema(close, p["ema_mid"])),
+    Node("ema_long", ("close",), lambda ops, p, close: ops.ema(close, p["ema_long"])),
+    Node("msd", ("close",), lambda ops, p, close: ops.rolling(close, p["msd"], "std")),
+    Node("boll_mid", ("sma",), lambda ops, p, sma: sma),
+    Node("boll_low1", ("sma", "msd"), lambda ops, p, sma, msd: sma - msd),
+    Node("boll_low2", ("sma", "msd"), lambda ops, p, sma, msd: sma - 2*msd),
+    Node("boll_up1", ("sma", "msd"), lambda ops, p, sma, msd: sma + msd),
+    Node("boll_up2", ("sma", "msd"), lambda ops, p, sma, msd: sma + 2*msd),
+    Node("simple_return", ("returns",), lambda ops, p, returns: returns),
+    Node("log_return", ("close", "previous_close"), lambda ops, p, close, previous: np.log(close / previous)),
+    Node("obv", ("signed_volume",), lambda ops, p, signed: ops.running_total(signed)),
+    Node("vwap", ("cum_pv", "cum_volume"), lambda ops, p, pv, volume: pv / volume),
+    Node("volatility", ("returns",), lambda ops, p, returns: ops.rolling(returns, p["volatility"], "std") * np.sqrt(365)),
+]
+
+
+class IndicatorGraph:
+
+    def __init__(
+        self,
+        params: Dict[str, int],
+        nodes: Optional[List[Node]] = None
+    ):
+        """params: the windows / spans read by the nodes (see IndicatorCalculation.graph_params)."""
+        self.params = params
+        self.nodes: Dict[str, Node] = {node.name: node for node in (nodes or NODES)}
+        self.plans: Dict[Tuple[str, ...], List[Node]] = {}
+
+
+    def plan(
+        self,
+        indicators: Optional[List[str]] = None
+    ) -> List[Node]:
+        """Nodes needed by the indicators (default INDICATOR_COLUMNS), each once, inputs first."""
+        targets = tuple(indicators or INDICATOR_COLUMNS)
+        if targets in self.plans:
+            return self.plans[targets]
+        unknown = [name for name in targets if name not in self.nodes]
+        if unknown:
+            raise ValueError(f"Unknown indicator(s) {unknown}, available: {list(self.nodes)}")
+
+        ordered: List[Node] = []
+        visiting, done = set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Indicator graph cycle through '{name}'")
+            visiting.add(name)
+            for input_name in self.nodes[name].inputs:
+                visit(input_name)
+            visiting.discard(name)
+            done.add(name)
+            ordered.append(self.nodes[name])
+
+        for name in targets:
+            visit(name)
+        self.plans[targets] = ordered
+        return ordered
+
+
+    def evaluate(
+        self,
+        ops: SeriesOps | GroupedOps,
+        indicators: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Values of every planned node, the requested indicators included."""
+        values: Dict[str, Any] = {}
+        for node in self.plan(indicators):
+            values[node.name] = node.compute(ops, self.params, *[values[name] for name in node.inputs])
+        return values
+
+
+    def compute(
+        self,
+        ops: SeriesOps | GroupedOps,
+        indicators: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """ops.df with the requested indicator columns set (in the requested order), of dtype ops.dtype."""
+        values = self.evaluate(ops, indicators)
+        df = ops.df
+        for name in indicators or INDICATOR_COLUMNS:
+            df[name] = values[name].astype(ops.dtype, copy=False)
+        return df
@@ -0,0 +1,140 @@
+"""
+Registry of the indicators, loaded from src/core/data/indicators.json.
+
+Each indicator declares its parameters (windows / spans of the indicator graph), its warm-up
+length (klines before its values are meaningful, null for cumulative ones like OBV), its
+output columns (nodes of indicator_graph.py, the kernels computing them) and optionally its
+display group. The indicator table columns, the IndicatorCalculation parameters, the columns
+computed per profile and the DisplayExecutor curves are all derived from it.
+
+Profiles name the indicators computed for a use (e.g. a lean "production" set for LiveData,
+a wide "training" set for TrainingData); tables maps each data table to its profile.
+"""
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from src.core.utils.config.paths import ROOT_PATH
+from src.core.utils.helpers.file_manager import FileManager
+from src.models.lhrd_models.indicator_graph import NODES
+
+
+INDICATOR_CONFIG_PATH = os.path.join(ROOT_PATH, "src", "core", "data", "indicators.json")
+
+
+@dataclass
+class IndicatorSpec:
+    name: str
+    params: Dict[str, int]
+    warmup: Optional[int]
+    outputs: List[str]
+    display: Optional[Dict[str, Any]] = None
+
+
+class IndicatorRegistry:
+
+    def __init__(
+        self,
+        specs: List[IndicatorSpec],
+        profiles: Optional[Dict[str, List[str]]] = None,
+        tables: Optional[Dict[str, str]] = None
+    ):
+        self.specs: Dict[str, IndicatorSpec] = {spec.name: spec for spec in specs}
+        self.profiles = profiles or {}
+        self.tables = tables or {}
+        self.validate()
+
+
+    @classmethod
+    def from_config(
+        cls,
+        path: str = INDICATOR_CONFIG_PATH
+    ) -> "IndicatorRegistry":
+        config: Dict[str, Any] = FileManager().load_json_file(path)
+        specs = [
+            IndicatorSpec(
+                name=name,
+                params=spec.get("params", {}),
+                warmup=spec.get("warmup"),
+                outputs=spec["outputs"],
+                display=spec.get("display")
+            )
+            for name, spec in config["indicators"].items()
+        ]
+        return cls(specs=specs, profiles=config.get("profiles"), tables=config.get("tables"))
+
+
+    def validate(self):
+        node_names = {node.name for node in NODES}
+        seen: Dict[str, str] = {}
+        for spec in self.specs.values():
+            for column in spec.outputs:
+                if column not in node_names:
+                    raise ValueError(f"Indicator '{spec.name}': output '{column}' is not an indicator graph node.")
+                if column in seen:
+                    raise ValueError(f"Indicator '{spec.name}': output '{column}' already declared by '{seen[column]}'.")
+                seen[column] = spec.name
+            if spec.display is not None and not set(spec.display.get("curves", [])) <= set(spec.outputs):
+                raise ValueError(f"Indicator '{spec.name}': displayed curves must be among its outputs.")
+        for profile, names in self.profiles.items():
+            unknown = [name for name in names if name not in self.specs]
+            if unknown:
+                raise ValueError(f"Profile '{profile}': unknown indicator(s) {unknown}.")
+        for table_name, profile in self.tables.items():
+            if profile not in self.profiles:
+                raise ValueError(f"Table '{table_name}': unknown indicator profile '{profile}'.")
+        self.params() # raises on conflicting parameters
+
+
+    def selected(
+        self,
+        profile: Optional[str] = None
+    ) -> List[IndicatorSpec]:
+        """Indicators of a profile (all of them when None), in registry order."""
+        if profile is None:
+            return list(self.specs.values())
+        if profile not in self.profiles:
+            raise ValueError(f"Unknown indicator profile '{profile}', available: {list(self.profiles)}")
+        names = set(self.profiles[profile])
+        return [spec for spec in self.specs.values() if spec.name in names]
+
+
+    def columns(
+        self,
+        profile: Optional[str] = None
+    ) -> List[str]:
+        """Output columns of a profile (all of them when None: the indicator table schema)."""
+        return [column for spec in self.selected(profile) for column in spec.outputs]
+
+
+    def params(self) -> Dict[str, int]:
+        """Parameters of every indicator, merged (a parameter shared by two indicators must agree)."""
+        params: Dict[str, int] = {}
+        for spec in self.specs.values():
+            for key, value in spec.params.items():
+                if params.setdefault(key, value) != value:
+                    raise ValueError(f"Indicator '{spec.name}': parameter '{key}'={value} conflicts with {params[key]}.")
+        return params
+
+
+    def warmup(
+        self,
+        profile: Optional[str] = None
+    ) -> Dict[str, Optional[int]]:
+        """Warm-up length of each indicator of a profile (None: cumulative, depends on the whole history)."""
+        return {spec.name: spec.warmup for spec in self.selected(profile)}
+
+
+    def profile_for_table(
+        self,
+        table_name: str
+    ) -> Optional[str]:
+        return self.tables.get(table_name)
+
+
+    def display_config(self) -> Dict[str, Dict[str, Any]]:
+        """DisplayExecutor groups ({group: {type, yaxis, curves}}) of the displayed indicators."""
+        return {spec.name: dict(spec.display) for spec in self.specs.values() if spec.display is not None}
+
+
+INDICATOR_REGISTRY = IndicatorRegistry.from_config()
@@ -3,12 +3,15 @@
 """
 import numpy as np
 import pandas as pd
-from typing import List, Optional
+from typing import Dict, List, Optional
 from dataclasses import dataclass
 from decimal import Decimal
 from datetime import datetime
 
 from src.core.logging.loggers import logger_data_ret
+from src.models.lhrd_models.indicator_graph import IndicatorGraph, SeriesOps, GroupedOps
+from src.models.lhrd_models.indicator_registry import IndicatorRegistry, INDICATOR_REGISTRY
+from src.models.lhrd_models.rolling_kernels import rolling_series
 
 
 @dataclass
@@ -45,14 +48,22 @@ class LhdrIndicator:
 
 class IndicatorCalculation:
 
-    def __init__(self):
-        self.sma_standard_window: int = 20
-        self.msd_standard_window: int = 20
-        self.volatility_window: int = 20
-        self.ema_signal_standard_window: int = 9
-        self.ema_short_standard_window: int = 12
-        self.ema_mid_standard_window: int = 26
-        self.ema_long_standard_window: int = 48
+    def __init__(
+        self,
+        registry: IndicatorRegistry = INDICATOR_REGISTRY,
+        dtype: str = "float64"
+    ):
+        params = registry.params()
+        self.dtype = dtype # "float32" for the compact tables (see precision.py), graph computations only
+        self.sma_standard_window: int = params.get("sma", 20)
+        self.msd_standard_window: int = params.get("msd", 20)
+        self.volatility_window: int = params.get("volatility", 20)
+        self.ema_signal_standard_window: int = params.get("ema_signal", 9)
+        self.ema_short_standard_window: int = params.get("ema_short", 12)
+        self.ema_mid_standard_window: int = params.get("ema_mid", 26)
+        self.ema_long_standard_window: int = params.get("ema_long", 48)
+        self.rsi_window: int = params.get("rsi_window", 14)
+        self.stoch_window: int = params.get("stoch_window", 14)
 
     def make_data_frame(
         self, 
@@ -72,32 +83,57 @@ class IndicatorCalculation:
                 df[col] = pd.to_numeric(df[col], errors='coerce')
             return df
 
+    def graph_params(self) -> Dict[str, int]:
+        return {
+            "sma": self.sma_standard_window,
+            "msd": self.msd_standard_window,
+            "volatility": self.volatility_window,
+            "ema_signal": self.ema_signal_standard_window,
+            "ema_short": self.ema_short_standard_window,
+            "ema_mid": self.ema_mid_standard_window,
+            "ema_long": self.ema_long_standard_window,
+            "rsi_window": self.rsi_window,
+            "stoch_window": self.stoch_window
+        }
+
     def full_indicators_calculation(
         self, 
-        df: pd.DataFrame
+        df: pd.DataFrame,
+        indicators: Optional[List[str]] = None
     ) -> Optional[pd.DataFrame]:
+        """Indicator columns (default all of INDICATOR_COLUMNS) of one series, shared intermediates computed once."""
+        return IndicatorGraph(self.graph_params()).compute(SeriesOps(df, self.dtype), indicators)
         
-        msd_series = self.msd(prices=df)
-        sma_series = self.sma(prices=df)
-        df["rsi"] = self.rsi(prices=df)
-        df["stoch_rsi"] = self.stoch_rsi(prices=df)
-        df["macd"] = self.macd(prices=df)
-        df["ema_short"] = self.ema(prices=df, span="short")
-        df["ema_mid"] = self.ema(prices=df, span="mid")
-        df["ema_long"] = self.ema(prices=df, span="long")
-        df["msd"] = msd_series
-        df["boll_mid"] = sma_series
-        df["boll_low1"] = sma_series - msd_series
-        df["boll_low2"] = sma_series - 2*msd_series
-        df["boll_up1"] = sma_series + msd_series
-        df["boll_up2"] = sma_series + 2*msd_series
-        df["simple_return"] = self.simple_return(prices=df)
-        df["log_return"] = self.log_return(prices=df)
-        df["obv"] = self.obv(prices=df)
-        df["vwap"] = self.vwap(prices=df)
-        df["volatility"] = self.volatility(prices=df)
-        return df
-        
+    def batch_indicators_calculation(
+        self,
+        df: pd.DataFrame,
+        keys: Optional[List[str]] = None,
+        indicators: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        full_indicators_calculation of many series stacked in one long frame, in a single pass.
+
+        Rows are sorted by keys then open_time. Element-wise steps (diff, returns...) run on the
+        whole frame and are masked at each series' first row; rolling windows, EWMs and cumulative
+        sums run as grouped kernels, so no window crosses two series.
+        """
+        df, codes = self.sort_series(df, keys)
+        return IndicatorGraph(self.graph_params()).compute(GroupedOps(df, codes, self.dtype), indicators)
+
+    @staticmethod
+    def sort_series(
+        df: pd.DataFrame,
+        keys: Optional[List[str]] = None
+    ) -> tuple[pd.DataFrame, np.ndarray]:
+        """Rows sorted by keys (default asset_id, time_frame) then open_time, with the series code of each row (0, 1... in row order)."""
+        keys = keys or ["asset_id", "time_frame"]
+        df = df.sort_values(by=keys + ["open_time"], ignore_index=True)
+        return df, df.groupby(keys, sort=False, observed=True).ngroup().to_numpy()
+
+    @staticmethod
+    def close_series(prices: pd.DataFrame) -> pd.Series:
+        return pd.to_numeric(prices['close'], errors='coerce')
+
     def sma(
         self, 
         prices: pd.DataFrame|pd.Series, 
@@ -105,7 +141,7 @@ class IndicatorCalculation:
     ) -> pd.Series:
         if not window:
             window = self.sma_standard_window
-        return prices['close'].rolling(window=window).mean()
+        return rolling_series(self.close_series(prices), window, "mean")
     
     def ema(
         self, 
@@ -136,7 +172,7 @@ class IndicatorCalculation:
     ) -> pd.Series:
         if not window:
             window = self.msd_standard_window
-        return prices['close'].rolling(window=window).std()
+        return rolling_series(self.close_series(prices), window, "std")
 
     def simple_return(self, prices: pd.DataFrame) -> pd.Series:
         return prices['close'].pct_change()
@@ -159,34 +195,30 @@ class IndicatorCalculation:
         return macd_line - signal_line
 
     def obv(self, prices: pd.DataFrame) -> pd.Series:
-        close = pd.to_numeric(prices['close'], errors='coerce').astype(float)
-        volume = pd.to_numeric(prices['volume'], errors='coerce').astype(float)
-        price_change = close.diff()
-        obv = pd.Series(index=close.index, dtype='float64')
-        obv.iloc[0] = 0
-        for i in range(1, len(close)):
-            if price_change.iloc[i] > 0:
-                obv.iloc[i] = obv.iloc[i - 1] + volume.iloc[i]
-            elif price_change.iloc[i] < 0:
-                obv.iloc[i] = obv.iloc[i - 1] - volume.iloc[i]
-            else:
-                obv.iloc[i] = obv.iloc[i - 1]
-        return obv
+        """Cumulated volume signed by the close move (unchanged or undefined move: volume not counted)."""
+        close = pd.to_numeric(prices['close'], errors='coerce').astype(float).to_numpy()
+        volume = pd.to_numeric(prices['volume'], errors='coerce').astype(float).to_numpy()
+        direction = np.sign(np.diff(close, prepend=np.nan))
+        signed_volume = np.where(np.nan_to_num(direction) != 0, direction * volume, 0.0)
+        return pd.Series(np.cumsum(signed_volume), index=prices.index, dtype='float64')
+
+    def graph_indicator(
+        self,
+        prices: pd.DataFrame,
+        name: str,
+        **params: int
+    ) -> pd.Series:
+        """One indicator computed by the IndicatorGraph nodes (windows of graph_params, overridden by params)."""
+        graph = IndicatorGraph({**self.graph_params(), **params})
+        return graph.evaluate(SeriesOps(prices, self.dtype), [name])[name]
 
     def rsi(
         self, 
         prices: pd.DataFrame, 
         window: int = 14
     ) -> pd.Series:
-        delta = pd.to_numeric(prices['close'], errors='coerce').astype(float).diff().dropna()
-        gains = delta.where(delta > 0, 0)
-        losses = -delta.where(delta < 0, 0)
-        avg_gain = gains.rolling(window=window).mean()
-        avg_loss = losses.rolling(window=window).mean()
-        rs = avg_gain / avg_loss
-        rs = rs.replace([float('inf'), -float('inf')], float('nan')).fillna(0)
-        rsi = (100 - (100 / (1 + rs)))/100
-        return rsi
+        """RSI on the 0-1 scale, aligned on prices (NaN on the first kline, 0 during warm-up)."""
+        return self.graph_indicator(prices, "rsi", rsi_window=window)
 
     def stoch_rsi(
         self, 
@@ -194,16 +226,8 @@ class IndicatorCalculation:
         rsi_window: int = 14, 
         stoch_window: int = 14
     ) -> pd.Series:
-        delta = pd.to_numeric(prices['close'], errors='coerce').astype(float).diff().dropna()
-        gains = delta.where(delta > 0, 0)
-        losses = -delta.where(delta < 0, 0)
-        avg_gain = gains.rolling(window=rsi_window).mean()
-        avg_loss = losses.rolling(window=rsi_window).mean()
-        rs = avg_gain / avg_loss
-        rs = rs.replace([float('inf'), -float('inf')], float('nan')).fillna(0)
-        rsi_series = 100 - (100 / (1 + rs))
-        stoch_rsi = (rsi_series - rsi_series.rolling(window=stoch_window).min()) / (rsi_series.rolling(window=stoch_window).max() - rsi_series.rolling(window=stoch_window).min())
-        return stoch_rsi
+        """Stochastic RSI aligned on prices, the RSI deltas and windows shared with rsi (see graph_indicator)."""
+        return self.graph_indicator(prices, "stoch_rsi", rsi_window=rsi_window, stoch_window=stoch_window)
 
     def vwap(self, prices: pd.DataFrame) -> pd.Series:
         pv = (prices['close'] * prices['volume']).cumsum()
@@ -212,7 +236,7 @@ class IndicatorCalculation:
 
     def volatility(self, prices: pd.DataFrame) -> pd.Series:
         returns = prices['close'].pct_change()
-        daily_vol = returns.rolling(self.volatility_window).std()
+        daily_vol = rolling_series(returns, self.volatility_window, "std")
         annualized_vol = daily_vol * np.sqrt(365)
         return annualized_vol
     
@@ -231,11 +255,11 @@ class IndicatorCalculation:
         tr1 = high - low
         tr2 = abs(high - close.shift(1))
         tr3 = abs(low - close.shift(1))
-        tr = pd.DataFrame({'tr1': tr1, 'tr2': tr2, 'tr3': tr3}).max(axis=1)
+        tr = np.fmax(tr1, np.fmax(tr2, tr3)) # NaN-skipping row max
 
         atr = tr.ewm(alpha=1/n, adjust=False).mean()
-        plus_dm_smooth = pd.Series(plus_dm).ewm(alpha=1/n, adjust=False).mean()
-        minus_dm_smooth = pd.Series(minus_dm).ewm(alpha=1/n, adjust=False).mean()
+        plus_dm_smooth = pd.Series(plus_dm, index=df.index).ewm(alpha=1/n, adjust=False).mean()
+        minus_dm_smooth = pd.Series(minus_dm, index=df.index).ewm(alpha=1/n, adjust=False).mean()
 
         plus_di = 100 * (plus_dm_smooth / atr)
         minus_di = 100 * (minus_dm_smooth / atr)
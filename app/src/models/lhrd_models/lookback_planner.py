@@ -0,0 +1,93 @@
+"""
+Lookback of the ponctual indicator runs, derived from the warm-up lengths of indicators.json.
+
+The indicators of a kline only depend on its 'warmup' previous klines (longest EMA span, RSI
+then stochastic windows, rolling windows...). A ponctual run therefore reads at most warmup()
+rows per series from LiveData, and only for the series the streaming engine holds no state
+for, then fetches the candles newer than the last known one of each series: memory and CPU
+per run do not depend on how much history LiveData holds.
+
+Cumulative indicators (obv, vwap: null warm-up) depend on the whole history and are left out
+of the lookback; they are only exact on series carried by a streaming state.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.core.utils.dates.date_format import get_unix_time_s, interval_map
+from src.models.lhrd_models.indicator_registry import IndicatorRegistry, INDICATOR_REGISTRY
+
+
+SeriesKey = Tuple[str, str] # (asset_id, time_frame)
+
+
+def to_utc(time: datetime) -> datetime:
+    """Timezone-aware UTC datetime (naive ones, as read from the data tables, meaning UTC)."""
+    stamp = pd.Timestamp(time)
+    stamp = stamp.tz_localize("UTC") if stamp.tzinfo is None else stamp.tz_convert("UTC")
+    return stamp.to_pydatetime()
+
+
+class LookbackPlanner:
+
+    def __init__(
+        self,
+        registry: IndicatorRegistry = INDICATOR_REGISTRY,
+        profile: Optional[str] = None
+    ):
+        self.registry = registry
+        self.profile = profile
+
+
+    def warmup(self) -> int:
+        """Klines needed per series before its last indicators are exact: the longest finite warm-up of the profile."""
+        warmups = [warmup for warmup in self.registry.warmup(self.profile).values() if warmup is not None]
+        return max(warmups, default=1)
+
+
+    def lookback(
+        self,
+        time_frame: str
+    ) -> timedelta:
+        """Time span of the warm-up klines of a time frame."""
+        if time_frame not in interval_map:
+            raise ValueError(f"Invalid time_frame: {time_frame}")
+        return self.warmup() * interval_map[time_frame]
+
+
+    def fetch_segment(
+        self,
+        time_frame: str,
+        last_open_time: Optional[datetime],
+        now: Optional[datetime] = None
+    ) -> Optional[Tuple[datetime, datetime]]:
+        """
+        (latest_time, oldest_time) of the candles to fetch for a series: those after its last
+        known kline, at most warmup() of them (a longer gap is left to the catch-up).
+        None when the series is up to date.
+        """
+        latest_time, oldest_time = get_unix_time_s(count=self.warmup(), time_frame=time_frame, latest_time=now)
+        if last_open_time is not None:
+            oldest_time = max(oldest_time, to_utc(last_open_time) + interval_map[time_frame])
+        if oldest_time > latest_time:
+            return None
+        return latest_time, oldest_time
+
+
+    def plan(
+        self,
+        last_open_times: Dict[SeriesKey, datetime],
+        time_frames: List[str],
+        now: Optional[datetime] = None
+    ) -> Dict[SeriesKey, Tuple[datetime, datetime]]:
+        """Fetch segment of every known series of the time frames that has new candles."""
+        now = now or datetime.now(timezone.utc).replace(microsecond=0)
+        segments: Dict[SeriesKey, Tuple[datetime, datetime]] = {}
+        for (asset_id, time_frame), last_open_time in last_open_times.items():
+            if time_frame not in time_frames:
+                continue
+            segment = self.fetch_segment(time_frame, last_open_time, now)
+            if segment is not None:
+                segments[(asset_id, time_frame)] = segment
+        return segments
@@ -0,0 +1,233 @@
+"""
+Rolling mean / std / min / max on raw float arrays, without pandas rolling objects.
+
+Windows run along the last axis, so values can be one series (1-D) or a batch of equal length
+series (2-D, one per row). Semantics are those of pandas .rolling(window) with the default
+min_periods: the first window - 1 values are NaN, and so is every window holding a NaN.
+
+Every kernel is O(n) whatever the window: values are cut in blocks of 'window' values and
+scanned within each block, forward and backward, a window being the end of one block plus
+the start of the next (van Herk / Gil-Werman).
+- min and max: running extremes, the vectorized form of the monotonic deque;
+- mean and std: running sums of the deviations to a value of the block (a cumulative sum
+  that never spans more than one window), merged around the window mean; a constant window
+  gives its exact mean and a std of exactly 0, like pandas.
+
+float32 inputs are computed, and returned, in float32 (compact mode, see precision.py): the
+block sums never span more than one window, so their error stays within window x 2^-24 of
+the deviations; anything else is computed in float64.
+
+Contract against pandas .rolling: same NaN positions; min and max bit-identical; mean and std
+NOT bit-identical, within a relative tolerance (checked by bench_rolling_kernels.py):
+- mean: 1e-12 (pandas sums online with compensation, the kernels per block);
+- std: 1e-5 of max(std, 1e-6 x the values' scale). The kernels are two-pass, pandas' Welford
+  add/remove drifts on windows of large, nearly equal values (~1e-12 on typical klines, up to
+  ~2e-6 on 2-value windows).
+The block scans also win on short series only: from PANDAS_ROLLING_MIN_ROWS values, pandas'
+one-pass C loop is faster for mean and std, so rolling_series (and GroupedOps for its long
+series) hands those to pandas .rolling, bit-identical to pandas there.
+"""
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+
+PANDAS_ROLLING_MIN_ROWS = 2000 # mean / std crossover on one core (bench_rolling_kernels.py)
+PANDAS_ROLLING_STATS = ("mean", "std")
+
+
+def as_float_array(values) -> np.ndarray:
+    values = np.asarray(values)
+    return values if values.dtype == np.float32 else values.astype(np.float64, copy=False)
+
+
+def window_has_nan(
+    is_nan: np.ndarray,
+    window: int
+) -> np.ndarray:
+    """For each complete window (ending at index window - 1 onwards), whether it holds a NaN."""
+    nan_count = np.zeros(is_nan.shape[:-1] + (is_nan.shape[-1] + 1,), dtype=np.int64)
+    np.cumsum(is_nan, axis=-1, out=nan_count[..., 1:])
+    return nan_count[..., window:] > nan_count[..., :-window]
+
+
+def place(
+    is_nan: np.ndarray | None,
+    window: int,
+    complete: np.ndarray
+) -> np.ndarray:
+    """Values of the complete windows in a full length array, NaN during warm-up and on windows with a NaN."""
+    out = np.empty(complete.shape[:-1] + (complete.shape[-1] + window - 1,), dtype=complete.dtype)
+    out[..., :window - 1] = np.nan
+    out[..., window - 1:] = complete
+    if is_nan is not None:
+        out[..., window - 1:][window_has_nan(is_nan, window)] = np.nan
+    return out
+
+
+def nan_positions(values: np.ndarray) -> np.ndarray | None:
+    """NaN mask of values, None when there is none (the common case, nothing to mask)."""
+    is_nan = np.isnan(values)
+    return is_nan if is_nan.any() else None
+
+
+def check_window(
+    values: np.ndarray,
+    window: int
+) -> bool:
+    """False when no window is complete (the result is all NaN)."""
+    if window < 1:
+        raise ValueError(f"Rolling window must be >= 1, got {window}.")
+    return values.shape[-1] >= window
+
+
+def blocks(
+    values: np.ndarray,
+    window: int,
+    fill: float,
+    is_nan: np.ndarray | None
+) -> np.ndarray:
+    """Values (NaN replaced by fill) padded with fill and cut in blocks of 'window' values: shape (..., blocks, window)."""
+    length = values.shape[-1]
+    padded = np.empty(values.shape[:-1] + (length + -length % window,), dtype=values.dtype)
+    padded[..., :length] = values
+    padded[..., length:] = fill
+    if is_nan is not None:
+        padded[..., :length][is_nan] = fill
+    return padded.reshape(padded.shape[:-1] + (-1, window))
+
+
+def scan(
+    blocks: np.ndarray,
+    ufunc: np.ufunc,
+    backward: bool = False
+) -> np.ndarray:
+    """Running ufunc within each block (from its end when backward), flattened back to (..., padded length)."""
+    if backward:
+        scanned = ufunc.accumulate(blocks[..., ::-1], axis=-1)[..., ::-1]
+    else:
+        scanned = ufunc.accumulate(blocks, axis=-1)
+    return scanned.reshape(blocks.shape[:-2] + (-1,))
+
+
+def window_moments(
+    values: np.ndarray,
+    window: int,
+    squares: bool,
+    is_nan: np.ndarray | None
+):
+    """
+    Mean (and sum of squared deviations when squares) of each complete window.
+
+    A window [i, i + window - 1] is the end of one block (left piece) plus the start of the
+    next one (right piece, empty when i starts a block). Each piece is summed relative to a
+    value it contains (the left block's last value, the right block's first value), then the
+    pieces are merged around the window mean: sums never span more than 'window' values and a
+    constant window gives its exact mean and a 0 deviation.
+    """
+    length = values.shape[-1]
+    complete = length - window + 1
+    cut = blocks(values, window, 0.0, is_nan)
+    left_ref = np.repeat(cut[..., -1], window, axis=-1)[..., :complete]
+    right_ref = np.repeat(cut[..., 0], window, axis=-1)[..., window - 1:length]
+    left_dev, right_dev = cut - cut[..., -1:], cut - cut[..., :1]
+
+    left_count = (window - np.arange(complete) % window).astype(values.dtype)
+    right_count = window - left_count
+    right_ref[..., ::window] = left_ref[..., ::window] # windows starting a block have no right piece
+
+    left_sum = scan(left_dev, np.add, backward=True)[..., :complete]
+    right_sum = scan(right_dev, np.add)[..., window - 1:length]
+    right_sum[..., ::window] = 0.0
+    mean_offset = (left_sum + right_count * (right_ref - left_ref) + right_sum) / window
+    if not squares:
+        return left_ref + mean_offset, None
+
+    left_sq = scan(left_dev * left_dev, np.add, backward=True)[..., :complete]
+    right_sq = scan(right_dev * right_dev, np.add)[..., window - 1:length]
+    right_sq[..., ::window] = 0.0
+    left_gap = -mean_offset # left_ref - mean
+    right_gap = right_ref - left_ref - mean_offset
+    squared = (
+        left_sq + 2 * left_gap * left_sum + left_count * left_gap ** 2
+        + right_sq + 2 * right_gap * right_sum + right_count * right_gap ** 2
+    )
+    return left_ref + mean_offset, np.maximum(squared, 0.0)
+
+
+def rolling_mean(
+    values,
+    window: int
+) -> np.ndarray:
+    values = as_float_array(values)
+    if not check_window(values, window):
+        return np.full(values.shape, np.nan, dtype=values.dtype)
+    is_nan = nan_positions(values)
+    mean, _ = window_moments(values, window, squares=False, is_nan=is_nan)
+    return place(is_nan, window, mean)
+
+
+def rolling_std(
+    values,
+    window: int,
+    ddof: int = 1
+) -> np.ndarray:
+    values = as_float_array(values)
+    if not check_window(values, window) or window <= ddof:
+        return np.full(values.shape, np.nan, dtype=values.dtype)
+    is_nan = nan_positions(values)
+    _, squared = window_moments(values, window, squares=True, is_nan=is_nan)
+    return place(is_nan, window, np.sqrt(squared / (window - ddof)))
+
+
+def rolling_extreme(
+    values,
+    window: int,
+    ufunc: np.ufunc,
+    fill: float
+) -> np.ndarray:
+    values = as_float_array(values)
+    if not check_window(values, window):
+        return np.full(values.shape, np.nan, dtype=values.dtype)
+    length = values.shape[-1]
+    is_nan = nan_positions(values)
+    cut = blocks(values, window, fill, is_nan)
+    forward, backward = scan(cut, ufunc), scan(cut, ufunc, backward=True)
+    # window [i, i + window - 1] spans at most two blocks: the end of one (backward), the start of the next (forward)
+    complete = ufunc(backward[..., :length - window + 1], forward[..., window - 1:length])
+    return place(is_nan, window, complete)
+
+
+def rolling_min(
+    values,
+    window: int
+) -> np.ndarray:
+    return rolling_extreme(values, window, np.minimum, np.inf)
+
+
+def rolling_max(
+    values,
+    window: int
+) -> np.ndarray:
+    return rolling_extreme(values, window, np.maximum, -np.inf)
+
+
+ROLLING_KERNELS: Dict[str, Callable[[np.ndarray, int], np.ndarray]] = {
+    "mean": rolling_mean,
+    "std": rolling_std,
+    "min": rolling_min,
+    "max": rolling_max
+}
+
+
+def rolling_series(
+    series: pd.Series,
+    window: int,
+    how: str,
+    dtype: np.dtype = np.dtype("float64")
+) -> pd.Series:
+    """Rolling 'how' of one series: block-scan kernels below PANDAS_ROLLING_MIN_ROWS values, pandas .rolling above (mean, std)."""
+    if how in PANDAS_ROLLING_STATS and len(series) >= PANDAS_ROLLING_MIN_ROWS:
+        return getattr(series.astype(dtype, copy=False).rolling(window=window), how)().astype(dtype, copy=False)
+    return pd.Series(ROLLING_KERNELS[how](series.to_numpy(dtype=dtype, na_value=np.nan), window), index=series.index)
@@ -0,0 +1,368 @@
+"""
+Incremental computation of the IndicatorCalculation indicators, one closed kline at a time.
+
+Each (asset_id, time_frame) series keeps a constant size state (EMA values, rolling windows
+with their running sums, OBV and VWAP totals...), so a new kline costs O(1) whatever the
+history length. Values equal full_indicators_calculation run over every kline seen since the
+state was seeded (within float tolerance), including its conventions: RSI from rolling means
+of gains/losses (0 during warm-up or without loss), VWAP/OBV cumulated from the first kline.
+States are plain dicts (to_dict/from_dict) and can be rebuilt from stored klines with seed().
+"""
+import math
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.models.lhrd_models.indicators_models import IndicatorCalculation
+from src.models.lhrd_models.indicator_graph import INDICATOR_COLUMNS
+
+
+class RollingWindow:
+    """
+    Last 'size' values with the running sums of (value - shift) and of its square.
+    Shifting by a recent value keeps the variance exact for prices far from 0; the sums are
+    recomputed from the window every 'size' pushes so rounding errors don't accumulate.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        values: Optional[List[float]] = None,
+        pushes: int = 0
+    ):
+        self.size = size
+        self.values: Deque[float] = deque(values or [], maxlen=size)
+        self.pushes = pushes
+        self.resync()
+
+
+    def resync(self):
+        self.shift = self.values[-1] if self.values else 0.0
+        self.sum = math.fsum(v - self.shift for v in self.values)
+        self.sum_sq = math.fsum((v - self.shift) ** 2 for v in self.values)
+        self.nonzero = sum(1 for v in self.values if v != 0)
+
+
+    def push(
+        self,
+        value: float
+    ):
+        if len(self.values) == self.size:
+            old = self.values[0]
+            self.sum -= old - self.shift
+            self.sum_sq -= (old - self.shift) ** 2
+            self.nonzero -= old != 0
+        self.values.append(value)
+        self.sum += value - self.shift
+        self.sum_sq += (value - self.shift) ** 2
+        self.nonzero += value != 0
+        self.pushes += 1
+        if self.pushes % self.size == 0:
+            self.resync()
+
+
+    def is_full(self) -> bool:
+        return len(self.values) == self.size
+
+
+    def mean(self) -> float:
+        if not self.is_full():
+            return math.nan
+        if self.nonzero == 0:
+            return 0.0
+        return self.shift + self.sum / self.size
+
+
+    def std(self) -> float:
+        if not self.is_full() or self.size < 2:
+            return math.nan
+        variance = (self.sum_sq - self.sum * self.sum / self.size) / (self.size - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class RollingExtremes:
+    """Rolling min and max of the last 'size' values with monotonic deques (amortized O(1))."""
+
+    def __init__(
+        self,
+        size: int,
+        values: Optional[List[float]] = None
+    ):
+        self.size = size
+        self.count = 0
+        self.mins: Deque[Tuple[int, float]] = deque()
+        self.maxs: Deque[Tuple[int, float]] = deque()
+        for value in values or []:
+            self.push(value)
+
+
+    def push(
+        self,
+        value: float
+    ):
+        position = self.count
+        self.count += 1
+        while self.mins and self.mins[-1][1] >= value:
+            self.mins.pop()
+        self.mins.append((position, value))
+        while self.maxs and self.maxs[-1][1] <= value:
+            self.maxs.pop()
+        self.maxs.append((position, value))
+        for extremes in (self.mins, self.maxs):
+            while extremes[0][0] <= position - self.size:
+                extremes.popleft()
+
+
+    def bounds(self) -> Tuple[float, float]:
+        if self.count < self.size:
+            return math.nan, math.nan
+        return self.mins[0][1], self.maxs[0][1]
+
+
+class SeriesState:
+
+    def __init__(
+        self,
+        ic: IndicatorCalculation
+    ):
+        self.ema_spans = {
+            "ema_short": ic.ema_short_standard_window,
+            "ema_mid": ic.ema_mid_standard_window,
+            "ema_long": ic.ema_long_standard_window,
+            "signal": ic.ema_signal_standard_window
+        }
+        self.rsi_window = ic.rsi_window
+        self.stoch_window = ic.stoch_window
+        self.last_open_time: Optional[datetime] = None
+        self.last_close: Optional[float] = None
+        self.emas: Dict[str, Optional[float]] = {name: None for name in self.ema_spans}
+        self.closes = RollingWindow(ic.sma_standard_window)
+        self.returns = RollingWindow(ic.volatility_window)
+        self.gains = RollingWindow(self.rsi_window)
+        self.losses = RollingWindow(self.rsi_window)
+        self.rsi_values = RollingWindow(self.stoch_window) # kept for serialization, extremes are read from rsi_extremes
+        self.rsi_extremes = RollingExtremes(self.stoch_window)
+        self.obv = 0.0
+        self.cum_pv = 0.0
+        self.cum_volume = 0.0
+
+
+    def update_ema(
+        self,
+        name: str,
+        value: float
+    ) -> float:
+        previous = self.emas[name]
+        if previous is None:
+            self.emas[name] = value
+        else:
+            alpha = 2 / (self.ema_spans[name] + 1)
+            self.emas[name] = previous + alpha * (value - previous)
+        return self.emas[name] # type:ignore
+
+
+    def update(
+        self,
+        open_time: datetime,
+        close: float,
+        volume: float
+    ) -> Dict[str, float]:
+        """Add a closed kline and return its indicator values."""
+        row: Dict[str, float] = {}
+        previous_close = self.last_close
+
+        self.closes.push(close)
+        sma, msd = self.closes.mean(), self.closes.std()
+        row["msd"] = msd
+        row["boll_mid"] = sma
+        row["boll_low1"] = sma - msd
+        row["boll_low2"] = sma - 2 * msd
+        row["boll_up1"] = sma + msd
+        row["boll_up2"] = sma + 2 * msd
+
+        for name in ("ema_short", "ema_mid", "ema_long"):
+            row[name] = self.update_ema(name, close)
+        macd_line = row["ema_short"] - row["ema_mid"]
+        row["macd"] = macd_line - self.update_ema("signal", macd_line)
+
+        row["vwap"] = self.vwap(close, volume)
+
+        if previous_close is None:
+            row["rsi"] = row["stoch_rsi"] = row["simple_return"] = row["log_return"] = row["volatility"] = math.nan
+            row["obv"] = self.obv
+        else:
+            delta = close - previous_close
+            self.gains.push(delta if delta > 0 else 0.0)
+            self.losses.push(-delta if delta < 0 else 0.0)
+            rsi = self.rsi()
+            row["rsi"] = rsi / 100
+            self.rsi_values.push(rsi)
+            self.rsi_extremes.push(rsi)
+            low, high = self.rsi_extremes.bounds()
+            row["stoch_rsi"] = (rsi - low) / (high - low) if high != low else math.nan
+
+            simple_return = close / previous_close - 1
+            row["simple_return"] = simple_return
+            row["log_return"] = math.log(close / previous_close)
+            self.returns.push(simple_return)
+            row["volatility"] = self.returns.std() * math.sqrt(365)
+
+            if delta > 0:
+                self.obv += volume
+            elif delta < 0:
+                self.obv -= volume
+            row["obv"] = self.obv
+
+        self.last_close = close
+        self.last_open_time = open_time
+        return row
+
+
+    def rsi(self) -> float:
+        """RSI on the 0-100 scale, 0 during warm-up or when the window has no loss."""
+        avg_gain, avg_loss = self.gains.mean(), self.losses.mean()
+        if math.isnan(avg_gain) or math.isnan(avg_loss) or avg_loss == 0:
+            return 0.0
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+    def vwap(
+        self,
+        close: float,
+        volume: float
+    ) -> float:
+        self.cum_pv += close * volume
+        self.cum_volume += volume
+        return self.cum_pv / self.cum_volume if self.cum_volume else math.nan
+
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "last_open_time": self.last_open_time.isoformat() if self.last_open_time is not None else None,
+            "last_close": self.last_close,
+            "emas": dict(self.emas),
+            "windows": {
+                name: {"values": list(window.values), "pushes": window.pushes}
+                for name, window in self.windows().items()
+            },
+            "obv": self.obv,
+            "cum_pv": self.cum_pv,
+            "cum_volume": self.cum_volume
+        }
+
+
+    def windows(self) -> Dict[str, RollingWindow]:
+        return {
+            "closes": self.closes,
+            "returns": self.returns,
+            "gains": self.gains,
+            "losses": self.losses,
+            "rsi_values": self.rsi_values
+        }
+
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: Dict[str, Any],
+        ic: IndicatorCalculation
+    ) -> "SeriesState":
+        state = cls(ic)
+        state.last_open_time = datetime.fromisoformat(data["last_open_time"]) if data["last_open_time"] else None
+        state.last_close = data["last_close"]
+        state.emas = dict(data["emas"])
+        for name, window in state.windows().items():
+            setattr(state, name, RollingWindow(window.size, data["windows"][name]["values"], data["windows"][name]["pushes"]))
+        state.rsi_extremes = RollingExtremes(state.stoch_window, list(state.rsi_values.values))
+        state.obv = data["obv"]
+        state.cum_pv = data["cum_pv"]
+        state.cum_volume = data["cum_volume"]
+        return state
+
+
+class StreamingIndicatorEngine:
+
+    def __init__(
+        self,
+        ic: Optional[IndicatorCalculation] = None
+    ):
+        self.ic = ic or IndicatorCalculation()
+        self.states: Dict[Tuple[str, str], SeriesState] = {}
+
+
+    def update(
+        self,
+        asset_id: str,
+        time_frame: str,
+        open_time: datetime,
+        close: float,
+        volume: float
+    ) -> Optional[Dict[str, float]]:
+        """Indicators of a new closed kline (None if it isn't newer than the series' last one)."""
+        state = self.states.get((asset_id, time_frame))
+        if state is None:
+            state = self.states[(asset_id, time_frame)] = SeriesState(self.ic)
+        if state.last_open_time is not None and open_time <= state.last_open_time:
+            return None
+        return state.update(open_time, close, volume)
+
+
+    def process(
+        self,
+        asset_id: str,
+        time_frame: str,
+        df: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Klines of df newer than the series state, with their indicator columns.
+        A series without state is seeded by the whole df (same result as full_indicators_calculation).
+        """
+        df = df.sort_values(by="open_time").drop_duplicates(subset="open_time")
+        open_times = pd.to_datetime(df["open_time"])
+        state = self.states.get((asset_id, time_frame))
+        if state is not None and state.last_open_time is not None:
+            is_new = (open_times > pd.Timestamp(state.last_open_time)).to_numpy()
+            df, open_times = df[is_new], open_times[is_new]
+        closes = pd.to_numeric(df["close"], errors="coerce").astype(float).to_numpy()
+        volumes = pd.to_numeric(df["volume"], errors="coerce").astype(float).to_numpy()
+        rows = [
+            self.update(asset_id, time_frame, open_time, close, volume)
+            for open_time, close, volume in zip(open_times, closes, volumes)
+        ]
+        indicators = pd.DataFrame(rows, columns=INDICATOR_COLUMNS, dtype="float64")
+        indicators.index = df.index
+        return pd.concat([df.drop(columns=INDICATOR_COLUMNS, errors="ignore"), indicators], axis=1)
+
+
+    def seed(
+        self,
+        df: pd.DataFrame
+    ):
+        """(Re)build the states from stored klines (e.g. read_latest_klines), replacing existing ones."""
+        for (asset_id, time_frame), df_series in df.groupby(["asset_id", "time_frame"], observed=True):
+            self.states.pop((str(asset_id), str(time_frame)), None)
+            self.process(str(asset_id), str(time_frame), df_series)
+
+
+    def last_open_times(self) -> Dict[Tuple[str, str], datetime]:
+        """open_time of the last kline of each series with a state."""
+        return {key: state.last_open_time for key, state in self.states.items() if state.last_open_time is not None}
+
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {f"{asset_id}|{time_frame}": state.to_dict() for (asset_id, time_frame), state in self.states.items()}
+
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: Dict[str, Any],
+        ic: Optional[IndicatorCalculation] = None
+    ) -> "StreamingIndicatorEngine":
+        engine = cls(ic)
+        for key, state in data.items():
+            asset_id, time_frame = key.split("|", 1)
+            engine.states[(asset_id, time_frame)] = SeriesState.from_dict(state, engine.ic)
+        return engine
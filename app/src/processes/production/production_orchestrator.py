@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import asyncio
 import signal
 
@@ -8,6 +9,7 @@ from datetime import datetime, timedelta, timezone
 
 from src.core.logging.loggers import logger_database, logger_structure
 from src.core.utils.helpers.display_helper import spinner
+from src.core.utils.dates.date_format import interval_map
 from src.core.exceptions.exceptions import *
 from src.core.data.default import (
     ASSET_TYPE_RGSTR, 
@@ -15,14 +17,22 @@ from src.core.data.default import (
     MARKET_RGSTR, 
 )
 
-from src.databases.database import Database
+from src.databases.async_database import AsyncDatabase
+from src.databases.batched_deletion import BatchedDeletion
+from src.databases.precision import value_dtype
+from src.databases.kline_outbox import KlineOutbox, OutboxFlusher
+from src.databases.sql_instrumentation import SqlInstrumentation
 from src.databases.migration.database_migration import DatabaseMigration
 
 from src.execution.lhdr_executor import LhdrExecutor
+from src.execution.compute_executor import ComputeExecutor
 from src.execution.structural_executor import StructuralExecutor
 from src.execution.display_executor import DisplayExecutor
 
 from src.models.items_models.items_models import MarketInfo
+from src.models.lhrd_models.streaming_indicators import StreamingIndicatorEngine
+from src.models.lhrd_models.indicator_registry import INDICATOR_REGISTRY
+from src.models.lhrd_models.lookback_planner import LookbackPlanner
 from src.models.structural_models.config_models import FullAssetConfig
 
 class ProductionOrchestrator:
@@ -31,19 +41,27 @@ class ProductionOrchestrator:
     def __init__(self):
         self.struct_exec = StructuralExecutor()
         self.display_exec = DisplayExecutor()
-        self.lhdr_exec = LhdrExecutor()
-        self.db = Database()
+        self.lhdr_exec = LhdrExecutor(
+            indicator_profile=INDICATOR_REGISTRY.profile_for_table("LiveData"),
+            value_dtype=value_dtype("LiveData")
+        )
+        self.sql_instrumentation = SqlInstrumentation.from_env() # opt-in, see sql_instrumentation.py
+        self.db = AsyncDatabase(instrumentation=self.sql_instrumentation)
         self.db_migr = DatabaseMigration()
         self.base_assets_config: FullAssetConfig
         self.laac_delta : timedelta = timedelta(days=1)
 
-        # Specify LiveData parameters (200 klines, dates etc)
+        # History read and candles fetched per (asset, time frame) on ponctuals, from the indicators' warm-ups
+        self.lookback_planner = LookbackPlanner(profile=INDICATOR_REGISTRY.profile_for_table("LiveData"))
+        self.retention_deletion = BatchedDeletion(max_block_ms=200) # retention never holds locks longer than this
+        self.outbox_flusher = OutboxFlusher(outbox=KlineOutbox(), db=self.db) # ponctual klines go through the local outbox
+        self.lhdr_exec.compute_executor = ComputeExecutor() # catchup indicators computed in a process pool
 
 
     async def DEV_table_rase(self):
         try:
             self.db_migr.reset_alembic_db()
-            self.db.drop_all_tables()
+            await self.db.drop_all_tables()
         except Exception as e:
             logger_database.exception({str(e)})
 
@@ -51,6 +69,7 @@ class ProductionOrchestrator:
     async def launch_db(self) -> bool:
         try:
             self.db_migr.db_structure_update()
+            await self.db.ensure_future_partitions()
             return True 
         except Exception as e:
             logger_database.exception(str(e))
@@ -90,7 +109,7 @@ class ProductionOrchestrator:
         try:
             assets_config = await self.lhdr_exec.get_markets_assets_config()
             no_laac_assets_config = BASE_ASSET_RTRV_CONFIG.to(FullAssetConfig)
-            df_db_assets_config = self.db.read_active_mrk_assets_to_df()
+            df_db_assets_config = await self.db.read_active_mrk_assets_to_df()
 
             if not df_db_assets_config.empty:
                 db_assets_config = await self.struct_exec.df_to_asset_config(df=df_db_assets_config)
@@ -135,8 +154,8 @@ class ProductionOrchestrator:
         kline_count: int=200,
     ) -> Optional[bool]:
         
-        df_db_assets = self.db.read_table_to_df(specified_table="Assets")
-        catchup_live_data_state = self.db.get_db_data_state(table_name=data_table_name)
+        df_db_assets = await self.db.read_table_to_df(specified_table="Assets")
+        catchup_live_data_state = await self.db.get_db_data_state(table_name=data_table_name)
 
         deprecated_asset_ids, klines_rtrv_assets_config, time_segments = self.struct_exec.catchup_config(
             count=kline_count,
@@ -151,18 +170,20 @@ class ProductionOrchestrator:
                 ponctual=False
             )
 
-            self.db.delete_content_by_asset_id(
+            await self.db.delete_content_by_asset_id(
                 table_name=data_table_name,
-                asset_ids=deprecated_asset_ids
+                asset_ids=deprecated_asset_ids,
+                batched=self.retention_deletion
             )
-            self.db.write_df(
+            await self.db.write_df(
                 df=live_data_df,
                 table_name=data_table_name
             )
 
-        self.db.delete_deprecated_data(
+        await self.db.delete_deprecated_data(
             time_segs=time_segments,
-            table_name=data_table_name
+            table_name=data_table_name,
+            batched=self.retention_deletion
         )
         
         return True
@@ -172,20 +193,41 @@ class ProductionOrchestrator:
 
         await asyncio.sleep(3)
 
-        df_db_live_data = self.db.read_table_to_df(specified_table="LiveData")
-        df_db_assets = self.db.read_table_to_df(specified_table="Assets")
+        df_db_assets = await self.db.read_table_to_df(specified_table="Assets")
+        asset_ids = set(df_db_assets["asset_id"].tolist())
+
+        # Series with a streaming state need no history: only their new candles are fetched.
+        engine = self.lhdr_exec.streaming_engine
+        last_open_times = {
+            key: open_time for key, open_time in (engine.last_open_times() if engine is not None else {}).items()
+            if key[0] in asset_ids and key[1] in time_frames
+        }
+        unseeded_asset_ids = sorted({
+            asset_id for asset_id in asset_ids for tf in time_frames if (asset_id, tf) not in last_open_times
+        })
+        df_db_live_data = await self.db.read_latest_klines(
+            table_name="LiveData",
+            asset_ids=unseeded_asset_ids,
+            time_frames=time_frames,
+            count=self.lookback_planner.warmup(),
+            columns=["open", "high", "low", "close", "volume"]
+        )
+        if not df_db_live_data.empty:
+            is_seeded = [key in last_open_times for key in zip(df_db_live_data["asset_id"], df_db_live_data["time_frame"])]
+            df_db_live_data = df_db_live_data[~np.array(is_seeded, dtype=bool)]
+            last_open_times.update(df_db_live_data.groupby(["asset_id", "time_frame"], observed=True)["open_time"].max().to_dict())
 
         klines_rtrv_assets_config = self.struct_exec.ponctual_config(
             df_data=df_db_live_data,
-            df_assets = df_db_assets,
-            tfs=time_frames
+            df_assets=df_db_assets,
+            segments=self.lookback_planner.plan(last_open_times, time_frames)
         )
 
         new_klines: pd.DataFrame = await self.lhdr_exec.lhdr_klines(kln_config=klines_rtrv_assets_config)
 
-        self.db.write_df(
-            df=new_klines,
-            table_name="LiveData"
+        await self.outbox_flusher.submit(
+            table_name="LiveData",
+            df=new_klines
         )
 
         if '1h' in time_frames:
@@ -199,6 +241,22 @@ class ProductionOrchestrator:
             await self.historical_catchup(data_table_name="LiveData", deletion_only=True)
 
 
+    async def seed_streaming_indicators(self):
+        """Rebuild the incremental indicator states of the ponctuals from the latest LiveData klines."""
+        df_db_assets = await self.db.read_table_to_df(specified_table="Assets")
+        df_db_live_data = await self.db.read_latest_klines(
+            table_name="LiveData",
+            asset_ids=df_db_assets["asset_id"].tolist(),
+            time_frames=list(interval_map.keys()),
+            count=self.lookback_planner.warmup(),
+            columns=["close", "volume"]
+        )
+        engine = StreamingIndicatorEngine()
+        engine.seed(df_db_live_data)
+        self.lhdr_exec.streaming_engine = engine
+        logger_structure.info(f"Streaming indicators seeded for {len(engine.states)} series.")
+
+
     async def run_ponctuals(self):
 
         # NOT IMPLEMENTED : add smth that verifies that every asset is up to date in LiveData
@@ -221,18 +279,23 @@ class ProductionOrchestrator:
             if tfs:
                 await self.ponctual(time_frames=tfs)
                 logger_structure.info(f"Successfully ran job with time frames {tfs}.")
+                logger_database.debug(f"Outbox stats: {self.outbox_flusher.stats()}")
 
         stop_event = asyncio.Event()
         loop = asyncio.get_running_loop()
         loop.add_signal_handler(signal.SIGINT, stop_event.set)
 
+        await self.seed_streaming_indicators()
         spinner_task = asyncio.create_task(spinner(stop_event))
+        self.outbox_flusher.start()
         scheduler = AsyncIOScheduler(timezone="UTC")
         scheduler.add_job(run_job, "cron", second=0, misfire_grace_time=30)
         scheduler.start()
 
         await stop_event.wait()
         scheduler.shutdown()
+        await self.outbox_flusher.stop()
+        await asyncio.to_thread(self.lhdr_exec.compute_executor.shutdown)
         spinner_task.cancel()
         logger_structure.info("Ponctuals stopped.")
 
@@ -1,3 +1,4 @@
+import asyncio
 import pandas as pd
 from typing import Optional, List
 from datetime import datetime
@@ -5,12 +6,17 @@ from datetime import datetime
 from src.core.logging.loggers import logger_spo, logger_database, logger_structure
 from src.core.exceptions.exceptions import *
 
-from src.databases.database import Database
+from src.databases.async_database import AsyncDatabase
+from src.databases.kline_cache import KlineCache
+from src.databases.precision import value_dtype
 
 from src.execution.lhdr_executor import LhdrExecutor
+from src.execution.compute_executor import ComputeExecutor
 from src.execution.structural_executor import StructuralExecutor
 from src.execution.display_executor import DisplayExecutor
 
+from src.models.lhrd_models.indicator_registry import INDICATOR_REGISTRY
+
 
 class TrainingOrchestrator:
 
@@ -18,9 +24,14 @@ class TrainingOrchestrator:
 
         self.asset_ids: List[str] = asset_ids
         self.struct_exec = StructuralExecutor()
-        self.lhdr_exec = LhdrExecutor()
+        self.lhdr_exec = LhdrExecutor(
+            indicator_profile=INDICATOR_REGISTRY.profile_for_table("TrainingData"),
+            value_dtype=value_dtype("TrainingData")
+        )
+        self.lhdr_exec.compute_executor = ComputeExecutor()
         self.display_exec = DisplayExecutor()
-        self.db = Database()
+        self.kline_cache = KlineCache()
+        self.db = AsyncDatabase(kline_cache=self.kline_cache)
 
     async def get_historical(
         self,
@@ -30,7 +41,7 @@ class TrainingOrchestrator:
         from_scratch: bool = False
     ) -> Optional[bool]:
         
-        df_db_assets = self.db.read_table_to_df(specified_table="Assets")
+        df_db_assets = await self.db.read_table_to_df(specified_table="Assets")
         df_db_assets = df_db_assets[df_db_assets["asset_id"].isin(self.asset_ids)]
 
         if df_db_assets.empty:
@@ -40,12 +51,12 @@ class TrainingOrchestrator:
         wanted_assets = list(df_db_assets["asset_id"])
         
         if from_scratch:
-            self.db.delete_content_by_asset_id(
+            await self.db.delete_content_by_asset_id(
                 table_name=data_table_name,
                 asset_ids=wanted_assets
             )
 
-        training_data_state = self.db.get_db_data_state(table_name=data_table_name)
+        training_data_state = await self.db.get_db_data_state(table_name=data_table_name)
         
 
         _, klines_rtrv_assets_config, _ = self.struct_exec.catchup_config(
@@ -59,8 +70,9 @@ class TrainingOrchestrator:
             kln_config=klines_rtrv_assets_config,
             ponctual=False
         )
+        await asyncio.to_thread(self.lhdr_exec.compute_executor.shutdown)
        
-        self.db.write_df(
+        await self.db.write_df(
             df=training_data_df,
             table_name=data_table_name
         )
@@ -70,6 +82,19 @@ class TrainingOrchestrator:
 
     async def display(self):
 
-        df_db_training_data = self.db.read_table_to_df(specified_table="TrainingData")
-        df_db_training_data = df_db_training_data[df_db_training_data["asset_id"].isin(self.asset_ids)]
+        training_data_state = await self.db.get_db_data_state(table_name="TrainingData")
+        frames: List[pd.DataFrame] = []
+        for asset_id in self.asset_ids:
+            for time_frame in training_data_state.data.get(asset_id, {}):
+                frames.append(await self.db.read_data(
+                    table_name="TrainingData",
+                    symbol=asset_id,
+                    time_frame=time_frame
+                ))
+        logger_database.info(f"Kline cache stats: {self.kline_cache.stats()}")
+        if not frames:
+            logger_structure.warning(f"No training data to display for {self.asset_ids}.")
+            return
+
+        df_db_training_data = pd.concat(frames, ignore_index=True)
         self.display_exec.plot_klines_and_indicators(df_data = df_db_training_data)
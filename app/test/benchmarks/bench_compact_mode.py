@@ -0,0 +1,93 @@
+"""
+Compare the compact float32 mode (precision.json) with the float64 one on stacked series:
+memory of the klines + indicators frame, batch_indicators_calculation throughput, and the
+largest difference of every float32 column to its float64 value against the tolerances
+documented in src/databases/precision.py.
+
+Differences are relative to the float64 value, floored at a scale: the close price for the
+price-like columns, 1 for the bounded / return-like ones (rsi, stoch_rsi, returns) and the
+column's own magnitude for the others, so values crossing 0 are not divided by ~0.
+
+Usage (from app/): PYTHONPATH=. python test/benchmarks/bench_compact_mode.py [series] [rows] [repeat]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_indicators import make_series
+
+from src.models.lhrd_models.indicators_models import IndicatorCalculation
+from src.models.lhrd_models.indicator_graph import INDICATOR_COLUMNS
+
+
+VALUE_COLUMNS = ["open", "high", "low", "close", "volume"]
+PRICE_SCALED = ["ema_short", "ema_mid", "ema_long", "boll_mid", "boll_low1", "boll_low2", "boll_up1", "boll_up2", "vwap", "msd", "macd"]
+UNIT_SCALED = ["rsi", "stoch_rsi", "simple_return", "log_return", "volatility"]
+TOLERANCES = {
+    **dict.fromkeys(VALUE_COLUMNS + PRICE_SCALED + ["obv", "simple_return", "log_return"], 1e-6),
+    **dict.fromkeys(["rsi", "volatility"], 1e-5),
+    "stoch_rsi": 1e-3,
+}
+
+
+def max_difference(compact: pd.DataFrame, full: pd.DataFrame, col: str) -> float:
+    result = compact[col].to_numpy(dtype=np.float64)
+    expected = full[col].to_numpy(dtype=np.float64)
+    both = ~np.isnan(expected) & ~np.isnan(result)
+    if (np.isnan(expected) != np.isnan(result)).any():
+        return np.inf
+    if col in PRICE_SCALED:
+        scale = np.abs(full["close"].to_numpy())
+    elif col in UNIT_SCALED:
+        scale = np.ones(len(full))
+    else:
+        scale = np.full(len(full), np.nanmax(np.abs(expected)) if both.any() else 1.0)
+    scale = np.maximum(np.abs(expected), scale)
+    return float((np.abs(result - expected)[both] / scale[both]).max()) if both.any() else 0.0
+
+
+def best_time(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    series = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    klines = pd.concat(make_series(series, rows), ignore_index=True)
+    klines["asset_id"] = klines["asset_id"].astype("category")
+    klines["time_frame"] = klines["time_frame"].astype("category")
+    compact_klines = klines.astype({col: np.float32 for col in VALUE_COLUMNS}) # as read from a compact table
+
+    full = IndicatorCalculation().batch_indicators_calculation(klines.copy())
+    compact = IndicatorCalculation(dtype="float32").batch_indicators_calculation(compact_klines.copy())
+    assert all(compact[col].dtype == np.float32 for col in VALUE_COLUMNS + INDICATOR_COLUMNS)
+
+    for col in VALUE_COLUMNS + INDICATOR_COLUMNS:
+        difference = max_difference(compact, full, col)
+        assert difference <= TOLERANCES[col], f"{col}: max relative difference {difference:.2e} > {TOLERANCES[col]:.0e}"
+    print(f"tolerances ok ({', '.join(f'{col}={max_difference(compact, full, col):.0e}' for col in ['close', 'rsi', 'msd', 'log_return', 'obv'])}...)")
+
+    row_nb = len(klines)
+    print(f"{series} series x {rows} rows ({row_nb} rows)")
+    for name, df, ic in [("float64", klines, IndicatorCalculation()), ("float32", compact_klines, IndicatorCalculation(dtype="float32"))]:
+        elapsed = best_time(lambda: ic.batch_indicators_calculation(df.copy()), repeat)
+        result = ic.batch_indicators_calculation(df.copy())
+        memory = result.memory_usage(deep=True).sum()
+        print(
+            f"{name} frame={memory / 2**20:8.1f}MiB bytes/row={memory / row_nb:6.1f} "
+            f"batch={elapsed * 1e3:9.1f}ms ns/row={elapsed / row_nb * 1e9:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
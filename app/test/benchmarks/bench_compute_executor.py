@@ -0,0 +1,84 @@
+"""
+Check ComputeExecutor (process and thread pools) against batch_indicators_calculation, then
+simulate lhdr_klines: markets fetched one after the other (asyncio.sleep standing for the
+network) with their klines computed inline or by the executor while the next market is
+fetched. Reports wall time and the worst event loop stall seen by a 10ms ticker.
+
+Usage (from app/): PYTHONPATH=. python test/benchmarks/bench_compute_executor.py [markets] [series] [rows] [fetch_s]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_indicators import make_series
+
+from src.execution.compute_executor import ComputeExecutor
+from src.models.lhrd_models.indicators_models import IndicatorCalculation
+from src.models.lhrd_models.indicator_graph import INDICATOR_COLUMNS
+
+
+async def check_parity(ic: IndicatorCalculation):
+    batch = pd.concat(make_series(60, 300), ignore_index=True).sample(frac=1, random_state=0)
+    expected = ic.batch_indicators_calculation(batch.copy())
+    for mode in ["process", "thread"]:
+        executor = ComputeExecutor(mode=mode, max_workers=2, rows_per_job=2000) # several jobs per batch
+        result = await (await executor.submit(batch.copy(), indicators=INDICATOR_COLUMNS, params=ic.graph_params()))
+        executor.shutdown()
+        pd.testing.assert_frame_equal(result, expected)
+        print(f"parity {mode.ljust(8)} ok ({executor.stats()['done_jobs']} jobs)")
+
+
+async def ticker(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+async def pipeline(ic: IndicatorCalculation, batches: list, fetch_s: float, executor):
+    stop, lags = asyncio.Event(), []
+    tick = asyncio.create_task(ticker(stop, lags))
+    start = time.perf_counter()
+    computing, results = [], []
+    for batch in batches:
+        await asyncio.sleep(fetch_s) # fetch of the market
+        if executor is None:
+            results.append(ic.batch_indicators_calculation(batch))
+        else:
+            computing.append(await executor.submit(batch, indicators=INDICATOR_COLUMNS, params=ic.graph_params()))
+    results += [await task for task in computing]
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    return elapsed, max(lags), sum(len(df) for df in results)
+
+
+async def main():
+    markets = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    series = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rows = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    fetch_s = float(sys.argv[4]) if len(sys.argv) > 4 else 0.3
+    ic = IndicatorCalculation()
+    await check_parity(ic)
+
+    batches = [pd.concat(make_series(series, rows), ignore_index=True) for _ in range(markets)]
+    print(f"{markets} markets x {series} series x {rows} rows, {fetch_s}s fetch each, {os.cpu_count()} cores")
+    for name, executor in [
+        ("inline", None),
+        ("thread", ComputeExecutor(mode="thread")),
+        ("process", ComputeExecutor(mode="process"))
+    ]:
+        if executor is not None:
+            await (await executor.submit(batches[0].head(100), indicators=INDICATOR_COLUMNS, params=ic.graph_params())) # start the workers
+        elapsed, worst_lag, row_nb = await pipeline(ic, batches, fetch_s, executor)
+        if executor is not None:
+            executor.shutdown()
+        print(f"{name.ljust(8)} wall={elapsed:7.2f}s rows/s={row_nb / elapsed:10.0f} worst loop stall={worst_lag * 1e3:8.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
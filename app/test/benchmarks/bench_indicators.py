@@ -0,0 +1,77 @@
+"""
+Time every indicator of IndicatorCalculation (ns per row), and batch_indicators_calculation on
+many short series against one full_indicators_calculation per series. Parity with the former
+implementations is checked by test/test_indicators.py.
+
+Usage (from app/): PYTHONPATH=. python test/benchmarks/bench_indicators.py [rows] [repeat] [series]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.models.lhrd_models.indicators_models import IndicatorCalculation
+from src.models.lhrd_models.indicator_registry import INDICATOR_REGISTRY
+
+
+def make_klines(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows))), 1) # rounding gives some unchanged closes
+    spread = np.abs(rng.normal(0, 0.005, rows)) * close
+    return pd.DataFrame({
+        "open_time": pd.date_range("2024-01-01", periods=rows, freq="5min"),
+        "open": np.roll(close, 1),
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.uniform(1, 100, rows)
+    })
+
+
+def make_series(series: int, rows: int) -> list:
+    frames = []
+    for i in range(series):
+        df = make_klines(rows, seed=i)
+        df["close"] *= [60000, 1.0001, 0.01][i % 3] # mixed price scales must not leak between series
+        df["asset_id"] = f"asset-{i // 5}"
+        df["time_frame"] = ["5m", "15m", "1h", "4h", "1d"][i % 5]
+        frames.append(df)
+    return frames
+
+
+def bench(name, func, rows, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"{name.ljust(28)} best={best * 1e3:9.3f}ms ns/row={best * 1e9 / rows:10.1f}")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    ic = IndicatorCalculation()
+
+    df = make_klines(rows)
+    for name in ["obv", "rsi", "stoch_rsi", "macd", "sma", "msd", "simple_return", "log_return", "vwap", "volatility"]:
+        bench(name, lambda: getattr(ic, name)(prices=df), rows, repeat)
+    bench("ema", lambda: ic.ema(prices=df, span="long"), rows, repeat)
+    bench("adx", lambda: ic.adx(df.copy()), rows, repeat)
+    bench("full_indicators_calculation", lambda: ic.full_indicators_calculation(df.copy()), rows, repeat)
+    bench("full (rsi, stoch_rsi, vwap)", lambda: ic.full_indicators_calculation(df.copy(), ["rsi", "stoch_rsi", "vwap"]), rows, repeat)
+
+    series = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    frames = make_series(series, 200)
+    long_df = pd.concat(frames, ignore_index=True)
+    bench(f"per series ({series} x 200)", lambda: [ic.full_indicators_calculation(f.copy()) for f in frames], len(long_df), 1)
+    bench(f"batch ({series} x 200)", lambda: ic.batch_indicators_calculation(long_df), len(long_df), repeat)
+    for profile in INDICATOR_REGISTRY.profiles:
+        columns = INDICATOR_REGISTRY.columns(profile)
+        bench(f"batch, {profile} profile", lambda: ic.batch_indicators_calculation(long_df, indicators=columns), len(long_df), repeat)
+
+
+if __name__ == "__main__":
+    main()
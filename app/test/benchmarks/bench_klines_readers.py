@@ -0,0 +1,43 @@
+"""
+Compare the kline readers of Database on an existing data table.
+
+Usage (from app/): PYTHONPATH=. python test/benchmarks/bench_klines_readers.py [table_name] [repeat]
+"""
+import sys
+import time
+import tracemalloc
+
+from src.databases.database import Database
+
+
+def run(name, reader, repeat):
+    timings = []
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        df = reader()
+        timings.append(time.perf_counter() - start)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    best = min(timings)
+    print(
+        f"{name.ljust(20)} rows={len(df):>9} best={best:8.3f}s "
+        f"rows/s={len(df) / best if best else 0:>12.0f} peak={peak / 2**20:8.1f}MiB "
+        f"frame={df.memory_usage(deep=True).sum() / 2**20:8.1f}MiB"
+    )
+    return df
+
+
+def main():
+    table_name = sys.argv[1] if len(sys.argv) > 1 else "TrainingData"
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    db = Database()
+
+    run("read_table_to_df", lambda: db.read_table_to_df(table_name), repeat)
+    run("read_klines", lambda: db.read_klines(table_name=table_name), repeat)
+    df = run("read_klines_float", lambda: db.read_klines_float(table_name=table_name), repeat)
+    print(df.dtypes.value_counts().to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Check rolling_kernels.py against pandas .rolling (same NaN positions, same values), on single
+series and 2-D batches, then time both on short and long series (us per call).
+
+pandas computes rolling std online and drifts on some windows (up to ~1e-6 relative on
+2-value windows of large prices); the kernels are two-pass, hence the loose std tolerance.
+
+Usage (from app/): PYTHONPATH=. python test/benchmarks/bench_rolling_kernels.py [repeat]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.models.lhrd_models.rolling_kernels import ROLLING_KERNELS
+
+
+TOLERANCES = {"mean": 1e-12, "std": 1e-5, "min": 0.0, "max": 0.0}
+
+
+def pandas_rolling(values: np.ndarray, window: int, how: str) -> np.ndarray:
+    return getattr(pd.Series(values).rolling(window), how)().to_numpy()
+
+
+def make_values(rng: np.random.Generator, rows: int, scale: float) -> np.ndarray:
+    return np.round(scale * np.exp(np.cumsum(rng.normal(0, 0.01, rows))), 4)
+
+
+def check_parity():
+    rng = np.random.default_rng(0)
+    worst = dict.fromkeys(ROLLING_KERNELS, 0.0)
+    for case in range(300):
+        rows, window = int(rng.integers(1, 400)), int(rng.integers(1, 40))
+        scale = [1e-3, 1.0, 6e4][case % 3]
+        values = make_values(rng, rows, scale)
+        if case % 5 == 0:
+            values[rng.integers(0, rows, 3)] = np.nan # NaN windows
+        if case % 7 == 0:
+            values[5:25] = values[min(5, rows - 1)] # constant windows
+        for how, kernel in ROLLING_KERNELS.items():
+            expected, result = pandas_rolling(values, window, how), kernel(values, window)
+            assert (np.isnan(expected) == np.isnan(result)).all(), f"{how}: NaN mismatch (rows={rows}, window={window})"
+            valid = ~np.isnan(expected)
+            if valid.any():
+                error = np.abs(result[valid] - expected[valid]) / np.maximum(np.abs(expected[valid]), scale * 1e-6)
+                worst[how] = max(worst[how], float(error.max()))
+
+    batch = np.vstack([make_values(rng, 300, 100.0) for _ in range(50)])
+    for how, kernel in ROLLING_KERNELS.items():
+        expected = np.vstack([pandas_rolling(row, 14, how) for row in batch])
+        np.testing.assert_allclose(kernel(batch, 14), expected, rtol=1e-9, atol=0)
+
+    for how, error in worst.items():
+        assert error <= TOLERANCES[how], f"{how}: max relative difference {error:.2e}"
+        print(f"parity {how.ljust(5)} ok (max relative difference {error:.1e})")
+
+
+def bench(repeat: int):
+    rng = np.random.default_rng(1)
+    for rows in [200, 100000]:
+        values = make_values(rng, rows, 100.0)
+        for how, kernel in ROLLING_KERNELS.items():
+            timings = {}
+            for name, func in [("pandas", lambda: pandas_rolling(values, 20, how)), ("kernel", lambda: kernel(values, 20))]:
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    func()
+                timings[name] = (time.perf_counter() - start) / repeat
+            print(
+                f"{how.ljust(5)} rows={rows:<7} pandas={timings['pandas'] * 1e6:9.1f}us "
+                f"kernel={timings['kernel'] * 1e6:9.1f}us x{timings['pandas'] / timings['kernel']:.1f}"
+            )
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    check_parity()
+    bench(repeat)
+
+
+if __name__ == "__main__":
+    main()
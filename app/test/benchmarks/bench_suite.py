@@ -0,0 +1,220 @@
+"""
+Benchmark suite of IndicatorCalculation on synthetic OHLCV series (geometric Brownian motion).
+
+Times every indicator method and full_indicators_calculation from 200 to 1M rows, in two layouts:
+- single: one series of 'rows' klines;
+- multi: 'rows' klines cut in series of --series-length klines (asset_id / time_frame keys),
+  computed by batch_indicators_calculation and, up to --loop-max-rows rows, by a loop of
+  per series calls (each method and full_indicators_calculation).
+
+Each case reports its best time over the repeats, ns/row and the peak memory traced by
+tracemalloc during one extra run (NumPy and pandas buffers included). Results are written
+as JSON (with the git commit, versions and machine) and can be compared with a previous run.
+
+Usage (from app/):
+    PYTHONPATH=. python test/benchmarks/bench_suite.py [--sizes 200 10000 1000000] [--layouts single multi]
+        [--series-length 200] [--repeat 5] [--output path.json] [--compare previous.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.models.lhrd_models.indicators_models import IndicatorCalculation
+
+
+DEFAULT_SIZES = [200, 1000, 10000, 100000, 1000000]
+DEFAULT_OUTPUT_DIR = ".benchmarks"
+ROW_BUDGET = 2000000 # rows computed per case at most: large sizes get fewer repeats
+TIME_FRAMES = ["5m", "15m", "1h", "4h", "1d"]
+
+METHODS: Dict[str, Callable[[IndicatorCalculation, pd.DataFrame], Any]] = {
+    "sma": lambda ic, df: ic.sma(prices=df),
+    "ema": lambda ic, df: ic.ema(prices=df, span="long"),
+    "msd": lambda ic, df: ic.msd(prices=df),
+    "simple_return": lambda ic, df: ic.simple_return(prices=df),
+    "log_return": lambda ic, df: ic.log_return(prices=df),
+    "macd": lambda ic, df: ic.macd(prices=df),
+    "obv": lambda ic, df: ic.obv(prices=df),
+    "rsi": lambda ic, df: ic.rsi(prices=df),
+    "stoch_rsi": lambda ic, df: ic.stoch_rsi(prices=df),
+    "vwap": lambda ic, df: ic.vwap(prices=df),
+    "volatility": lambda ic, df: ic.volatility(prices=df),
+    "adx": lambda ic, df: ic.adx(df),
+    "full_indicators_calculation": lambda ic, df: ic.full_indicators_calculation(df),
+}
+
+
+def gbm_klines(
+    rows: int,
+    series: int = 1,
+    seed: int = 0,
+    price: float = 100.0,
+    drift: float = 0.05,
+    volatility: float = 0.8,
+    freq: str = "5min"
+) -> pd.DataFrame:
+    """
+    'series' stacked OHLCV series of 'rows' klines each, closes following a geometric Brownian
+    motion (yearly drift and volatility); opens are the previous closes, highs / lows spread
+    around them and volumes log-normal.
+    """
+    rng = np.random.default_rng(seed)
+    step = pd.Timedelta(freq) / pd.Timedelta(days=365)
+    shocks = (drift - volatility ** 2 / 2) * step + volatility * np.sqrt(step) * rng.standard_normal((series, rows))
+    close = price * np.exp(np.cumsum(shocks, axis=1))
+    open_ = np.concatenate([np.full((series, 1), price), close[:, :-1]], axis=1)
+    spread = np.abs(rng.normal(0, volatility * np.sqrt(step) / 2, (series, rows)))
+    codes = np.repeat(np.arange(series), rows)
+    return pd.DataFrame({
+        "asset_id": pd.Categorical([f"asset-{code // len(TIME_FRAMES)}" for code in range(series)])[codes],
+        "time_frame": pd.Categorical(TIME_FRAMES * (series // len(TIME_FRAMES) + 1))[:series][codes],
+        "open_time": np.tile(pd.date_range("2024-01-01", periods=rows, freq=freq).to_numpy(), series),
+        "open": open_.ravel(),
+        "high": (np.maximum(open_, close) * (1 + spread)).ravel(),
+        "low": (np.minimum(open_, close) * (1 - spread)).ravel(),
+        "close": close.ravel(),
+        "volume": rng.lognormal(3, 1, series * rows)
+    })
+
+
+def measure(
+    func: Callable[[], Any],
+    rows: int,
+    repeat: int
+) -> Dict[str, Any]:
+    """Best time of 'repeat' runs, then the tracemalloc peak of one more run."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    best = min(timings)
+    return {"best_s": best, "ns_per_row": best * 1e9 / rows, "peak_bytes": peak, "repeat": repeat}
+
+
+def run_case(
+    results: List[Dict[str, Any]],
+    layout: str,
+    method: str,
+    rows: int,
+    series: int,
+    func: Callable[[], Any],
+    repeat: int
+):
+    result = {"layout": layout, "method": method, "rows": rows, "series": series, **measure(func, rows, repeat)}
+    results.append(result)
+    print(
+        f"{layout.ljust(6)} {method.ljust(44)} rows={rows:<8} series={series:<5} "
+        f"best={result['best_s'] * 1e3:10.2f}ms ns/row={result['ns_per_row']:9.1f} "
+        f"peak={result['peak_bytes'] / 2**20:8.1f}MiB"
+    )
+
+
+def run_single(ic: IndicatorCalculation, rows: int, repeat: int, results: List[Dict[str, Any]]):
+    df = gbm_klines(rows)
+    for method, call in METHODS.items():
+        # methods adding columns (adx, full_indicators_calculation) get a fresh copy, timed alike for all
+        run_case(results, "single", method, rows, 1, lambda: call(ic, df.copy()), repeat)
+
+
+def run_multi(
+    ic: IndicatorCalculation,
+    rows: int,
+    repeat: int,
+    series_length: int,
+    loop_max_rows: int,
+    results: List[Dict[str, Any]]
+):
+    series = rows // series_length
+    if series < 2:
+        return
+    df = gbm_klines(series_length, series=series)
+    run_case(results, "multi", "batch_indicators_calculation", len(df), series, lambda: ic.batch_indicators_calculation(df.copy()), repeat)
+    if len(df) > loop_max_rows:
+        return
+    frames = [frame.reset_index(drop=True) for _, frame in df.groupby(["asset_id", "time_frame"], observed=True, sort=False)]
+    for method, call in METHODS.items():
+        run_case(results, "multi", f"{method} (per series)", len(df), series, lambda: [call(ic, frame.copy()) for frame in frames], repeat)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results: List[Dict[str, Any]], path: str):
+    """ns/row of this run against a previous JSON run, for the cases both have."""
+    with open(path) as file:
+        previous = json.load(file)
+    key = lambda result: (result["layout"], result["method"], result["rows"], result["series"])
+    before = {key(result): result for result in previous["results"]}
+    print(f"\ncompared with {path} (commit {previous['meta'].get('commit')}): time ratio now / before")
+    for result in results:
+        old = before.get(key(result))
+        if old is not None:
+            print(
+                f"{result['layout'].ljust(6)} {result['method'].ljust(44)} rows={result['rows']:<8} "
+                f"x{result['ns_per_row'] / old['ns_per_row']:6.2f} ns/row, x{result['peak_bytes'] / max(old['peak_bytes'], 1):6.2f} peak"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IndicatorCalculation benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--layouts", nargs="+", choices=["single", "multi"], default=["single", "multi"])
+    parser.add_argument("--series-length", type=int, default=200)
+    parser.add_argument("--loop-max-rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None)
+    args = parser.parse_args()
+
+    started = datetime.now(timezone.utc)
+    ic = IndicatorCalculation()
+    results: List[Dict[str, Any]] = []
+    for rows in args.sizes:
+        repeat = max(1, min(args.repeat, ROW_BUDGET // rows))
+        if "single" in args.layouts:
+            run_single(ic, rows, repeat, results)
+        if "multi" in args.layouts:
+            run_multi(ic, rows, repeat, args.series_length, args.loop_max_rows, results)
+
+    output = args.output or os.path.join(DEFAULT_OUTPUT_DIR, f"bench_suite_{started:%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as file:
+        json.dump({
+            "meta": {
+                "date": started.isoformat(),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "machine": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "args": vars(args)
+            },
+            "results": results
+        }, file, indent=2)
+    print(f"\nresults written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Parity of IndicatorCalculation with the reference implementations it replaced: the row loop
+OBV and pandas ADX, the pandas RSI / stochastic RSI formulas, and one full_indicators_calculation
+per series for batch_indicators_calculation.
+
+Usage (from app/): python -m pytest test/test_indicators.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models.lhrd_models.indicators_models import IndicatorCalculation
+
+
+def obv_loop(prices: pd.DataFrame) -> pd.Series:
+    """OBV as computed before vectorization (reference)."""
+    close = pd.to_numeric(prices['close'], errors='coerce').astype(float)
+    volume = pd.to_numeric(prices['volume'], errors='coerce').astype(float)
+    price_change = close.diff()
+    obv = pd.Series(index=close.index, dtype='float64')
+    obv.iloc[0] = 0
+    for i in range(1, len(close)):
+        if price_change.iloc[i] > 0:
+            obv.iloc[i] = obv.iloc[i - 1] + volume.iloc[i]
+        elif price_change.iloc[i] < 0:
+            obv.iloc[i] = obv.iloc[i - 1] - volume.iloc[i]
+        else:
+            obv.iloc[i] = obv.iloc[i - 1]
+    return obv
+
+
+def adx_reference(df: pd.DataFrame, n: int = 14) -> pd.DataFrame:
+    """ADX as computed before vectorization (reference)."""
+    high, low, close = df['high'], df['low'], df['close']
+    plus_dm = high.diff()
+    minus_dm = low.shift(1) - low
+    plus_dm = np.where((plus_dm > minus_dm) & (plus_dm > 0), plus_dm, 0.0)
+    minus_dm = np.where((minus_dm > plus_dm) & (minus_dm > 0), minus_dm, 0.0)
+    tr = pd.DataFrame({
+        'tr1': high - low,
+        'tr2': abs(high - close.shift(1)),
+        'tr3': abs(low - close.shift(1))
+    }).max(axis=1)
+    atr = tr.ewm(alpha=1/n, adjust=False).mean()
+    plus_di = 100 * (pd.Series(plus_dm).ewm(alpha=1/n, adjust=False).mean() / atr)
+    minus_di = 100 * (pd.Series(minus_dm).ewm(alpha=1/n, adjust=False).mean() / atr)
+    dx = (100 * abs(plus_di - minus_di) / (plus_di + minus_di)).fillna(0)
+    return pd.DataFrame({'+DI': plus_di, '-DI': minus_di, 'ADX': dx.ewm(alpha=1/n, adjust=False).mean()})
+
+
+def rsi_scale_reference(prices: pd.DataFrame, window: int) -> pd.Series:
+    """
+    RSI (0-100) as computed by pandas rolling before the indicator graph, without the first kline
+    (reference). The former dropna() also dropped the moves around a NaN close, shifting the windows;
+    they count as unchanged here, which is what the graph keeps aligned on prices.
+    """
+    delta = pd.to_numeric(prices['close'], errors='coerce').astype(float).diff().iloc[1:]
+    gains = delta.where(delta > 0, 0)
+    losses = -delta.where(delta < 0, 0)
+    rs = gains.rolling(window=window).mean() / losses.rolling(window=window).mean()
+    rs = rs.replace([float('inf'), -float('inf')], float('nan')).fillna(0)
+    return 100 - (100 / (1 + rs))
+
+
+def make_klines(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows))), 1) # rounding gives some unchanged closes
+    spread = np.abs(rng.normal(0, 0.005, rows)) * close
+    return pd.DataFrame({
+        "open_time": pd.date_range("2024-01-01", periods=rows, freq="5min"),
+        "open": np.roll(close, 1),
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.uniform(1, 100, rows)
+    })
+
+
+def flat_and_nan_klines() -> pd.DataFrame:
+    df = make_klines(500, seed=1)
+    df.loc[100:150, "close"] = df.loc[100, "close"] # unchanged closes
+    df.loc[200, "close"] = np.nan # undefined moves
+    df.loc[300, "volume"] = np.nan # NaN volume propagates, as before
+    return df
+
+
+CASES = {
+    "random": lambda: make_klines(3000),
+    "flat_and_nan": flat_and_nan_klines,
+    "single_row": lambda: make_klines(1)
+}
+
+
+@pytest.fixture(scope="module")
+def ic() -> IndicatorCalculation:
+    return IndicatorCalculation()
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_obv_matches_row_loop(ic, case):
+    df = CASES[case]()
+    pd.testing.assert_series_equal(ic.obv(prices=df), obv_loop(df), check_names=False)
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_adx_matches_reference(ic, case):
+    df = CASES[case]()
+    pd.testing.assert_frame_equal(ic.adx(df.copy())[['+DI', '-DI', 'ADX']], adx_reference(df))
+
+
+@pytest.mark.parametrize("case", ["random", "flat_and_nan"])
+def test_rsi_matches_pandas_formula(ic, case):
+    df = CASES[case]()
+    rsi = ic.rsi(prices=df, window=10)
+    assert rsi.index.equals(df.index) and np.isnan(rsi.iloc[0])
+    expected = rsi_scale_reference(df, 10) / 100
+    pd.testing.assert_series_equal(rsi.iloc[1:], expected, check_names=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("case", ["random", "flat_and_nan"])
+def test_stoch_rsi_matches_pandas_formula(ic, case):
+    df = CASES[case]()
+    rsi = rsi_scale_reference(df, 14)
+    expected = (rsi - rsi.rolling(14).min()) / (rsi.rolling(14).max() - rsi.rolling(14).min())
+    pd.testing.assert_series_equal(ic.stoch_rsi(prices=df).iloc[1:], expected, check_names=False, rtol=1e-9)
+
+
+def test_direct_methods_equal_full_calculation(ic):
+    df = make_klines(1000)
+    full = ic.full_indicators_calculation(df.copy())
+    pd.testing.assert_series_equal(ic.rsi(prices=df, window=ic.rsi_window), full["rsi"], check_names=False, rtol=0, atol=0)
+    pd.testing.assert_series_equal(ic.stoch_rsi(prices=df), full["stoch_rsi"], check_names=False, rtol=0, atol=0)
+
+
+def test_batch_matches_per_series(ic):
+    frames = []
+    for i in range(50):
+        df = make_klines(200, seed=i)
+        df["close"] *= [60000, 1.0001, 0.01][i % 3] # mixed price scales must not leak between series
+        df["asset_id"] = f"asset-{i // 5}"
+        df["time_frame"] = ["5m", "15m", "1h", "4h", "1d"][i % 5]
+        frames.append(df)
+    expected = pd.concat([ic.full_indicators_calculation(df.copy()) for df in frames], ignore_index=True)
+    expected = expected.sort_values(by=["asset_id", "time_frame", "open_time"], ignore_index=True)
+    shuffled = pd.concat(frames, ignore_index=True).sample(frac=1, random_state=0)
+    result = ic.batch_indicators_calculation(shuffled)
+    pd.testing.assert_frame_equal(result[expected.columns], expected, rtol=1e-9)